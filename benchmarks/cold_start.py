@@ -0,0 +1,47 @@
+# Compare the start-up time and query latency of the pickled address book
+# with the memory-mapped columnar snapshot.
+#
+# Usage: python benchmarks/cold_start.py [count]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import addressbook  # noqa: E402
+import columnar_store  # noqa: E402
+from record_memory import make_record  # noqa: E402
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<28} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    book = addressbook.AddressBook()
+    for i in range(count):
+        book.add_record(make_record(i))
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_file = os.path.join(directory, "addressbook.pkl")
+        snapshot_file = os.path.join(directory, "termibook.snap")
+        addressbook.save_data(book, pickle_file)
+        columnar_store.save_data(book, snapshot_file)
+        del book
+        print(f"{count} contacts")
+        for label, load in (("pickle", lambda: addressbook.load_data(pickle_file)),
+                            ("columnar", lambda: columnar_store.load_data(snapshot_file))):
+            loaded = timed(f"{label}: load", load)
+            timed(f"{label}: find", lambda: loaded.find(f"Contact {count // 2}"))
+            timed(f"{label}: search '77@ex'", lambda: loaded.search("77@ex"))
+            timed(f"{label}: birthdays 7", lambda: loaded.get_upcoming_birthday(7))
+            if label == "columnar":
+                loaded.close()
+
+
+if __name__ == "__main__":
+    main()
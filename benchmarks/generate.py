@@ -0,0 +1,105 @@
+# Synthetic address books for the benchmarks: contacts with realistic
+# fields, 1-20 notes each, tags and note words drawn from Zipf
+# distributions (a few very common tags, a long tail of rare ones).
+#
+# Usage: python benchmarks/generate.py [count] [--notes MIN-MAX]
+#   writes addressbook.pkl and notesbook.pkl to the current directory.
+import argparse
+import os
+import random
+import sys
+from itertools import accumulate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from addressbook import AddressBook, Record, save_data  # noqa: E402
+from notes import NotesBook, Note  # noqa: E402
+import notes  # noqa: E402
+
+FIRST_NAMES = ["Olena", "Taras", "Iryna", "Andrii", "Maria", "Oleh", "Sofiia", "Dmytro", "Anna", "Yurii",
+               "Kateryna", "Serhii", "Nataliia", "Petro", "Oksana", "Ivan", "Daria", "Bohdan", "Viktoriia", "Maksym",
+               "John", "Emma", "Liam", "Olivia", "Noah", "Ava", "Lucas", "Mia", "Ethan", "Chloe"]
+LAST_NAMES = ["Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko", "Oliinyk", "Shevchuk",
+              "Polishchuk", "Lysenko", "Marchenko", "Melnyk", "Boiko", "Savchenko", "Rudenko", "Moroz",
+              "Smith", "Johnson", "Brown", "Taylor", "Wilson", "Martin", "Clark", "Lewis", "Walker", "Young"]
+STREETS = ["Main Street", "Khreshchatyk", "Shevchenko Avenue", "Oak Lane", "Park Road", "Lesi Ukrainky Blvd",
+           "High Street", "Sadova", "River Drive", "Hill Road"]
+CITIES = ["Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "London", "Berlin", "Warsaw", "Toronto", "Boston"]
+DOMAINS = ["example.com", "mail.com", "post.ua", "inbox.org", "company.net"]
+COMMON_TAGS = ["work", "family", "birthday", "todo", "call", "meeting", "idea", "urgent", "shopping", "travel"]
+COMMON_WORDS = ["call", "back", "about", "order", "meeting", "buy", "gift", "send", "invoice", "remind",
+                "project", "review", "lunch", "tomorrow", "friday", "report", "email", "book", "tickets", "pay"]
+
+TAG_COUNT = 500
+WORD_COUNT = 5000
+ZIPF_EXPONENT = 1.1
+
+
+def zipf_vocabulary(common, size, prefix):
+    """Words ordered by rank, with cumulative Zipf weights for random.choices."""
+    words = common + [f"{prefix}{i}" for i in range(size - len(common))]
+    weights = list(accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, size + 1)))
+    return words, weights
+
+
+TAGS, TAG_WEIGHTS = zipf_vocabulary(COMMON_TAGS, TAG_COUNT, "tag")
+WORDS, WORD_WEIGHTS = zipf_vocabulary(COMMON_WORDS, WORD_COUNT, "word")
+
+
+def contact_name(i):
+    return f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i // len(FIRST_NAMES) % len(LAST_NAMES)]} {i}"
+
+
+def make_contact(i, rng):
+    record = Record(contact_name(i))
+    for _ in range(rng.choice((1, 1, 1, 2, 2, 3))):
+        record.add_phone(f"{rng.randrange(10**9, 10**10)}")
+    if rng.random() < 0.8:
+        record.add_email(f"{record.name.value.split()[0].lower()}{i}@{rng.choice(DOMAINS)}")
+    if rng.random() < 0.6:
+        record.add_birthday(f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1940, 2010)}")
+    if rng.random() < 0.5:
+        record.add_address(f"{rng.randint(1, 300)} {rng.choice(STREETS)}, {rng.choice(CITIES)}")
+    return record
+
+
+def make_note(rng):
+    words = rng.choices(WORDS, cum_weights=WORD_WEIGHTS, k=rng.randint(3, 12))
+    tags = set(rng.choices(TAGS, cum_weights=TAG_WEIGHTS, k=rng.randint(0, 3)))
+    return Note(" ".join(words), sorted(tags))
+
+
+def generate(count, notes_per_contact=(1, 20), seed=0):
+    """
+    Build an address book and a notes book with ``count`` contacts.
+
+    Returns:
+        tuple: (AddressBook, NotesBook)
+    """
+    rng = random.Random(seed)
+    book = AddressBook()
+    notes_book = NotesBook()
+    low, high = notes_per_contact
+    for i in range(count):
+        record = make_contact(i, rng)
+        book.add_record(record)
+        for _ in range(rng.randint(low, high)):
+            notes_book.add_note(record.name.value, make_note(rng))
+    return book, notes_book
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic address book and notes book")
+    parser.add_argument("count", nargs="?", type=int, default=10_000)
+    parser.add_argument("--notes", default="1-20", help="notes per contact, MIN-MAX (default: 1-20)")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args()
+    low, high = map(int, options.notes.split("-"))
+    book, notes_book = generate(options.count, (low, high), options.seed)
+    save_data(book)
+    notes.save_data(notes_book)
+    print(f"{len(book.data)} contacts, {sum(map(len, notes_book.data.values()))} notes written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Measure the memory used per contact record and per note.
+#
+# Usage: python benchmarks/record_memory.py [count]
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from addressbook import Record  # noqa: E402
+from notes import Note  # noqa: E402
+
+TAGS = ["work", "family", "birthday", "todo", "call"]
+
+
+def make_record(i):
+    record = Record(f"Contact {i}")
+    record.add_phone(f"{i % 10**10:010d}")
+    record.add_phone(f"{(i * 7919 + 1) % 10**10:010d}")
+    record.add_email(f"contact{i}@example.com")
+    record.add_birthday(f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.{1950 + i % 60}")
+    record.add_address(f"{i} Main Street, Springfield")
+    return record
+
+
+def make_note(i):
+    return Note(f"call back about order {i}", [TAGS[i % 5], TAGS[(i + 1) % 5]])
+
+
+def measure(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Exclude the list holding the items
+    size = after - before - sys.getsizeof(items)
+    return size / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{count} items")
+    print(f"record: {measure(make_record, count):8.1f} bytes")
+    print(f"note:   {measure(make_note, count):8.1f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Compare the searches run in this process with ShardedSearch on 1, 4
+# and 16 worker processes: median latency per query kind, the time to
+# start the workers, and whether the results are the same.
+#
+# Usage: python benchmarks/search_scaling.py [contacts] [--workers 1,4,16] [--notes MIN-MAX]
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sharded_search import ShardedSearch  # noqa: E402
+from generate import generate, contact_name, TAGS, TAG_WEIGHTS, WORDS, WORD_WEIGHTS  # noqa: E402
+
+QUERIES = 20  # queries per kind
+
+
+def queries(count, rng):
+    return {
+        "search": [contact_name(rng.randrange(count)).split()[rng.randrange(2)][:rng.choice((2, 4))].lower()
+                   for _ in range(QUERIES)],
+        "search_by_tag": rng.choices(TAGS[:50], cum_weights=TAG_WEIGHTS[:50], k=QUERIES),
+        "search_by_text": [" ".join(rng.choices(WORDS, cum_weights=WORD_WEIGHTS, k=rng.choice((1, 2))))
+                           for _ in range(QUERIES)],
+    }
+
+
+def run(searchers, kind, query):
+    book_search, notes_search = searchers
+    if kind == "search":
+        return [(record.name.value, fields) for record, fields in book_search.search(query)]
+    if kind == "search_by_tag":
+        return [(contact, note.uid) for contact, note in notes_search.search_by_tag(query)]
+    # Equal scores may come in another order, compare the sets
+    return sorted((contact, note.uid) for contact, note in notes_search.search_by_text(query))
+
+
+def measure(searchers, all_queries):
+    timings, results = {}, {}
+    for kind, kind_queries in all_queries.items():
+        run(searchers, kind, kind_queries[0])  # build the lazy indexes
+        latencies = []
+        for query in kind_queries:
+            start = time.perf_counter()
+            results[kind, query] = run(searchers, kind, query)
+            latencies.append(time.perf_counter() - start)
+        timings[kind] = statistics.median(latencies) * 1000
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search latency with 1, 4, 16 worker processes")
+    parser.add_argument("count", nargs="?", type=int, default=100_000)
+    parser.add_argument("--workers", default="1,4,16")
+    parser.add_argument("--notes", default="1-20", help="notes per contact, MIN-MAX (default: 1-20)")
+    options = parser.parse_args()
+    low, high = map(int, options.notes.split("-"))
+    book, notes_book = generate(options.count, (low, high))
+    all_queries = queries(options.count, random.Random(1))
+    print(f"{options.count} contacts, {sum(map(len, notes_book.data.values()))} notes, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'start s':>8} " + " ".join(f"{kind + ' ms':>18}" for kind in all_queries) + "  results")
+
+    timings, expected = measure((book, notes_book), all_queries)
+    print(f"{'-':>8} {'-':>8} " + " ".join(f"{timings[kind]:18.2f}" for kind in all_queries))
+    for workers in map(int, options.workers.split(",")):
+        start = time.perf_counter()
+        searcher = ShardedSearch(book, notes_book, workers)
+        started = time.perf_counter() - start
+        timings, results = measure((searcher, searcher), all_queries)
+        searcher.close()
+        same = "same" if results == expected else "DIFFERENT"
+        print(f"{workers:8} {started:8.1f} " + " ".join(f"{timings[kind]:18.2f}" for kind in all_queries) + f"  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# Benchmark the address book and notes hot paths on synthetic data and
+# compare the results with a stored baseline.
+#
+# For every book size, each operation is timed call by call (latency
+# percentiles and throughput), then run again under tracemalloc for its
+# peak memory. Results are written as JSON; with --baseline the p50
+# latency and peak memory are compared with an earlier run and the
+# script exits with status 1 if any of them regressed by more than
+# --threshold.
+#
+# Usage: python benchmarks/suite.py [--sizes 10000,100000] [--output results.json]
+#                                   [--baseline baseline.json] [--threshold 0.2]
+#                                   [--only find,search_contacts] [--cache DIR]
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import addressbook  # noqa: E402
+import notes  # noqa: E402
+from main import search_contacts  # noqa: E402
+from pretty_table2 import draw_table, wrap_text  # noqa: E402
+from generate import generate, contact_name, TAGS, TAG_WEIGHTS, WORDS, WORD_WEIGHTS  # noqa: E402
+
+SAMPLES = 200  # timed calls per operation
+SLOW_SAMPLES = 5  # timed calls for save_data / load_data
+MEMORY_SAMPLES = 3  # calls run under tracemalloc
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def operations(book, notes_book, count, directory, rng):
+    """
+    The benchmarked operations as (name, samples, make_call) triples.
+    make_call(i) returns a function running the i-th call, so that every
+    call can ask for a different contact, tag or word.
+    """
+    names = [contact_name(rng.randrange(count)) for _ in range(SAMPLES)]
+    keywords = [name.split()[rng.randrange(2)][:4].lower() for name in names]
+    tags = rng.choices(TAGS, cum_weights=TAG_WEIGHTS, k=SAMPLES)
+    words = rng.choices(WORDS, cum_weights=WORD_WEIGHTS, k=SAMPLES)
+    headers = ["Name", "Phones", "Email", "Birthday", "Address", "Notes", "Tags"]
+    rows = [[record.name.value, "; ".join(p.value for p in record.phones),
+             record.email or "-", record.birthday or "-", record.address or "-",
+             "\n".join(note.text for note in notes_book.get_notes(record.name.value)) or "-", "-"]
+            for record in list(book.data.values())[:50]]
+    text = " ".join(words) * 5
+    book_file = os.path.join(directory, "addressbook.pkl")
+    notes_file = os.path.join(directory, "notesbook.pkl")
+    addressbook.save_data(book, book_file)
+    notes.save_data(notes_book, notes_file)
+
+    def save(i):
+        addressbook.save_data(book, book_file)
+        notes.save_data(notes_book, notes_file)
+
+    def load(i):
+        addressbook.load_data(book_file)
+        notes.load_data(notes_file)
+
+    return [
+        ("find", SAMPLES, lambda i: lambda: book.find(names[i])),
+        ("search_contacts", SAMPLES, lambda i: lambda: search_contacts([keywords[i]], book, notes_book)),
+        ("get_upcoming_birthday", SAMPLES, lambda i: lambda: book.get_upcoming_birthday(7)),
+        ("search_by_tag", SAMPLES, lambda i: lambda: notes_book.search_by_tag(tags[i])),
+        ("search_by_text", SAMPLES, lambda i: lambda: notes_book.search_by_text(words[i])),
+        ("draw_table", SAMPLES, lambda i: lambda: draw_table(headers, rows, 120)),
+        ("wrap_text", SAMPLES, lambda i: lambda: wrap_text(text, 20 + i % 40)),
+        ("save_data", SLOW_SAMPLES, lambda i: lambda: save(i)),
+        ("load_data", SLOW_SAMPLES, lambda i: lambda: load(i)),
+    ]
+
+
+def measure(make_call, samples):
+    make_call(0)()  # warm up caches and lazy indexes
+    latencies = []
+    for i in range(samples):
+        call = make_call(i)
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    total = sum(latencies)
+    result = {f"p{p}_ms": percentile(latencies, p) * 1000 for p in PERCENTILES}
+    result.update(mean_ms=total / samples * 1000, max_ms=latencies[-1] * 1000,
+                  throughput_per_s=samples / total if total else None, samples=samples)
+    tracemalloc.start()
+    peak = 0
+    for i in range(min(samples, MEMORY_SAMPLES)):
+        call = make_call(i)
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        call()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    result["peak_memory_kb"] = peak / 1024
+    return result
+
+
+def load_books(count, notes_per_contact, seed, cache):
+    if cache:
+        prefix = os.path.join(cache, f"{count}-{notes_per_contact[0]}-{notes_per_contact[1]}-{seed}")
+        if os.path.exists(prefix + ".addressbook.pkl"):
+            return addressbook.load_data(prefix + ".addressbook.pkl"), notes.load_data(prefix + ".notesbook.pkl")
+    book, notes_book = generate(count, notes_per_contact, seed)
+    if cache:
+        os.makedirs(cache, exist_ok=True)
+        addressbook.save_data(book, prefix + ".addressbook.pkl")
+        notes.save_data(notes_book, prefix + ".notesbook.pkl")
+    return book, notes_book
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of p50 latency and peak memory against the baseline.
+
+    Returns:
+        list: "size/operation metric" of every regression above the threshold.
+    """
+    regressions = []
+    for size, ops in results.items():
+        for name, result in ops.items():
+            old = baseline.get(size, {}).get(name)
+            if old is None:
+                continue
+            changes = []
+            for metric in ("p50_ms", "peak_memory_kb"):
+                if not old.get(metric):
+                    continue
+                ratio = result[metric] / old[metric]
+                changes.append(f"{metric} {ratio - 1:+.0%}")
+                if ratio > 1 + threshold:
+                    regressions.append(f"{size}/{name} {metric}")
+            print(f"{size:>8} {name:<22} " + ", ".join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the address book and notes hot paths")
+    parser.add_argument("--sizes", default="10000",
+                        help="comma separated numbers of contacts (default: 10000)")
+    parser.add_argument("--notes", default="1-20", help="notes per contact, MIN-MAX (default: 1-20)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="comma separated operations to run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown counted as a regression (default: 0.2)")
+    parser.add_argument("--cache", help="directory keeping the generated books between runs")
+    options = parser.parse_args()
+    notes_per_contact = tuple(map(int, options.notes.split("-")))
+    only = set(options.only.split(",")) if options.only else None
+
+    results = {}
+    for count in map(int, options.sizes.split(",")):
+        start = time.perf_counter()
+        book, notes_book = load_books(count, notes_per_contact, options.seed, options.cache)
+        print(f"{count} contacts, {sum(map(len, notes_book.data.values()))} notes "
+              f"({time.perf_counter() - start:.1f}s to prepare)")
+        print(f"{'operation':<22} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'ops/s':>10} {'peak KiB':>10}")
+        results[str(count)] = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, samples, make_call in operations(book, notes_book, count, directory, random.Random(options.seed)):
+                if only and name not in only:
+                    continue
+                result = measure(make_call, samples)
+                results[str(count)][name] = result
+                print(f"{name:<22} {result['p50_ms']:9.3f} {result['p90_ms']:9.3f} {result['p99_ms']:9.3f} "
+                      f"{result['throughput_per_s']:10.0f} {result['peak_memory_kb']:10.1f}")
+        del book, notes_book
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {"date": datetime.now().isoformat(timespec="seconds"),
+                         "python": platform.python_version(), "platform": platform.platform(),
+                         "notes_per_contact": options.notes, "seed": options.seed},
+                "results": results,
+            }, f, indent=2)
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        print(f"\nCompared with {options.baseline}:")
+        regressions = compare(results, baseline, options.threshold)
+        if regressions:
+            print("Regressions: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Compare draw_table with the PrettyTable based renderer it replaced:
+# rendering time for the rows of the "all" command, and whether both
+# produce the same output. They differ where cells hold emoji or color
+# codes: the old wrapper counted characters, draw_table counts display
+# columns.
+#
+# Usage: python benchmarks/table_render.py [rows]   (needs prettytable installed)
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from main import contact_rows  # noqa: E402
+from pretty_table2 import draw_table  # noqa: E402
+from generate import generate  # noqa: E402
+
+
+def old_wrap_text(text, max_width):
+    if not text or max_width <= 0 or len(text) <= max_width:
+        return text
+    words = text.split()
+    if not words:
+        return text
+    lines, current_line = [], ""
+    for word in words:
+        if current_line and len(current_line) + 1 + len(word) > max_width:
+            lines.append(current_line)
+            current_line = word
+        else:
+            current_line = f"{current_line} {word}" if current_line else word
+    lines.append(current_line)
+    return "\n".join(lines)
+
+
+def old_draw_table(headers, data, maxcolwidths=80):
+    from prettytable import HRuleStyle, PrettyTable
+    table = PrettyTable(
+        vertical_char="│", horizontal_char="─", junction_char="┼",
+        top_junction_char="┬", bottom_junction_char="┴",
+        right_junction_char="┤", left_junction_char="├",
+        top_right_junction_char="╮", top_left_junction_char="╭",
+        bottom_right_junction_char="╯", bottom_left_junction_char="╰",
+        hrules=HRuleStyle.ALL, align="l",
+    )
+    table.field_names = headers
+    for row in data:
+        table.add_row([old_wrap_text(str(cell), maxcolwidths // 4) for cell in row])
+    return table.get_string()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    book, notes_book = generate(count, (0, 2))
+    headers = ["Name", "Phones", "Email", "Birthday", "Address", "Notes", "Tags"]
+    rows = list(contact_rows(book.data.items(), notes_book))
+    print(f"{count} rows")
+    outputs = {}
+    for label, render in (("PrettyTable", old_draw_table), ("draw_table", draw_table)):
+        start = time.perf_counter()
+        outputs[label] = render(headers, rows, 160)
+        print(f"{label:<12} {time.perf_counter() - start:8.2f} s")
+    old_lines, new_lines = outputs["PrettyTable"].split("\n"), outputs["draw_table"].split("\n")
+    differing = sum(old != new for old, new in zip(old_lines, new_lines)) + abs(len(old_lines) - len(new_lines))
+    print(f"{differing} of {len(old_lines)} lines differ (cells wrapped by display width)" if differing
+          else "same output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,697 @@
+from colorama import Fore
+import re
+from collections import UserDict
+import calendar
+from datetime import date, datetime, timedelta
+from bisect import bisect_left, insort
+from functools import wraps
+from text_index import SubstringIndex, NameIndex, suggestion_distance
+from storage import save_snapshot, load_snapshot
+from errors import SnapshotError
+from render_cache import Rendered
+
+def save_data(book, filename="addressbook.pkl"):
+    """
+    Save the address book to a file.
+
+    The file is replaced atomically and carries a checksum; the previous
+    snapshots are kept as addressbook.pkl.1, .2 and .3.
+
+    Args:
+        book (AddressBook): The address book to save.
+        filename (str): File name to store the data. Defaults to "addressbook.pkl".
+    """
+    save_snapshot(book, filename)
+
+def load_data(filename="addressbook.pkl"):
+    """
+    Load the address book from a file.
+
+    Args:
+        filename (str): File name to load the data from. Defaults to "addressbook.pkl".
+
+    Returns:
+        AddressBook: Loaded address book or new empty one if file not found.
+
+    Raises:
+        SnapshotError: If the file and all its previous generations are corrupted.
+    """
+    try:
+        # Falls back to the newest valid generation; records and fields from
+        # older versions are upgraded by their __setstate__
+        book = load_snapshot(filename)
+    except FileNotFoundError:
+        return AddressBook() 
+    book.rebuild_index()
+    return book
+
+class Field:
+    """
+    Base class for fields in a contact record (e.g., Name, Phone).
+
+    Fields use __slots__ instead of a per-instance __dict__; every subclass
+    declares where its value is stored.
+    """
+    __slots__ = ()
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return str(self.value)
+
+    def __getstate__(self):
+        return (self.value,)
+
+    def __setstate__(self, state):
+        # Pickles written before fields had __slots__ hold the instance __dict__
+        if isinstance(state, dict):
+            state = (state.get("value"),)
+        self.value, = state
+
+class Name(Field):
+    """
+    Represents a contact's name.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError("Name must be a non-empty string.")
+        self.value = value.strip()
+
+class Phone(Field):
+    """
+    Represents a contact's phone number.
+
+    The number is stored as an int rather than a string. Valid numbers
+    always have 10 digits, so leading zeros are restored when formatting.
+    """
+    __slots__ = ("_number",)
+
+    def __init__(self, phone):
+        if not isinstance(phone, str) or not phone.strip():
+            raise ValueError("Phone must be a non-empty string.")
+        value = phone.strip()
+        if not value.isdigit():
+            raise ValueError("Phone number must contain only digits.")
+        self.value = value
+        if len(value) != 10:
+            raise ValueError("Phone number must be 10 digits long.")
+
+    @property
+    def value(self):
+        return f"{self._number:010d}"
+
+    @property
+    def number(self):
+        return self._number
+
+    @value.setter
+    def value(self, value):
+        self._number = int(value)
+
+class Email(Field):
+    """
+    Represents a contact's email.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, email):
+        if not isinstance(email, str) or not email.strip():
+            raise ValueError("Email must be a non-empty string.")
+        email = email.strip()
+        pattern = r"^[\w\.-]+@[\w\.-]+\.\w+$"
+        if not re.match(pattern, email):
+            raise ValueError("Invalid email format.")
+        self.value = email
+
+class Birthday(Field):
+    """
+    Represents a contact's birthday.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        """
+        Initialize a Birthday with date validation.
+
+        Args:
+            value (str): Date in DD.MM.YYYY format.
+
+        Raises:
+            ValueError: If date is invalid or out of range.
+        """
+        try:
+            self.value = datetime.strptime(value, "%d.%m.%Y")
+            if self.value.year < 1900 or self.value > datetime.now():
+                raise ValueError("Year must be between 1900 and the current year.")
+        except ValueError as e:
+            if "does not match format" in str(e):
+                raise ValueError("Invalid date format. Use DD.MM.YYYY")
+            else:
+                raise ValueError(str(e))
+
+def upcoming_days(period_days, today=None):
+    """
+    List the calendar days of an upcoming birthdays window.
+
+    The window starts today and ends ``period_days`` days later, but never
+    reaches the same day of the next year, so every birthday appears at
+    most once. In non-leap years, 29 February birthdays fall on 1 March.
+
+    Args:
+        period_days (int): Number of days after today to include.
+        today (date, optional): First day of the window. Defaults to today.
+
+    Returns:
+        list: (date, list of (month, day) birthday keys) pairs in date order.
+    """
+    today = today or date.today()
+    days = []
+    seen = set()
+    for offset in range(min(period_days, 366) + 1):
+        day = today + timedelta(days=offset)
+        keys = [(day.month, day.day)]
+        if day.month == 3 and day.day == 1 and not calendar.isleap(day.year):
+            keys.append((2, 29))
+        keys = [key for key in keys if key not in seen]
+        if offset and (day.month, day.day) == (today.month, today.day):
+            break
+        seen.update(keys)
+        days.append((day, keys))
+    return days
+
+def phone_prefix_range(prefix):
+    """
+    Turn a phone number prefix into the range of numbers starting with it.
+
+    Args:
+        prefix (str): Up to 10 digits.
+
+    Returns:
+        tuple: (low, high) ints; the numbers n with low <= n < high match.
+
+    Raises:
+        ValueError: If the prefix is not 1 to 10 digits.
+    """
+    prefix = prefix.strip() if isinstance(prefix, str) else ""
+    if not (prefix.isascii() and prefix.isdigit()) or len(prefix) > 10:
+        raise ValueError("Phone prefix must be 1 to 10 digits.")
+    scale = 10 ** (10 - len(prefix))
+    low = int(prefix) * scale
+    return low, low + scale
+
+def congratulation_date(day):
+    """
+    Move a date that falls on a weekend to the following Monday.
+
+    Args:
+        day (date): Birthday date.
+
+    Returns:
+        date: The date to congratulate on.
+    """
+    if day.weekday() == 5:  # Saturday
+        return day + timedelta(days=2)
+    if day.weekday() == 6:  # Sunday
+        return day + timedelta(days=1)
+    return day
+
+class Address(Field):
+    """
+    Represents a contact's address.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        if not value.strip():
+            self.value = None
+            return
+        value = value.strip()
+        if len(value) < 5:
+            raise ValueError("Address is too short.")
+        if re.search(r"[<>@#$%^&*]", value):
+            raise ValueError("Address contains invalid characters.")
+        self.value = value
+
+def record_mutation(method):
+    """
+    Decorator for Record methods that change the record.
+
+    After the change the version of the record is bumped, so its cached
+    display strings are built again, and the address book that owns the
+    record (if any) is notified, so it can persist the new state of the
+    record.
+
+    Args:
+        method (function): Record method to wrap.
+
+    Returns:
+        function: Wrapped method.
+    """
+    @wraps(method)
+    def inner(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.changed()
+        book = getattr(self, "_book", None)
+        if book is not None:
+            book.record_changed(self)
+        return result
+    return inner
+
+class Record(Rendered):
+    """
+    Represents a contact record in the address book.
+
+    Attributes:
+        name (Name): Contact's name.
+        phones (list): List of Phone objects.
+        email (Email): Contact's email (optional).
+        birthday (Birthday): Contact's birthday (optional).
+        address (Address): Contact's address (optional).
+
+    Notes are kept by the NotesBook. Records use __slots__ instead of a
+    per-instance __dict__, but are pickled as a dict of their attributes
+    as before. Display strings are cached until the record changes
+    (see Rendered); code that sets the attributes of a record in a book
+    directly must call ``changed``.
+    """
+    __slots__ = ("name", "phones", "email", "birthday", "address", "_book", "_version", "_rendered")
+    _NOT_PICKLED = ("_book", "_version", "_rendered")
+
+    def __init__(self, name):
+        self.name = Name(name)
+        self.phones = []
+        self.email = None
+        self.birthday = None
+        self.address = None
+        self._book = None  # AddressBook the record belongs to, not pickled
+        self._version = 0
+        self._rendered = None
+    def __getstate__(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__ if attr not in self._NOT_PICKLED}
+    def __setstate__(self, state):
+        # Older pickles may lack email, birthday or address, and carry an unused "notes" list
+        self.email = self.birthday = self.address = self._book = self._rendered = None
+        self._version = 0
+        for attr, value in state.items():
+            if attr in self.__slots__:
+                setattr(self, attr, value)
+    @record_mutation
+    def add_phone(self, phone):
+        if self.find_phone(phone):
+            print(f"Phone {phone} already exists for {self.name.value}. Not adding.")
+            return
+        self.phones.append(Phone(phone))
+    @record_mutation
+    def remove_phone(self, phone):
+        phone_to_remove = Phone(phone)
+        self.phones = [p for p in self.phones if p.value != phone_to_remove.value]
+    def find_phone(self, phone):
+        if not isinstance(phone, str) or not phone.strip():
+            raise ValueError("Phone must be a non-empty string.")
+        phone = phone.strip()
+        if any(p.value == phone for p in self.phones):
+            return phone
+        return None
+    @record_mutation
+    def edit_phone(self, old_phone, new_phone):
+        for p in self.phones:
+            if p.value == old_phone:
+                p.value = Phone(new_phone).value
+                return
+        raise ValueError("Phone number not found.")
+    @record_mutation
+    def add_email(self, email):
+        self.email = Email(email)
+
+    def find_email(self):
+        return self.email.value if self.email else None
+
+    @record_mutation
+    def edit_email(self, new_email):
+        if not self.email:
+            raise ValueError("Email is not set. Please add an email first.")
+        self.email = Email(new_email)
+    @record_mutation
+    def remove_email(self):
+        if not self.email:
+            raise ValueError("Email is not set.")
+        self.email = None
+    @record_mutation
+    def add_address(self, address):
+        self.address = Address(address)
+    @record_mutation
+    def edit_address(self, new_address):
+        if not self.address:
+            raise ValueError("Address is not set. Please add an address first.")
+        self.address = Address(new_address)
+    @record_mutation
+    def remove_address(self):
+        if not self.address:
+            raise ValueError("Address is not set.")
+        self.address = None
+    def find_address(self):
+        return self.address.value if self.address else None
+    @record_mutation
+    def add_birthday(self, birthday):
+        self.birthday = Birthday(birthday)
+    def _contact_string(self):
+        phones_str = '; '.join(p.value for p in self.phones) if self.phones else "no phones"
+        email_str = f", email: {self.email.value}" if self.email else ""
+        birthday_str = f", birthday: {self.birthday.value.strftime('%d.%m.%Y')}" if self.birthday else ""
+        address_str = f", address: {self.address.value}" if self.address else ""
+        return f"Contact name: {self.name.value}, phones: {phones_str}{email_str}{birthday_str}{address_str}"
+    def to_string(self, notes_book=None):
+        notes_str = ""
+        if notes_book:
+            notes = notes_book.get_notes(self.name.value)
+            if notes:
+                notes_list = [note.line() for note in notes]
+                notes_str = f"\n    {Fore.GREEN}Notes:{Fore.RESET}\n    " + "\n    ".join(notes_list)
+            else:
+                notes_str = f"\n    {Fore.GREEN}Notes:{Fore.RESET} no notes"
+
+        return self.rendered("string", Record._contact_string) + notes_str
+
+
+class AddressBook(UserDict):
+    """
+    Represents an address book that stores contacts (Record instances).
+
+    Besides the records themselves the book keeps a case-insensitive
+    name index (casefolded name -> canonical key), so that ``find`` does
+    not have to scan every record, a trigram index over names, phones,
+    emails and addresses for substring ``search``, birthdays bucketed
+    by calendar day for ``get_upcoming_birthday``, and a reverse phone
+    index (number -> owners, plus a sorted list of numbers for prefix
+    lookups and the set of numbers shared by several contacts). The
+    casefolded names are also kept sorted in a NameIndex, built on the
+    first name completion or suggestion. The indexes are not
+    pickled; they are rebuilt by ``rebuild_index`` after loading and
+    updated through ``record_changed`` whenever a record changes.
+
+    If a journal is attached, every change of a record is appended to it.
+    ``version`` counts the changes made since the book was created or
+    loaded, so that callers can tell whether it changed since they last
+    looked at it (e.g. to know if it has unsaved changes).
+    """
+    def __init__(self, *args, **kwargs):
+        self.journal = None
+        self.version = 0
+        super().__init__(*args, **kwargs)
+        self.rebuild_index()
+
+    def __getstate__(self):
+        # Keep the pickle format unchanged: only records are stored
+        return {"data": self.data}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.journal = None
+        self.version = 0
+        self._clear_index()
+
+    def _clear_index(self):
+        self._index = {}  # key: casefolded name, value: record key
+        self._names = None  # NameIndex of the casefolded names; built when first needed
+        self._search = SubstringIndex()  # document key: record key
+        self._birthdays = {}  # key: (month, day), value: dict of record key -> None
+        self._birthday_of = {}  # key: record key, value: (month, day)
+        self._phones = {}  # key: phone number (int), value: dict of record key -> None
+        self._phones_of = {}  # key: record key, value: tuple of phone numbers
+        self._phone_keys = []  # sorted phone numbers, for prefix lookups
+        self._shared_phones = set()  # phone numbers owned by more than one record
+
+    def rebuild_index(self):
+        """
+        Rebuild the indexes from the stored records.
+        """
+        self._clear_index()
+        self._phone_keys = None  # sorted once after the loop below
+        for record in self.data.values():
+            self._index_record(record)
+        self._phone_keys = sorted(self._phones)
+
+    def _index_record(self, record):
+        name = record.name.value
+        record._book = self
+        key = name.casefold()
+        if self._names is not None and key not in self._index:
+            self._names.add(key)
+        self._index[key] = name
+        self._search.add(name, {
+            "name": name,
+            "phone": "\n".join(p.value for p in record.phones),
+            "email": record.email.value if record.email else None,
+            "address": record.address.value if record.address else None,
+        })
+        self._unindex_birthday(name)
+        if record.birthday and record.birthday.value:
+            key = (record.birthday.value.month, record.birthday.value.day)
+            self._birthdays.setdefault(key, {})[name] = None
+            self._birthday_of[name] = key
+        numbers = tuple(dict.fromkeys(p.number for p in record.phones))
+        old_numbers = self._phones_of.get(name, ())
+        if numbers != old_numbers:
+            for number in old_numbers:
+                if number not in numbers:
+                    self._unindex_phone(number, name)
+            for number in numbers:
+                if number not in old_numbers:
+                    self._index_phone(number, name)
+            if numbers:
+                self._phones_of[name] = numbers
+            else:
+                del self._phones_of[name]
+
+    def _index_phone(self, number, name):
+        owners = self._phones.get(number)
+        if owners is None:
+            owners = self._phones[number] = {}
+            if self._phone_keys is not None:
+                insort(self._phone_keys, number)
+        owners[name] = None
+        if len(owners) > 1:
+            self._shared_phones.add(number)
+
+    def _unindex_phone(self, number, name):
+        owners = self._phones[number]
+        del owners[name]
+        if len(owners) < 2:
+            self._shared_phones.discard(number)
+        if not owners:
+            del self._phones[number]
+            del self._phone_keys[bisect_left(self._phone_keys, number)]
+
+    def _unindex_birthday(self, name):
+        key = self._birthday_of.pop(name, None)
+        if key is not None:
+            bucket = self._birthdays[key]
+            del bucket[name]
+            if not bucket:
+                del self._birthdays[key]
+
+    def _unindex_record(self, name):
+        if self._index.get(name.casefold()) == name:
+            del self._index[name.casefold()]
+            if self._names is not None:
+                self._names.remove(name.casefold())
+        self._search.remove(name)
+        self._unindex_birthday(name)
+        for number in self._phones_of.pop(name, ()):
+            self._unindex_phone(number, name)
+
+    def record_changed(self, record):
+        """
+        Called by a record after it has been changed.
+
+        Args:
+            record (Record): The changed record.
+        """
+        self._index_record(record)
+        self.version += 1
+        if self.journal is not None:
+            self.journal.append("record", record.name.value, record)
+
+    def restore(self, name, record):
+        """
+        Replace the stored state of a contact without journaling it.
+        Used when replaying the journal.
+
+        Args:
+            name (str): Contact name.
+            record (Record): New state of the contact, or None to remove it.
+        """
+        self._insert(name, record)
+        self.version += 1
+
+    def _insert(self, name, record):
+        # Store and index a record without counting it as a change
+        if self.data.pop(name, None) is not None:
+            self._unindex_record(name)
+        if record is not None:
+            self.data[name] = record
+            self._index_record(record)
+
+    def add_record(self, record: Record):
+        if not isinstance(record, Record):
+            raise TypeError("Only Record instances can be added.")
+        self.data[record.name.value] = record
+        self.record_changed(record)
+    def find(self, name):
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Name must be a non-empty string.")
+        key = self._index.get(name.strip().casefold())
+        if key is None:
+            return None
+        return self.data.get(key)
+    def _name_index(self):
+        if self._names is None:
+            self._names = NameIndex(self._index)
+        return self._names
+    def complete_names(self, prefix, limit=None):
+        """
+        Find the contacts whose name starts with a prefix, e.g. to complete it.
+
+        Args:
+            prefix (str): Name prefix (case-insensitive).
+            limit (int, optional): Maximum number of names.
+
+        Returns:
+            list: Contact names, in case-insensitive order.
+        """
+        return [self._index[key] for key in self._name_index().complete(prefix.casefold(), limit)]
+    def similar_names(self, name, limit=None):
+        """
+        Find the contacts whose name is a typo or two away from a name
+        (see ``suggestion_distance``), to suggest them when it is not found.
+
+        Args:
+            name (str): The name that was typed.
+            limit (int, optional): Maximum number of names.
+
+        Returns:
+            list: Contact names, closest first.
+        """
+        return [found for _, found in self._similar_names(name.strip().casefold())[:limit]]
+    def _similar_names(self, key):
+        # (distance, name) pairs, closest first
+        found = self._name_index().similar(key, suggestion_distance(key))
+        return [(distance, self._index[found_key]) for distance, found_key in found]
+    def delete(self, name):
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Name must be a non-empty string.")
+        name = name.strip()
+        if name in self.data:
+            record = self.data.pop(name)
+            record._book = None
+            self._unindex_record(name)
+            self.version += 1
+            if self.journal is not None:
+                self.journal.append("record", name, None)
+        else:
+            raise KeyError(f"Contact '{name}' not found.")   
+    def search(self, keyword):
+        """
+        Find contacts whose name, phones, email or address contain the keyword.
+
+        Args:
+            keyword (str): Substring to look for (case-insensitive).
+
+        Returns:
+            list: (Record, list of matched field names) pairs, ordered by name.
+        """
+        matches = self._search.search(keyword)
+        return [(self.data[name], fields)
+                for name, fields in sorted(matches.items(), key=lambda item: item[0].casefold())]
+
+    def find_by_phone(self, phone):
+        """
+        Find the contacts that have a phone number.
+
+        Args:
+            phone (str): Phone number, 10 digits.
+
+        Returns:
+            list: Records owning the number.
+        """
+        return [self.data[name] for name in self._phones.get(Phone(phone).number, ())]
+
+    def phones_with_prefix(self, prefix):
+        """
+        Find the phone numbers starting with a prefix, e.g. an area code.
+
+        Args:
+            prefix (str): Up to 10 digits.
+
+        Returns:
+            list: (phone, list of owner Records) pairs sorted by phone.
+        """
+        low, high = phone_prefix_range(prefix)
+        keys = self._phone_keys
+        return [(f"{number:010d}", [self.data[name] for name in self._phones[number]])
+                for number in keys[bisect_left(keys, low):bisect_left(keys, high)]]
+
+    def duplicate_phones(self):
+        """
+        Find the phone numbers shared by several contacts.
+
+        Returns:
+            list: (phone, list of owner Records) pairs sorted by phone.
+        """
+        return [(f"{number:010d}", [self.data[name] for name in self._phones[number]])
+                for number in sorted(self._shared_phones)]
+
+    def get_upcoming_birthday(self, period_days=7):
+        """
+        Find birthdays from today up to ``period_days`` days ahead.
+
+        Only the day buckets inside the window are read.
+
+        Args:
+            period_days (int): Number of days after today to include.
+
+        Returns:
+            list: (Record, birthday date, congratulation date) tuples sorted
+            by birthday date; weekend birthdays are congratulated on Monday.
+        """
+        upcoming_birthdays = []
+        records = self.data
+        for day, keys in upcoming_days(period_days):
+            congratulate_on = congratulation_date(day)
+            for key in keys:
+                bucket = self._birthdays.get(key)
+                if bucket:
+                    upcoming_birthdays.extend((records[name], day, congratulate_on) for name in bucket)
+        return upcoming_birthdays
+    
+    def save(self, args):
+        filename = None
+        if len(args) > 0:
+            filename = args[0]
+        if not filename:
+            filename = "addressbook.pkl"
+        save_snapshot(self, filename)
+
+    def load(self, args):
+        if len(args) >0:
+            filename, *_ = args
+        else:
+            filename = "addressbook.pkl"
+        try:
+            book = load_snapshot(filename)
+            book.rebuild_index()
+            return book
+        except SnapshotError as e:
+            print(f"{Fore.RED}{e}")
+            print("Staying with the current address book.")
+            return self
+        except FileNotFoundError:
+            create_new = input("No saved data found. Start with an empty address book? [Y/N] ")
+            if create_new.lower() == 'y':
+                return AddressBook()
+            else:
+                print("Staying with the current address book.")
+                return self
@@ -0,0 +1,156 @@
+import os
+import threading
+import addressbook
+from storage import dump_snapshot, write_atomic, GENERATIONS
+
+AUTOSAVE_EVERY = 100  # changes after which a snapshot is written
+AUTOSAVE_INTERVAL = 30  # seconds after which pending changes are written
+
+
+class Autosaver:
+    """
+    Background thread writing snapshots of the address book and the notes
+    book, so that a manual ``save`` is never needed and the prompt never
+    waits for the disk.
+
+    Every change is already in the journal; the worker keeps the journal
+    short. It wakes up when ``notify`` reports ``every`` unsaved changes
+    or ``interval`` seconds after the last wake-up, compares the book
+    versions with the ones it saved last, and writes a snapshot only if
+    they differ. Edits made while it sleeps or writes are coalesced into
+    the next snapshot.
+
+    Command handlers must run with ``lock`` held. The worker takes it
+    only to pickle the books into memory (or freeze a MappedAddressBook)
+    and rotate the journal; the files are written and renamed into place
+    (``write_atomic``) after the lock is released, so commands keep
+    running during the write. A mapped book is switched over to its new
+    snapshot under the lock again.
+
+    Attributes:
+        book (AddressBook): The address book, or a MappedAddressBook.
+        notes_book (NotesBook): The notes book.
+        journal (Journal): The journal shared by both books.
+        every (int): Number of changes that triggers a save.
+        interval (float): Seconds between checks for unsaved changes.
+        lock (threading.RLock): Held while the books are used; the server
+            passes its ReadWriteLock instead (see server.py).
+        error (Exception): Last error of a background save, or None.
+            It is cleared by ``take_error``, which the prompt calls after
+            every command.
+    """
+    def __init__(self, book, notes_book, journal, every=AUTOSAVE_EVERY, interval=AUTOSAVE_INTERVAL, lock=None):
+        self.book = book
+        self.notes_book = notes_book
+        self.journal = journal
+        self.every = every
+        self.interval = interval
+        self.lock = threading.RLock() if lock is None else lock
+        self.error = None
+        self._saved = (book.version, notes_book.version)
+        self._write_lock = threading.Lock()  # one snapshot written at a time
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def changes(self):
+        """
+        Returns:
+            int: Number of changes not yet in a snapshot.
+        """
+        return (self.book.version - self._saved[0]) + (self.notes_book.version - self._saved[1])
+
+    def notify(self):
+        """
+        Called after a command: wakes the worker if enough changes are pending.
+        """
+        if self.changes() >= self.every:
+            self._wake.set()
+
+    def save_soon(self):
+        """
+        Ask the worker to write a snapshot now, without waiting for it.
+        """
+        self._wake.set()
+
+    def use(self, book, notes_book):
+        """
+        Switch to other books, e.g. after ``load``. Call with ``lock`` held.
+        """
+        self.book, self.notes_book = book, notes_book
+        self._saved = (-1, -1)  # the new books were never saved by the worker
+
+    def save(self):
+        """
+        Write a snapshot of both books if they changed since the last one.
+        Runs on the worker thread, or on the caller's thread for a
+        synchronous save.
+        """
+        with self._write_lock:
+            with self.lock:
+                book = self.book
+                versions = (book.version, self.notes_book.version)
+                if versions == self._saved:
+                    return
+                book_data = frozen = None
+                if isinstance(book, addressbook.AddressBook):
+                    book_data = dump_snapshot(book)
+                else:
+                    # A mapped book is written to a new columnar snapshot
+                    frozen = book.freeze()
+                notes_data = dump_snapshot(self.notes_book)
+                self.journal.rotate()
+            if frozen is not None and not self._write_mapped(book, frozen):
+                return
+            if book_data is not None:
+                write_atomic("addressbook.pkl", book_data, GENERATIONS)
+            write_atomic("notesbook.pkl", notes_data, GENERATIONS)
+            # The rotated journal is only needed until both snapshots are on disk
+            self.journal.discard_rotated()
+            self._saved = versions
+
+    def _write_mapped(self, book, frozen):
+        import columnar_store
+        try:
+            temp_file = frozen.write(columnar_store.SNAPSHOT_FILE)
+        finally:
+            frozen.close()
+        with self.lock:
+            if self.book is book:
+                return book.switch(frozen, temp_file, columnar_store.SNAPSHOT_FILE)
+        # Loaded in between: the rotated journal is kept for the next save
+        os.remove(temp_file)
+        return False
+
+    def take_error(self):
+        """
+        Returns:
+            Exception: The error of the last failed background save, or None.
+        """
+        error, self.error = self.error, None
+        return error
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped:
+                break
+            try:
+                self.save()
+            except Exception as e:
+                # The journal still holds every change; try again on the next wake-up
+                self.error = e
+
+    def stop(self):
+        """
+        Stop the worker, waiting for a snapshot being written to finish.
+        Changes made after it stay in the journal.
+        """
+        self._stopped = True
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+
+SOCKET_FILE = "termibook.sock"  # Unix socket of "termibook serve"
+HOST = "127.0.0.1"  # address of the TCP server, started with --port
+TOKEN_VARIABLE = "TERMIBOOK_TOKEN"  # token of the TCP server, if set when it starts
+TOKEN_FILE = "termibook.token"  # token of the TCP server otherwise, readable by its owner only
+
+
+def read_token(filename=TOKEN_FILE):
+    """
+    Token to show to a TCP server: the TERMIBOOK_TOKEN variable, or the
+    token the server wrote to its file.
+
+    Returns:
+        str: The token, or None if there is none.
+    """
+    token = os.environ.get(TOKEN_VARIABLE)
+    if token:
+        return token
+    try:
+        with open(filename, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class BookClient:
+    """
+    Connection to a running ``termibook serve``.
+
+    Requests and responses are JSON objects, one per line. A request is
+    ``{"id": 1, "command": "search", "args": ["anna"]}``; the response
+    ``{"id": 1, "ok": true, "output": "..."}`` holds what the prompt
+    would have printed. Several requests may be sent before reading the
+    responses (pipelining); responses come back in request order. A TCP
+    server also wants ``"token"`` in every request (see ``read_token``)
+    and closes the connection after a request without it.
+
+    Only the standard library is imported, so that scripts start fast.
+
+    Attributes:
+        color (bool): Ask for output with terminal colors.
+        token (str): Token sent with the requests, or None.
+    """
+    def __init__(self, path=SOCKET_FILE, port=None, host=HOST, color=False, token=None):
+        """
+        Args:
+            path (str): Unix socket of the server, used when no port is given.
+            port (int, optional): TCP port of the server.
+            host (str): TCP host of the server.
+            color (bool): Ask for output with terminal colors.
+            token (str, optional): Token of a TCP server. Defaults to ``read_token()``.
+        """
+        if port is not None and token is None:
+            token = read_token()
+        self.token = token
+        if port is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(path)
+        else:
+            self._socket = socket.create_connection((host, port))
+        self._reader = self._socket.makefile("r", encoding="utf-8", newline="\n")
+        self._writer = self._socket.makefile("w", encoding="utf-8", newline="\n")
+        self._next_id = 0
+        self.color = color
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, line):
+        """
+        Send a command line without waiting for its response.
+
+        Args:
+            line (str): Command and arguments, e.g. "search anna".
+
+        Returns:
+            int: Id of the request.
+
+        Raises:
+            ValueError: If the line holds no command.
+        """
+        if not line.strip():
+            raise ValueError("Empty command line.")
+        command, *args = line.split()
+        self._next_id += 1
+        request = {"id": self._next_id, "command": command.lower(), "args": args, "color": self.color}
+        if self.token is not None:
+            request["token"] = self.token
+        self._writer.write(json.dumps(request, ensure_ascii=False) + "\n")
+        self._writer.flush()
+        return self._next_id
+
+    def receive(self):
+        """
+        Wait for the next response.
+
+        Returns:
+            dict: The response, with "id", "ok" and "output".
+
+        Raises:
+            ConnectionError: If the server closed the connection.
+        """
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection.")
+        return json.loads(line)
+
+    def run(self, line):
+        """
+        Run one command and wait for its result.
+
+        Returns:
+            tuple: (ok, output).
+        """
+        self.send(line)
+        response = self.receive()
+        return response["ok"], response["output"]
+
+    def close(self):
+        try:
+            self._writer.close()
+        except OSError:
+            pass  # unsent data of a closed connection
+        self._reader.close()
+        self._socket.close()
+
+
+def commands(lines):
+    """
+    Command lines of a script: empty lines and "#" comments are skipped.
+    """
+    for line in lines:
+        if line.strip() and not line.lstrip().startswith("#"):
+            yield line
+
+def run_lines(client, lines):
+    """
+    Send command lines pipelined and print the responses as they come.
+
+    Lines are sent from a second thread, so that a long script never
+    waits for its first responses to be read.
+
+    Returns:
+        tuple: Number of commands and number of failed ones.
+    """
+    sent = queue.Queue()  # ids of the requests sent, None after the last one
+
+    def send_all():
+        try:
+            for line in commands(lines):
+                sent.put(client.send(line))
+        except OSError:
+            pass  # the server went away; receive() reports it
+        finally:
+            sent.put(None)
+
+    threading.Thread(target=send_all, daemon=True).start()
+    received = failed = 0
+    for _ in iter(sent.get, None):
+        response = client.receive()
+        received += 1
+        if response["output"]:
+            print(response["output"], file=sys.stdout if response["ok"] else sys.stderr)
+        failed += not response["ok"]
+    return received, failed
+
+def main(argv=None):
+    """
+    Thin client: ``termibook client [--socket PATH | --port N [--token-file PATH]] [command ...]``.
+
+    Runs the command given on the command line, or the command lines read
+    from stdin, against a running server.
+
+    Returns:
+        int: Exit status, 1 if a command failed, 2 if the server could not
+        be reached or closed the connection.
+    """
+    parser = argparse.ArgumentParser(prog="termibook client", description="Run commands on a running termibook server")
+    parser.add_argument("--socket", default=SOCKET_FILE, help=f"Unix socket of the server (default: {SOCKET_FILE})")
+    parser.add_argument("--port", type=int, help="TCP port of the server, on 127.0.0.1")
+    parser.add_argument("--token-file", default=TOKEN_FILE,
+                        help=f"token of the TCP server, unless {TOKEN_VARIABLE} is set (default: {TOKEN_FILE})")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command and arguments; read from stdin if omitted")
+    options = parser.parse_args(argv)
+    try:
+        token = read_token(options.token_file) if options.port is not None else None
+        client = BookClient(options.socket, options.port, color=sys.stdout.isatty(), token=token)
+    except OSError as e:
+        print(f"Cannot connect to the termibook server: {e}", file=sys.stderr)
+        return 2
+    line = " ".join(options.command)
+    with client:
+        try:
+            if options.command:
+                if not line.strip():
+                    print("Please enter a command.", file=sys.stderr)
+                    return 2
+                ok, output = client.run(line)
+                if output:
+                    print(output, file=sys.stdout if ok else sys.stderr)
+                return 0 if ok else 1
+            _, failed = run_lines(client, sys.stdin)
+            return 1 if failed else 0
+        except (OSError, EOFError) as e:
+            print(f"Lost the connection to the termibook server: {e}", file=sys.stderr)
+            return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,859 @@
+import os
+import mmap
+import pickle
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from datetime import datetime
+import addressbook
+from addressbook import (
+    AddressBook, Record, Phone, Email, Address, Birthday, upcoming_days, congratulation_date,
+    phone_prefix_range
+)
+from text_index import NameIndex, suggestion_distance
+from storage import replace_file
+from colorama import Fore
+
+SNAPSHOT_FILE = "termibook.snap"
+MAGIC = b"TBCOL002"
+BYTE_ORDER = 0x01020304  # written in native byte order, checked when opening
+
+# Sections of the file in order: (name, array typecode, or None for UTF-8 text)
+SECTIONS = [
+    ("name_offsets", "Q"), ("names", None),
+    ("email_offsets", "Q"), ("emails", None),
+    ("address_offsets", "Q"), ("addresses", None),
+    ("phone_offsets", "Q"), ("phones", "Q"),
+    ("birthdays", "I"),  # date ordinal, 0 if not set
+    ("by_name", "I"),  # positions sorted by casefolded name
+    ("birthday_keys", "H"),  # month * 32 + day, sorted
+    ("birthday_positions", "I"),  # positions in birthday_keys order
+    ("phone_keys", "Q"),  # every (phone, contact) pair's phone, sorted
+    ("phone_positions", "I"),  # positions in phone_keys order
+    ("shared_phones", "Q"),  # phones of more than one contact, sorted
+    ("search_offsets", "Q"), ("search", None),  # lowercased fields for substring search
+]
+_HEADER = struct.Struct(f"=8sIQ{2 * len(SECTIONS)}Q")
+_TEXT_COLUMNS = {"names": "name_offsets", "emails": "email_offsets",
+                 "addresses": "address_offsets", "search": "search_offsets"}
+SEARCH_FIELDS = ("name", "phone", "email", "address")
+FIELD_SEPARATOR = "\x1f"
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def write_snapshot(records, filename):
+    """
+    Write records to a columnar snapshot file.
+
+    Every field is stored in its own contiguous column. Text columns are
+    UTF-8 blobs with an offset table (entry i spans offsets[i] to
+    offsets[i + 1]), phones are packed 64-bit ints, birthdays are date
+    ordinals. The file also holds the contact positions sorted by name,
+    by birthday and by phone number, the numbers shared by several
+    contacts, and a lowercased copy of the searchable fields.
+
+    Args:
+        records (iterable): Records to write, e.g. ``book.data.values()``.
+        filename (str): File to write.
+
+    Returns:
+        int: Number of written records.
+    """
+    columns = {name: array(code) if code else bytearray() for name, code in SECTIONS}
+    for offsets in ("name_offsets", "email_offsets", "address_offsets", "phone_offsets", "search_offsets"):
+        columns[offsets].append(0)
+    keys = []  # casefolded names
+    birthdays = []  # (birthday key, position)
+    phones_index = set()  # (phone number, position)
+
+    def append_text(column, text):
+        columns[column] += text.encode("utf-8")
+        columns[_TEXT_COLUMNS[column]].append(len(columns[column]))
+
+    for position, record in enumerate(records):
+        name = record.name.value
+        email = record.email.value if record.email else ""
+        address = record.address.value if record.address and record.address.value else ""
+        phones = [p.value for p in record.phones]
+        append_text("names", name)
+        append_text("emails", email)
+        append_text("addresses", address)
+        columns["phones"].extend(int(phone) for phone in phones)
+        phones_index.update((int(phone), position) for phone in phones)
+        columns["phone_offsets"].append(len(columns["phones"]))
+        if record.birthday and record.birthday.value:
+            day = record.birthday.value
+            columns["birthdays"].append(day.toordinal())
+            birthdays.append((day.month * 32 + day.day, position))
+        else:
+            columns["birthdays"].append(0)
+        append_text("search", FIELD_SEPARATOR.join([name, "\n".join(phones), email, address]).lower())
+        keys.append(name.casefold())
+
+    columns["by_name"].extend(sorted(range(len(keys)), key=keys.__getitem__))
+    birthdays.sort()
+    columns["birthday_keys"].extend(key for key, _ in birthdays)
+    columns["birthday_positions"].extend(position for _, position in birthdays)
+    phones_index = sorted(phones_index)
+    columns["phone_keys"].extend(number for number, _ in phones_index)
+    columns["phone_positions"].extend(position for _, position in phones_index)
+    columns["shared_phones"].extend(sorted(
+        {number for (number, _), (next_number, _) in zip(phones_index, phones_index[1:]) if number == next_number}
+    ))
+
+    table = []
+    offset = _align(_HEADER.size)
+    for name, _ in SECTIONS:
+        length = memoryview(columns[name]).nbytes
+        table.extend((offset, length))
+        offset = _align(offset + length)
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, BYTE_ORDER, len(keys), *table))
+        for (name, _), start in zip(SECTIONS, table[0::2]):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(columns[name])
+        f.flush()
+        os.fsync(f.fileno())
+    return len(keys)
+
+def write_snapshot_atomic(records, filename):
+    """
+    Write records to a columnar snapshot through a temporary file renamed
+    over ``filename``, so that a crash never leaves a partial snapshot.
+
+    Must not be used for the file a MappedAddressBook has mapped, see
+    ``MappedAddressBook.compact``.
+
+    Args:
+        records (iterable): Records to write.
+        filename (str): Snapshot file.
+    """
+    temp_file = filename + ".tmp"
+    write_snapshot(records, temp_file)
+    replace_file(temp_file, filename)
+
+
+class ColumnarSnapshot:
+    """
+    Read-only view of a snapshot file written by ``write_snapshot``.
+
+    The file is memory-mapped and its columns are used in place, so
+    opening it costs the same regardless of its size. Values are decoded
+    only when they are read.
+
+    Attributes:
+        filename (str): Path of the snapshot file.
+        count (int): Number of contacts in the snapshot.
+    """
+    def __init__(self, filename):
+        """
+        Raises:
+            OSError: If the file cannot be opened.
+            ValueError: If it is not a valid snapshot, e.g. truncated.
+        """
+        self.filename = filename
+        self._views = []
+        self._file = open(filename, "rb")
+        if os.fstat(self._file.fileno()).st_size < _HEADER.size:
+            self._file.close()
+            raise ValueError(f"{filename} is not a TermiBook snapshot or is truncated.")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byte_order, self.count, *table = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a TermiBook snapshot.")
+        if byte_order != BYTE_ORDER:
+            self.close()
+            raise ValueError(f"{filename} was written on a machine with a different byte order.")
+        view = memoryview(self._mmap)
+        self._views.append(view)
+        self._columns = {}  # key: section name, value: typed memoryview
+        self._starts = {}  # key: text section name, value: offset in the file
+        for (name, code), start, length in zip(SECTIONS, table[0::2], table[1::2]):
+            if start + length > len(self._mmap) or (code is not None and length % struct.calcsize(code)):
+                self.close()
+                raise ValueError(f"{filename} is truncated or damaged.")
+            if code is None:
+                self._starts[name] = start
+            else:
+                self._columns[name] = view[start:start + length].cast(code)
+                self._views.append(self._columns[name])
+
+    def close(self):
+        """
+        Unmap and close the file.
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+    def _text(self, column, position):
+        offsets = self._columns[_TEXT_COLUMNS[column]]
+        start = self._starts[column]
+        return self._mmap[start + offsets[position]:start + offsets[position + 1]].decode("utf-8")
+
+    def name(self, position):
+        return self._text("names", position)
+
+    def email(self, position):
+        return self._text("emails", position) or None
+
+    def address(self, position):
+        return self._text("addresses", position) or None
+
+    def phones(self, position):
+        offsets = self._columns["phone_offsets"]
+        return self._columns["phones"][offsets[position]:offsets[position + 1]].tolist()
+
+    def birthday(self, position):
+        """
+        Returns:
+            int: Date ordinal of the birthday, 0 if it is not set.
+        """
+        return self._columns["birthdays"][position]
+
+    def find(self, name):
+        """
+        Find a contact by name, ignoring case, with a binary search.
+
+        Args:
+            name (str): Contact name.
+
+        Returns:
+            int: Position of the contact, or None if it is missing.
+        """
+        key = name.casefold()
+        by_name = self._columns["by_name"]
+        index = bisect_left(by_name, key, key=lambda position: self.name(position).casefold())
+        if index < len(by_name) and self.name(by_name[index]).casefold() == key:
+            return by_name[index]
+        return None
+
+    def position(self, name):
+        """
+        Find a contact by its exact name.
+
+        Returns:
+            int: Position of the contact, or None if it is missing.
+        """
+        key = name.casefold()
+        by_name = self._columns["by_name"]
+        index = bisect_left(by_name, key, key=lambda position: self.name(position).casefold())
+        while index < len(by_name):
+            found = self.name(by_name[index])
+            if found == name:
+                return by_name[index]
+            if found.casefold() != key:
+                break
+            index += 1
+        return None
+
+    def birthdays(self, month, day):
+        """
+        Find the contacts born on a calendar day.
+
+        Returns:
+            list: Positions of the contacts.
+        """
+        keys = self._columns["birthday_keys"]
+        key = month * 32 + day
+        return self._columns["birthday_positions"][bisect_left(keys, key):bisect_right(keys, key)].tolist()
+
+    def phone_range(self, low, high):
+        """
+        Find the contacts with a phone number in a range.
+
+        Returns:
+            list: (phone number, position) pairs with low <= number < high, sorted.
+        """
+        keys = self._columns["phone_keys"]
+        start, end = bisect_left(keys, low), bisect_left(keys, high)
+        return list(zip(keys[start:end].tolist(), self._columns["phone_positions"][start:end].tolist()))
+
+    def shared_phones(self):
+        """
+        Returns:
+            list: Phone numbers owned by more than one contact.
+        """
+        return self._columns["shared_phones"].tolist()
+
+    def search(self, query):
+        """
+        Find contacts with a name, phone, email or address containing the query.
+
+        The lowercased search column is scanned with ``mmap.find``, so the
+        scan runs at memory speed without decoding the contacts.
+
+        Args:
+            query (str): Substring to look for (case-insensitive).
+
+        Returns:
+            dict: Position -> list of matching fields, in field order.
+        """
+        query = query.lower()
+        results = {}
+        if not query or FIELD_SEPARATOR in query:
+            return results
+        needle = query.encode("utf-8")
+        offsets = self._columns["search_offsets"]
+        base = self._starts["search"]
+        start, end = base, base + offsets[self.count]
+        while True:
+            found = self._mmap.find(needle, start, end)
+            if found < 0:
+                return results
+            position = bisect_right(offsets, found - base) - 1
+            fields = self._text("search", position).split(FIELD_SEPARATOR)
+            matched = [name for name, text in zip(SEARCH_FIELDS, fields) if query in text]
+            if not matched:
+                # Records are stored back to back: this match runs into the next one
+                start = found + 1
+                continue
+            results[position] = matched
+            start = base + offsets[position + 1]
+
+
+class _MappedRecords(Mapping):
+    """
+    ``data`` mapping of a MappedAddressBook (name -> Record), so code
+    written for AddressBook.data keeps working.
+
+    Looking up a name returns the live record. Iterating builds records
+    of unchanged contacts on the fly without keeping them; edit contacts
+    found with ``find`` or by name instead.
+    """
+    def __init__(self, book):
+        self.book = book
+
+    def __getitem__(self, name):
+        record = self.book._get(name)
+        if record is None:
+            raise KeyError(name)
+        return record
+
+    def __contains__(self, name):
+        book = self.book
+        if name in book._overlay.data:
+            return True
+        return name not in book._hidden and book.snapshot.position(name) is not None
+
+    def __len__(self):
+        book = self.book
+        return book.snapshot.count - len(book._hidden) + len(book._overlay.data)
+
+    def __iter__(self):
+        for name, _ in self._entries(build=False):
+            yield name
+
+    def _entries(self, build=True):
+        # Snapshot order, with changed contacts in place, then new contacts
+        book = self.book
+        overlay = book._overlay.data
+        hidden = book._hidden
+        for position in range(book.snapshot.count):
+            name = book.snapshot.name(position)
+            if position in book._hidden_positions:
+                if hidden.get(name) == position and name in overlay:
+                    yield name, overlay[name]
+            else:
+                yield name, book._record(position) if build else None
+        for name, record in overlay.items():
+            if name not in hidden:
+                yield name, record
+
+    def items(self):
+        return self._entries()
+
+    def values(self):
+        for _, record in self._entries():
+            yield record
+
+
+def _field(cls, value):
+    # Build a field from a stored value that was validated when it was written
+    field = cls.__new__(cls)
+    field.value = value
+    return field
+
+def _snapshot_record(snapshot, position):
+    record = Record(snapshot.name(position))
+    record.phones = [_field(Phone, number) for number in snapshot.phones(position)]
+    email = snapshot.email(position)
+    if email:
+        record.email = _field(Email, email)
+    address = snapshot.address(position)
+    if address:
+        record.address = _field(Address, address)
+    ordinal = snapshot.birthday(position)
+    if ordinal:
+        record.birthday = _field(Birthday, datetime.fromordinal(ordinal))
+    return record
+
+
+class _FrozenBook:
+    """
+    State of a MappedAddressBook taken by ``freeze``, from which a new
+    snapshot is written while the book keeps changing.
+
+    The contacts changed since the snapshot are copied; the others are
+    read from a mapping of the snapshot file of its own, which stays
+    valid when the book closes or replaces its mapping.
+    """
+    def __init__(self, book):
+        self.base = book.snapshot
+        self.snapshot = ColumnarSnapshot(book.filename)
+        # The records of the overlay at this point, to tell later changes apart
+        self.versions = {name: (record, record._version) for name, record in book._overlay.data.items()}
+        # Records are changed in place, so write copies
+        self.changed = pickle.loads(pickle.dumps(dict(book._overlay.data), protocol=pickle.HIGHEST_PROTOCOL))
+        self.hidden = dict(book._hidden)
+        self.hidden_positions = set(book._hidden_positions)
+
+    def records(self):
+        # The same order as _MappedRecords.values
+        snapshot = self.snapshot
+        for position in range(snapshot.count):
+            if position in self.hidden_positions:
+                name = snapshot.name(position)
+                if self.hidden.get(name) == position and name in self.changed:
+                    yield self.changed[name]
+            else:
+                yield _snapshot_record(snapshot, position)
+        for name, record in self.changed.items():
+            if name not in self.hidden:
+                yield record
+
+    def write(self, filename):
+        """
+        Write the frozen contacts to a temporary file next to ``filename``.
+
+        Returns:
+            str: The temporary file, to be passed to ``MappedAddressBook.switch``.
+        """
+        # A name of its own: a compaction may write next to a background save
+        fd, temp_file = tempfile.mkstemp(".tmp", os.path.basename(filename) + ".", os.path.dirname(filename) or ".")
+        os.close(fd)
+        try:
+            write_snapshot(self.records(), temp_file)
+        except BaseException:
+            os.remove(temp_file)
+            raise
+        return temp_file
+
+    def close(self):
+        self.snapshot.close()
+
+
+class MappedAddressBook:
+    """
+    Address book backed by a memory-mapped columnar snapshot.
+
+    Implements the same interface as AddressBook. Contacts stay in the
+    mapped file; ``find`` (or ``data[name]``) builds a Record of an
+    unchanged contact on every call, and only when that Record is changed
+    it is moved to an in-memory AddressBook, the overlay, which holds
+    every contact added or changed since the snapshot. Lookups therefore
+    change nothing and may run on several threads at once. Searches and
+    birthday queries run on the mapped columns for untouched contacts and
+    on the overlay indexes for the rest.
+
+    Changes are journaled by the overlay; ``compact`` writes a new
+    snapshot and starts with an empty overlay.
+
+    Attributes:
+        filename (str): Path of the snapshot file.
+        snapshot (ColumnarSnapshot): The mapped snapshot.
+    """
+    def __init__(self, filename=SNAPSHOT_FILE):
+        self.filename = filename
+        self._base_version = 0
+        self._open()
+
+    def _open(self):
+        self.snapshot = ColumnarSnapshot(self.filename)
+        self._overlay = AddressBook()  # changed and new records
+        self._hidden = {}  # key: name, value: snapshot position replaced by the overlay or deleted
+        self._hidden_positions = set()
+        self._names = None  # NameIndex of the casefolded snapshot names; built when first needed
+
+    @property
+    def version(self):
+        # Changes go to the overlay, except deletions of mapped contacts
+        return self._base_version + self._overlay.version
+
+    @property
+    def journal(self):
+        return self._overlay.journal
+
+    @journal.setter
+    def journal(self, journal):
+        self._overlay.journal = journal
+
+    @property
+    def data(self):
+        return _MappedRecords(self)
+
+    def _record(self, position):
+        return _snapshot_record(self.snapshot, position)
+
+    def _hide(self, name):
+        position = self.snapshot.position(name)
+        if position is not None:
+            self._hidden[name] = position
+            self._hidden_positions.add(position)
+
+    def _contact(self, position):
+        # A record that moves to the overlay when it is changed (see record_changed)
+        record = self._record(position)
+        record._book = self
+        return record
+
+    def _get(self, name):
+        record = self._overlay.data.get(name)
+        if record is not None or name in self._hidden:
+            return record
+        position = self.snapshot.position(name)
+        return self._contact(position) if position is not None else None
+
+    def rebuild_index(self):
+        """
+        Nothing to rebuild, the snapshot carries its own indexes.
+        """
+
+    def record_changed(self, record):
+        """
+        Called after a record has been changed.
+
+        Args:
+            record (Record): The changed record.
+        """
+        name = record.name.value
+        if self._overlay.data.get(name) is not record:
+            # First change of a contact read from the snapshot
+            self._hide(name)
+            self._overlay._insert(name, record)
+        self._overlay.record_changed(record)
+
+    def restore(self, name, record):
+        """
+        Replace the stored state of a contact without journaling it.
+        Used when replaying the journal.
+
+        Args:
+            name (str): Contact name.
+            record (Record): New state of the contact, or None to remove it.
+        """
+        self._hide(name)
+        self._overlay.restore(name, record)
+
+    def add_record(self, record: Record):
+        if not isinstance(record, Record):
+            raise TypeError("Only Record instances can be added.")
+        self._hide(record.name.value)
+        self._overlay.add_record(record)
+
+    def find(self, name):
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Name must be a non-empty string.")
+        record = self._overlay.find(name)
+        if record is not None:
+            return record
+        position = self.snapshot.find(name.strip())
+        if position is None or position in self._hidden_positions:
+            return None
+        return self._contact(position)
+
+    def delete(self, name):
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Name must be a non-empty string.")
+        name = name.strip()
+        if name in self._overlay.data:
+            self._overlay.delete(name)
+            return
+        if name in self._hidden or self.snapshot.position(name) is None:
+            raise KeyError(f"Contact '{name}' not found.")
+        self._hide(name)
+        self._base_version += 1
+        if self.journal is not None:
+            self.journal.append("record", name, None)
+
+    def _name_index(self):
+        if self._names is None:
+            snapshot = self.snapshot
+            self._names = NameIndex(snapshot.name(position).casefold() for position in range(snapshot.count))
+        return self._names
+
+    def _snapshot_name(self, key):
+        # Name of an unchanged snapshot contact with this casefolded name, or None
+        position = self.snapshot.find(key)
+        if position is None or position in self._hidden_positions:
+            return None
+        return self.snapshot.name(position)
+
+    def complete_names(self, prefix, limit=None):
+        """
+        Find the contacts whose name starts with a prefix, e.g. to complete it.
+
+        Args:
+            prefix (str): Name prefix (case-insensitive).
+            limit (int, optional): Maximum number of names.
+
+        Returns:
+            list: Contact names, in case-insensitive order.
+        """
+        prefix = prefix.casefold()
+        # Hidden snapshot contacts are skipped, so look at enough keys to fill the limit
+        wanted = None if limit is None else limit + len(self._hidden_positions)
+        names = {}
+        for key in self._name_index().complete(prefix, wanted):
+            name = self._snapshot_name(key)
+            if name is not None:
+                names[key] = name
+        for name in self._overlay.complete_names(prefix, limit):
+            names[name.casefold()] = name
+        return [names[key] for key in sorted(names)][:limit]
+
+    def similar_names(self, name, limit=None):
+        """
+        Find the contacts whose name is a typo or two away from a name,
+        to suggest them when it is not found.
+
+        Args:
+            name (str): The name that was typed.
+            limit (int, optional): Maximum number of names.
+
+        Returns:
+            list: Contact names, closest first.
+        """
+        key = name.strip().casefold()
+        found = self._overlay._similar_names(key)
+        for distance, found_key in self._name_index().similar(key, suggestion_distance(key)):
+            found_name = self._snapshot_name(found_key)
+            if found_name is not None:
+                found.append((distance, found_name))
+        found.sort()
+        return [found_name for _, found_name in found[:limit]]
+
+    def search(self, keyword):
+        """
+        Find contacts whose name, phones, email or address contain the keyword.
+
+        Args:
+            keyword (str): Substring to look for (case-insensitive).
+
+        Returns:
+            list: (Record, list of matched field names) pairs, ordered by name.
+        """
+        results = self._overlay.search(keyword)
+        for position, fields in self.snapshot.search(keyword).items():
+            if position not in self._hidden_positions:
+                results.append((self._record(position), fields))
+        results.sort(key=lambda item: item[0].name.value.casefold())
+        return results
+
+    def _phone_owners(self, prefix):
+        # (phone, owner Records) pairs for the numbers starting with prefix, snapshot and overlay merged
+        owners = {}
+        for number, position in self.snapshot.phone_range(*phone_prefix_range(prefix)):
+            if position not in self._hidden_positions:
+                owners.setdefault(number, {})[position] = None
+        results = {f"{number:010d}": [self._record(position) for position in positions]
+                   for number, positions in owners.items()}
+        for phone, records in self._overlay.phones_with_prefix(prefix):
+            results.setdefault(phone, []).extend(records)
+        return sorted(results.items())
+
+    def find_by_phone(self, phone):
+        """
+        Find the contacts that have a phone number.
+
+        Args:
+            phone (str): Phone number, 10 digits.
+
+        Returns:
+            list: Records owning the number.
+        """
+        owners = self._phone_owners(Phone(phone).value)
+        return owners[0][1] if owners else []
+
+    def phones_with_prefix(self, prefix):
+        """
+        Find the phone numbers starting with a prefix, e.g. an area code.
+
+        Args:
+            prefix (str): Up to 10 digits.
+
+        Returns:
+            list: (phone, list of owner Records) pairs sorted by phone.
+        """
+        return self._phone_owners(prefix)
+
+    def duplicate_phones(self):
+        """
+        Find the phone numbers shared by several contacts.
+
+        Only the numbers the snapshot marks as shared and the numbers of
+        the overlay contacts are checked.
+
+        Returns:
+            list: (phone, list of owner Records) pairs sorted by phone.
+        """
+        candidates = set(self.snapshot.shared_phones())
+        for record in self._overlay.data.values():
+            candidates.update(p.number for p in record.phones)
+        duplicates = []
+        for number in sorted(candidates):
+            for phone, records in self._phone_owners(f"{number:010d}"):
+                if len(records) > 1:
+                    duplicates.append((phone, records))
+        return duplicates
+
+    def get_upcoming_birthday(self, period_days=7):
+        """
+        Find birthdays from today up to ``period_days`` days ahead.
+
+        Args:
+            period_days (int): Number of days after today to include.
+
+        Returns:
+            list: (Record, birthday date, congratulation date) tuples sorted
+            by birthday date; weekend birthdays are congratulated on Monday.
+        """
+        upcoming = []
+        for day, keys in upcoming_days(period_days):
+            congratulate_on = congratulation_date(day)
+            for month, day_of_month in keys:
+                for position in self.snapshot.birthdays(month, day_of_month):
+                    if position not in self._hidden_positions:
+                        upcoming.append((self._record(position), day, congratulate_on))
+        upcoming.extend(self._overlay.get_upcoming_birthday(period_days))
+        upcoming.sort(key=lambda item: item[1])
+        return upcoming
+
+    def compact(self, filename=None):
+        """
+        Write every contact to a new snapshot and map it, emptying the overlay.
+
+        Args:
+            filename (str, optional): Snapshot file. Defaults to the current one.
+        """
+        filename = filename or self.filename
+        frozen = self.freeze()
+        try:
+            temp_file = frozen.write(filename)
+        finally:
+            frozen.close()
+        self.switch(frozen, temp_file, filename)
+
+    def freeze(self):
+        """
+        Take the current state of the book, to write it to a new snapshot
+        without holding up the commands: the contacts changed since the
+        snapshot are copied, the others are read from the file. Call with
+        the book locked; write and close the returned state after
+        releasing the lock, then lock again and ``switch``.
+
+        Returns:
+            _FrozenBook: The state, with ``write(filename)`` and ``close()``.
+        """
+        return _FrozenBook(self)
+
+    def switch(self, frozen, temp_file, filename):
+        """
+        Map the snapshot written from ``frozen``, keeping the changes made
+        since ``freeze`` in the new overlay. Call with the book locked.
+
+        Args:
+            frozen (_FrozenBook): State returned by ``freeze``.
+            temp_file (str): File returned by ``frozen.write``.
+            filename (str): Snapshot file to replace with it.
+
+        Returns:
+            bool: False if the book was compacted or loaded in between; the
+            temporary file is then deleted and nothing changes.
+        """
+        if frozen.base is not self.snapshot:
+            os.remove(temp_file)
+            return False
+        journal, version = self.journal, self.version
+        overlay, hidden = self._overlay.data, self._hidden
+        # Windows cannot replace a mapped file
+        self.snapshot.close()
+        replace_file(temp_file, filename)
+        self.filename = filename
+        self._open()
+        for name, record in overlay.items():
+            if frozen.versions.get(name) != (record, record._version):
+                self._hide(name)
+                self._overlay._insert(name, record)
+        for name in hidden.keys() | frozen.versions.keys():
+            if name not in overlay:
+                self._hide(name)  # deleted after the freeze
+        self.journal, self._base_version = journal, version
+        return True
+
+    def save(self, args):
+        filename = args[0] if args else self.filename
+        if filename == self.filename:
+            self.compact()
+        else:
+            write_snapshot_atomic(self.data.values(), filename)
+
+    def load(self, args):
+        """
+        Map another snapshot, or the current file again. The current
+        snapshot is only closed once the new one is open and valid.
+
+        Returns:
+            MappedAddressBook: The loaded book, or this one if loading failed.
+        """
+        filename = args[0] if args else self.filename
+        try:
+            book = MappedAddressBook(filename)
+        except (OSError, ValueError) as e:
+            print(f"{Fore.RED}Cannot load {filename}: {e}")
+            print("Staying with the current address book.")
+            return self
+        self.close()
+        return book
+
+    def close(self):
+        self.snapshot.close()
+
+
+def save_data(book, filename=SNAPSHOT_FILE):
+    """
+    Write the address book to a columnar snapshot.
+
+    A MappedAddressBook is switched over to the new file.
+
+    Args:
+        book: AddressBook, MappedAddressBook or SQLiteAddressBook.
+        filename (str): Snapshot file. Defaults to "termibook.snap".
+    """
+    if isinstance(book, MappedAddressBook):
+        book.compact(filename)
+        return
+    write_snapshot_atomic(book.data.values(), filename)
+
+def load_data(filename=SNAPSHOT_FILE, pickle_file="addressbook.pkl"):
+    """
+    Open the columnar snapshot. If it does not exist yet, it is created
+    from the pickled address book.
+
+    Args:
+        filename (str): Snapshot file. Defaults to "termibook.snap".
+        pickle_file (str): Pickled address book to migrate. Defaults to "addressbook.pkl".
+
+    Returns:
+        MappedAddressBook: The address book.
+    """
+    if not os.path.exists(filename):
+        save_data(addressbook.load_data(pickle_file), filename)
+    return MappedAddressBook(filename)
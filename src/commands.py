@@ -0,0 +1,131 @@
+# Values a handler can ask for, by parameter name
+HANDLER_PARAMETERS = ("args", "book", "notes_book")
+
+COMMANDS = {}  # key: command name or alias, value: Command
+DESCRIPTIONS = {}  # key: command name or alias, value: help text; shown by the completer
+
+
+class Command:
+    """
+    A command of the assistant.
+
+    Attributes:
+        name (str): Command name.
+        handler (function): Function running the command, or None for the
+            session commands (save, load, exit) handled by the main loop.
+        usage (str): Argument spec shown in the help, e.g. "<name> [<phone>]".
+        help (str): One line description.
+        aliases (tuple): Other names of the command.
+        parameters (tuple): Names of the handler parameters, a subset of
+            "args", "book" and "notes_book" in any order.
+        writes (bool): Whether the command changes the books. The server
+            runs commands that only read concurrently (see server.py).
+        files (bool): Whether the first argument is a file name. Clients
+            of the server may only name files in its directory.
+    """
+    def __init__(self, name, handler=None, usage="", help="", aliases=(), writes=False, files=False):
+        self.name = name
+        self.handler = handler
+        self.usage = usage
+        self.help = help
+        self.aliases = tuple(aliases)
+        self.writes = writes
+        self.files = files
+        self.parameters = ()
+        if handler is not None:
+            # Read the names from the code object: importing inspect would
+            # cost more than the rest of the registry
+            function = getattr(handler, "__wrapped__", handler)
+            code = function.__code__
+            self.parameters = code.co_varnames[:code.co_argcount]
+            unknown = set(self.parameters) - set(HANDLER_PARAMETERS)
+            if unknown:
+                raise TypeError(f"Handler of '{name}' takes unknown parameters: {', '.join(sorted(unknown))}.")
+        # Positions in (args, book, notes_book), resolved once
+        self._positions = tuple(HANDLER_PARAMETERS.index(parameter) for parameter in self.parameters)
+
+    @property
+    def names(self):
+        return (self.name,) + self.aliases
+
+    def run(self, args, book, notes_book):
+        """
+        Call the handler with the values it asks for.
+
+        Returns:
+            The handler result.
+        """
+        values = (args, book, notes_book)
+        return self.handler(*[values[position] for position in self._positions])
+
+
+def add_command(command):
+    """
+    Register a command under its name and aliases.
+
+    Args:
+        command (Command): The command.
+
+    Raises:
+        ValueError: If a name is already taken.
+    """
+    for name in command.names:
+        if name in COMMANDS:
+            raise ValueError(f"Command '{name}' is already registered.")
+    for name in command.names:
+        COMMANDS[name] = command
+        DESCRIPTIONS[name] = command.help
+
+def command(name, usage="", help="", aliases=(), writes=False, files=False):
+    """
+    Decorator registering a function as the handler of a command.
+
+    The handler takes any of the parameters ``args`` (list of command
+    arguments), ``book`` and ``notes_book``; the registry passes only
+    the ones it names.
+
+    Args:
+        name (str): Command name.
+        usage (str): Argument spec shown in the help.
+        help (str): One line description.
+        aliases (tuple): Other names of the command.
+        writes (bool): Whether the command changes the books.
+        files (bool): Whether the first argument is a file name.
+
+    Returns:
+        function: Decorator returning the handler unchanged.
+    """
+    def register(handler):
+        add_command(Command(name, handler, usage, help, aliases, writes, files))
+        return handler
+    return register
+
+def session_command(name, usage="", help="", aliases=(), writes=False, files=False):
+    """
+    Register a command the main loop handles itself (save, load, exit),
+    so that it is listed in the help and offered by the completer.
+    """
+    add_command(Command(name, None, usage, help, aliases, writes, files))
+
+def find_command(name):
+    """
+    Look up a command by name or alias.
+
+    Returns:
+        Command: The command, or None if it is unknown.
+    """
+    return COMMANDS.get(name)
+
+def all_commands():
+    """
+    Returns:
+        list: Registered commands in registration order, each once.
+    """
+    return list(dict.fromkeys(COMMANDS.values()))
+
+def command_names():
+    """
+    Returns:
+        list: All command names and aliases.
+    """
+    return list(COMMANDS)
@@ -0,0 +1,94 @@
+from prompt_toolkit.completion import Completer, Completion
+from commands import command_names, find_command, DESCRIPTIONS
+
+COMPLETIONS = 20  # candidates shown per kind of argument
+
+# Argument placeholders of the command usages, and what completes them
+PLACEHOLDER_KINDS = {
+    "name": "contact",
+    "note_id": "note",
+    "tag": "tag",
+    "tags": "tag",
+    "command": "command",
+}
+
+def argument_kinds(usage, position):
+    """
+    Find what an argument of a command is, from the command usage.
+
+    When an optional placeholder comes before the argument, e.g. the
+    contact in "[<name>] <note_id>", the argument may also stand for the
+    placeholder after its own.
+
+    Args:
+        usage (str): Usage of the command, e.g. "<name> <email>".
+        position (int): Index of the argument.
+
+    Returns:
+        list: Kinds of values ("contact", "note", "tag", "command").
+    """
+    placeholders = usage.split()
+    indexes = [position]
+    if any(placeholder.startswith("[") for placeholder in placeholders[:position + 1]):
+        indexes.append(position + 1)
+    kinds = []
+    for index in indexes:
+        if index < len(placeholders):
+            kind = PLACEHOLDER_KINDS.get(placeholders[index].strip("[]<>"))
+            if kind is not None and kind not in kinds:
+                kinds.append(kind)
+    return kinds
+
+
+class BookCompleter(Completer):
+    """
+    Completes the command first, then its arguments: contact names, note
+    ids and tags, depending on what the usage of the command expects at
+    the cursor. A word starting with "#" always completes to a tag.
+
+    The books are looked up through a function on every completion, so
+    the completer keeps working after ``load`` replaces them. Every
+    lookup is an index range scan, see ``AddressBook.complete_names``.
+    """
+    def __init__(self, books):
+        """
+        Args:
+            books (function): Returns the current (book, notes_book).
+        """
+        self.books = books
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        words = text.split()
+        if not words or text[-1].isspace():
+            words.append("")  # completing a new word
+        word = words[-1]
+        if len(words) == 1:
+            yield from self._commands(word)
+            return
+        cmd = find_command(words[0].lower())
+        if cmd is None:
+            return
+        if word.startswith("#"):
+            kinds = ["tag"]
+        else:
+            kinds = argument_kinds(cmd.usage, len(words) - 2)
+        book, notes_book = self.books()
+        for kind in kinds:
+            if kind == "contact":
+                for name in book.complete_names(word, COMPLETIONS):
+                    yield Completion(name, -len(word), display_meta="contact")
+            elif kind == "note":
+                for note_id in notes_book.complete_ids(word, COMPLETIONS):
+                    yield Completion(note_id, -len(word), display_meta="note")
+            elif kind == "tag":
+                for tag in notes_book.complete_tags(word.lstrip("#"), COMPLETIONS):
+                    yield Completion(f"#{tag}", -len(word), display_meta="tag")
+            elif kind == "command":
+                yield from self._commands(word)
+
+    def _commands(self, word):
+        prefix = word.lower()
+        for name in command_names():
+            if name.startswith(prefix):
+                yield Completion(name, -len(word), display_meta=DESCRIPTIONS.get(name, ""))
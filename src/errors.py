@@ -15,3 +15,22 @@ class PhoneNotFoundError(Exception):
 
 class AddressBookError(Exception):
     pass
+
+class NoteNotFoundError(Exception):
+    pass
+
+class AmbiguousNoteIdError(Exception):
+    pass
+
+class SnapshotError(Exception):
+    pass
+
+class SnapshotFallbackWarning(UserWarning):
+    pass
+
+class ErrorMessage(str):
+    """
+    Message returned by a command handler when the command failed.
+    It prints like any other message, but callers can tell it apart.
+    """
+    pass
@@ -0,0 +1,341 @@
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from addressbook import Record, Phone, Email, Address, Birthday
+from notes import Note
+
+CHUNK_SIZE = 1000  # rows processed between commits
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".vcf": "vcard", ".vcard": "vcard"}
+CSV_FIELDS = ["name", "phones", "email", "address", "birthday", "notes"]
+
+
+class ImportReport:
+    """
+    Result of an import.
+
+    Attributes:
+        added (int): Number of new contacts.
+        updated (int): Number of existing contacts merged with imported data.
+        errors (list): (row number, message) pairs of rejected rows.
+    """
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.errors = []
+
+    def __str__(self):
+        return f"{self.added} contacts added, {self.updated} updated, {len(self.errors)} rows rejected."
+
+
+def detect_format(filename, fmt=None):
+    """
+    Find the file format from an explicit name or the file extension.
+
+    Args:
+        filename (str): File name.
+        fmt (str, optional): "csv", "jsonl" or "vcard".
+
+    Returns:
+        str: The format name.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in FORMATS.values():
+            raise ValueError(f"Unknown format '{fmt}'. Use csv, jsonl or vcard.")
+        return fmt
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError("Cannot guess the format from the file name. Use csv, jsonl or vcard.")
+    return FORMATS[extension]
+
+def parse_note(line):
+    """
+    Split a note written as on the command line ("text #tag1 #tag2").
+
+    Returns:
+        dict: {"text": str, "tags": list}
+    """
+    words = line.split()
+    return {
+        "text": " ".join(word for word in words if not word.startswith("#")),
+        "tags": [word[1:] for word in words if word.startswith("#") and len(word) > 1],
+    }
+
+def format_note(note):
+    """
+    Write a note as on the command line ("text #tag1 #tag2").
+    """
+    return " ".join([note.text] + [f"#{tag}" for tag in note.tags])
+
+# Readers yield (row number, contact dict) pairs, contact dicts have the keys
+# name, phones, email, address, birthday (DD.MM.YYYY) and notes (list of dicts).
+
+def read_csv(f):
+    for row_number, row in enumerate(csv.DictReader(f), 2):
+        yield row_number, {
+            "name": row.get("name"),
+            "phones": [p for p in (row.get("phones") or "").split(";") if p.strip()],
+            "email": row.get("email"),
+            "address": row.get("address"),
+            "birthday": row.get("birthday"),
+            "notes": [parse_note(line) for line in (row.get("notes") or "").splitlines() if line.strip()],
+        }
+
+def read_jsonl(f):
+    for row_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield row_number, ValueError("Each line must be a JSON object.")
+            continue
+        notes = []
+        for note in row.get("notes") or []:
+            notes.append(parse_note(note) if isinstance(note, str)
+                         else {"text": note.get("text", ""), "tags": list(note.get("tags") or [])})
+        yield row_number, {
+            "name": row.get("name"),
+            "phones": list(row.get("phones") or []),
+            "email": row.get("email"),
+            "address": row.get("address"),
+            "birthday": row.get("birthday"),
+            "notes": notes,
+        }
+
+def _vcard_unescape(value):
+    return (value.replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+def _vcard_escape(value):
+    return (value.replace("\\", "\\\\").replace("\n", "\\n")
+            .replace(",", "\\,").replace(";", "\\;"))
+
+def _vcard_lines(f):
+    # Unfold continuation lines (RFC 6350, section 3.2)
+    line_number, current = 0, None
+    for number, line in enumerate(f, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield line_number, current
+        line_number, current = number, line
+    if current is not None:
+        yield line_number, current
+
+def _vcard_birthday(value):
+    for pattern in ("%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(value.strip(), pattern).strftime("%d.%m.%Y")
+        except ValueError:
+            pass
+    return value
+
+def read_vcard(f):
+    contact, start = None, 0
+    for line_number, line in _vcard_lines(f):
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        prop = key.split(";")[0].split(".")[-1].upper()
+        if prop == "BEGIN" and value.strip().upper() == "VCARD":
+            contact = {"name": None, "phones": [], "email": None, "address": None, "birthday": None, "notes": []}
+            start = line_number
+        elif contact is None:
+            continue
+        elif prop == "END":
+            yield start, contact
+            contact = None
+        elif prop == "FN":
+            contact["name"] = _vcard_unescape(value)
+        elif prop == "TEL":
+            contact["phones"].append("".join(ch for ch in value if ch.isdigit()))
+        elif prop == "EMAIL" and not contact["email"]:
+            contact["email"] = value
+        elif prop == "ADR" and not contact["address"]:
+            parts = [_vcard_unescape(part).strip() for part in value.split(";")]
+            contact["address"] = ", ".join(part for part in parts if part)
+        elif prop == "BDAY":
+            contact["birthday"] = _vcard_birthday(value)
+        elif prop == "NOTE":
+            contact["notes"].extend(parse_note(note) for note in _vcard_unescape(value).splitlines() if note.strip())
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "vcard": read_vcard}
+
+
+def _validate(contact):
+    # Build every field first, so that a bad row changes nothing
+    if not isinstance(contact.get("name"), str) or not contact["name"].strip():
+        raise ValueError("Name is required.")
+    phones = [Phone(str(phone)) for phone in contact["phones"]]
+    email = Email(contact["email"]) if contact["email"] else None
+    address = Address(contact["address"]) if contact["address"] else None
+    birthday = Birthday(contact["birthday"]) if contact["birthday"] else None
+    notes = []
+    for note in contact["notes"]:
+        if not note["text"]:
+            raise ValueError("Note text cannot be empty.")
+        notes.append(Note(note["text"], note["tags"]))
+    return contact["name"].strip(), phones, email, address, birthday, notes
+
+def _merge(contact, book, notes_book, report):
+    name, phones, email, address, birthday, new_notes = _validate(contact)
+    record = book.find(name)
+    is_new = record is None
+    if is_new:
+        # Filled in before it joins the book, so it is indexed and journaled once
+        record = Record(name)
+    for phone in phones:
+        if not record.find_phone(phone.value):
+            record.add_phone(phone.value)
+    if email:
+        record.add_email(email.value)
+    if address and address.value:
+        record.add_address(address.value)
+    if birthday:
+        record.add_birthday(contact["birthday"])
+    if is_new:
+        book.add_record(record)
+        report.added += 1
+    else:
+        report.updated += 1
+    existing = {note.text for note in notes_book.get_notes(record.name.value)}
+    for note in new_notes:
+        if note.text not in existing:
+            notes_book.add_note(record.name.value, note)
+            existing.add(note.text)
+
+def _commit(book, notes_book):
+    # SQLite books defer commits during an import, see import_file
+    if getattr(book, "autocommit", None) is False:
+        book.conn.commit()
+
+def import_file(filename, book, notes_book, fmt=None, chunk_size=CHUNK_SIZE):
+    """
+    Import contacts and notes from a CSV, JSON Lines or vCard file.
+
+    The file is read as a stream and processed in chunks, so memory use
+    does not depend on the file size. Every field is validated with the
+    Phone / Email / Address / Birthday classes; a row with an invalid
+    field is rejected as a whole and recorded in the report. Contacts
+    that already exist are merged: new phones and notes are added, email,
+    address and birthday are replaced.
+
+    Args:
+        filename (str): File to import.
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+        fmt (str, optional): "csv", "jsonl" or "vcard"; guessed from the extension if omitted.
+        chunk_size (int): Rows processed between commits.
+
+    Returns:
+        ImportReport: Counts of added and updated contacts and rejected rows.
+    """
+    reader = READERS[detect_format(filename, fmt)]
+    report = ImportReport()
+    autocommit = getattr(book, "autocommit", None)
+    if autocommit:
+        book.autocommit = notes_book.autocommit = False
+    try:
+        # utf-8-sig drops the byte-order mark Excel writes at the start of a CSV
+        with open(filename, newline="", encoding="utf-8-sig") as f:
+            rows = reader(f)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                for row_number, contact in chunk:
+                    try:
+                        if isinstance(contact, Exception):
+                            raise contact
+                        _merge(contact, book, notes_book, report)
+                    except (ValueError, TypeError, AttributeError) as e:
+                        report.errors.append((row_number, str(e)))
+                _commit(book, notes_book)
+    finally:
+        if autocommit:
+            book.autocommit = notes_book.autocommit = True
+    return report
+
+
+# Writers take an open file and a stream of (Record, list of Note) pairs.
+
+def write_csv(f, contacts):
+    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for record, notes in contacts:
+        writer.writerow({
+            "name": record.name.value,
+            "phones": ";".join(p.value for p in record.phones),
+            "email": record.email.value if record.email else "",
+            "address": record.address.value if record.address else "",
+            "birthday": record.birthday.value.strftime("%d.%m.%Y") if record.birthday else "",
+            "notes": "\n".join(format_note(note) for note in notes),
+        })
+
+def write_jsonl(f, contacts):
+    for record, notes in contacts:
+        f.write(json.dumps({
+            "name": record.name.value,
+            "phones": [p.value for p in record.phones],
+            "email": record.email.value if record.email else None,
+            "address": record.address.value if record.address else None,
+            "birthday": record.birthday.value.strftime("%d.%m.%Y") if record.birthday else None,
+            "notes": [{"text": note.text, "tags": list(note.tags)} for note in notes],
+        }, ensure_ascii=False) + "\n")
+
+def write_vcard(f, contacts):
+    for record, notes in contacts:
+        lines = ["BEGIN:VCARD", "VERSION:3.0",
+                 f"FN:{_vcard_escape(record.name.value)}",
+                 f"N:{_vcard_escape(record.name.value)};;;;"]
+        lines.extend(f"TEL;TYPE=CELL:{p.value}" for p in record.phones)
+        if record.email:
+            lines.append(f"EMAIL:{record.email.value}")
+        if record.address:
+            lines.append(f"ADR:;;{_vcard_escape(record.address.value)};;;;")
+        if record.birthday:
+            lines.append(f"BDAY:{record.birthday.value.strftime('%Y-%m-%d')}")
+        if notes:
+            lines.append("NOTE:" + _vcard_escape("\n".join(format_note(note) for note in notes)))
+        lines.append("END:VCARD")
+        f.write("\r\n".join(lines) + "\r\n")
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "vcard": write_vcard}
+
+def export_file(filename, book, notes_book, fmt=None):
+    """
+    Export all contacts with their notes to a CSV, JSON Lines or vCard file.
+
+    Contacts are written one at a time while iterating the book, so the
+    export never builds the whole file in memory.
+
+    Args:
+        filename (str): File to write.
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+        fmt (str, optional): "csv", "jsonl" or "vcard"; guessed from the extension if omitted.
+
+    Returns:
+        int: Number of exported contacts.
+    """
+    writer = WRITERS[detect_format(filename, fmt)]
+    count = 0
+    def contacts():
+        nonlocal count
+        for name, record in book.data.items():
+            count += 1
+            yield record, notes_book.get_notes(name)
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer(f, contacts())
+    return count
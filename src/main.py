@@ -1,309 +1,116 @@
-import pickle
+import time
+START_TIME = time.perf_counter()  # reported by --timing
 from colorama import Fore, Style, init
+import argparse
+import atexit
+import functools
 import os
+import sys
+import warnings
 import prompt
-import re
 from notes import NotesBook, Note
 import notes
 from bot_help import print_help
-from datetime import datetime, timedelta
+from commands import command, session_command, find_command
 from errors import (
     InvalidInputError, ContactNotFoundError, EmailNotSetError,
-    AddressNotSetError, PhoneNotFoundError, AddressBookError
+    AddressNotSetError, PhoneNotFoundError, AddressBookError, NoteNotFoundError,
+    AmbiguousNoteIdError, SnapshotError, SnapshotFallbackWarning, ErrorMessage
 )
-from pretty_table2 import draw_table
-from collections import UserDict
+from pretty_table2 import draw_table, draw_table_pages, PAGE_SIZE
+from itertools import islice
+from addressbook import AddressBook, Record, save_data, load_data
+from storage import Journal
+import metrics
+from autosave import Autosaver
+from contextlib import nullcontext
 
-def save_data(book, filename="addressbook.pkl"):
-    """
-    Save the address book to a file.
+# sqlite_store, columnar_store, import_export and prompt_toolkit (see prompt.py)
+# are imported by the commands that use them, so that they do not slow down startup
+IMPORT_TIME = time.perf_counter() - START_TIME
 
-    Args:
-        book (AddressBook): The address book to save.
-        filename (str): File name to store the data. Defaults to "addressbook.pkl".
-    """
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
+SEARCHER = None  # ShardedSearch running the searches when started with --workers
 
-def load_data(filename="addressbook.pkl"):
+def start_search_workers(book, notes_book, workers):
     """
-    Load the address book from a file.
+    Run the searches in worker processes (``--workers``), replacing the
+    workers started for other books.
 
     Args:
-        filename (str): File name to load the data from. Defaults to "addressbook.pkl".
-
-    Returns:
-        AddressBook: Loaded address book or new empty one if file not found.
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+        workers (int): Number of worker processes; 0 searches in this process.
     """
-    try:
-        with open(filename, "rb") as f:
-            book = pickle.load(f)
-            # Check if the book has the necessary attributes
-            for record in book.data.values():
-                if not hasattr(record, 'address'):
-                    record.address = None
-                if not hasattr(record, 'email'):
-                    record.email = None
-                if not hasattr(record, 'birthday'):
-                    record.birthday = None
-            return book
-    except FileNotFoundError:
-        return AddressBook() 
-    
+    global SEARCHER
+    stop_search_workers()
+    if workers:
+        from sharded_search import ShardedSearch
+        SEARCHER = ShardedSearch(book, notes_book, workers)
 
-
-class Field:
+def stop_search_workers():
     """
-    Base class for fields in a contact record (e.g., Name, Phone).
+    Stop the search workers, if any; the books get their journal back.
     """
-    def __init__(self, value):
-        self.value = value
-
-    def __str__(self):
-        return str(self.value)
+    global SEARCHER
+    if SEARCHER is not None:
+        SEARCHER.close()
+        SEARCHER = None
 
-class Name(Field):
+def open_books(journal, storage="pickle"):
     """
-    Represents a contact's name.
-    """
-    def __init__(self, value):
-        if not isinstance(value, str) or not value.strip():
-            raise ValueError("Name must be a non-empty string.")
-        self.value = value.strip()
+    Load the last snapshot of the address book and the notes book and
+    replay the journal on top of it.
 
-class Phone(Field):
-    """
-    Represents a contact's phone number.
-    """
-    def __init__(self, phone):
-        if not isinstance(phone, str) or not phone.strip():
-            raise ValueError("Phone must be a non-empty string.")
-        value = phone.strip()
-        if not value.isdigit():
-            raise ValueError("Phone number must contain only digits.")
-        self.value = value
-        if len(value) != 10:
-            raise ValueError("Phone number must be 10 digits long.")
+    Args:
+        journal (Journal): Journal with changes made after the snapshot.
+        storage (str): "pickle", or "columnar" for a memory-mapped address book.
 
-class Email(Field):
-    """
-    Represents a contact's email.
+    Returns:
+        tuple: (AddressBook, NotesBook) with the journal attached to both.
     """
-    def __init__(self, email):
-        if not isinstance(email, str) or not email.strip():
-            raise ValueError("Email must be a non-empty string.")
-        email = email.strip()
-        pattern = r"^[\w\.-]+@[\w\.-]+\.\w+$"
-        if not re.match(pattern, email):
-            raise ValueError("Invalid email format.")
-        self.value = email
-
-from datetime import datetime, date, timedelta        
+    with warnings.catch_warnings(record=True) as fallbacks:
+        warnings.simplefilter("always", SnapshotFallbackWarning)
+        if storage == "columnar":
+            import columnar_store
+            book = columnar_store.load_data()
+        else:
+            book = load_data()
+        notes_book = notes.load_data()
+    for warning in fallbacks:
+        if issubclass(warning.category, SnapshotFallbackWarning):
+            # The journal only holds changes made after the newest snapshot
+            print(f"{Fore.RED}Warning: {warning.message}{Style.RESET_ALL}", file=sys.stderr)
+        else:
+            warnings.showwarning(warning.message, warning.category, warning.filename, warning.lineno)
+    for kind, key, value in journal.replay():
+        if kind == "record":
+            book.restore(key, value)
+        elif kind == "note":
+            notes_book.restore_note(key, *value)
+        else:
+            # Journals written before notes were journaled one by one
+            notes_book.restore(key, value)
+    book.journal = journal
+    notes_book.journal = journal
+    return book, notes_book
 
-class Birthday(Field):
+def compact_data(book, notes_book, journal):
     """
-    Represents a contact's birthday.
-    """
-    def __init__(self, value):
-        """
-        Initialize a Birthday with date validation.
-
-        Args:
-            value (str): Date in DD.MM.YYYY format.
+    Write a full snapshot of both books and empty the journal.
 
-        Raises:
-            ValueError: If date is invalid or out of range.
-        """
-        try:
-            self.value = datetime.strptime(value, "%d.%m.%Y")
-            if self.value.year < 1900 or self.value > datetime.now():
-                raise ValueError("Year must be between 1900 and the current year.")
-        except ValueError as e:
-            if "does not match format" in str(e):
-                raise ValueError("Invalid date format. Use DD.MM.YYYY")
-            else:
-                raise ValueError(str(e))
-
-class Address(Field):
-    """
-    Represents a contact's address.
-    """
-    def __init__(self, value):
-        if not value.strip():
-            self.value = None
-            return
-        value = value.strip()
-        if len(value) < 5:
-            raise ValueError("Address is too short.")
-        if re.search(r"[<>@#$%^&*]", value):
-            raise ValueError("Address contains invalid characters.")
-        self.value = value
-
-class Record:
-    """
-    Represents a contact record in the address book.
-
-    Attributes:
-        name (Name): Contact's name.
-        phones (list): List of Phone objects.
-        email (Email): Contact's email (optional).
-        birthday (Birthday): Contact's birthday (optional).
-        notes (list): Notes associated with the contact (optional, stored externally).
-        address (Address): Contact's address (optional).
-    """
-    def __init__(self, name):
-        self.name = Name(name)
-        self.phones = []
-        self.email = None
-        self.birthday = None
-        self.notes = []
-        self.address = None
-    def add_phone(self, phone):
-        if self.find_phone(phone):
-            print(f"Phone {phone} already exists for {self.name.value}. Not adding.")
-            return
-        self.phones.append(Phone(phone))
-    def remove_phone(self, phone):
-        phone_to_remove = Phone(phone)
-        self.phones = [p for p in self.phones if p.value != phone_to_remove.value]
-    def find_phone(self, phone):
-        if not isinstance(phone, str) or not phone.strip():
-            raise ValueError("Phone must be a non-empty string.")
-        phone = phone.strip()
-        if any(p.value == phone for p in self.phones):
-            return phone
-        return None
-    def edit_phone(self, old_phone, new_phone):
-        for p in self.phones:
-            if p.value == old_phone:
-                p.value = Phone(new_phone).value
-                return
-        raise ValueError("Phone number not found.")
-    def add_email(self, email):
-        self.email = Email(email)
-
-    def find_email(self):
-        return self.email.value if self.email else None
-
-    def edit_email(self, new_email):
-        if not self.email:
-            raise ValueError("Email is not set. Please add an email first.")
-        self.email = Email(new_email)
-    def remove_email(self):
-        if not self.email:
-            raise ValueError("Email is not set.")
-        self.email = None
-    def add_address(self, address):
-        self.address = Address(address)
-    def edit_address(self, new_address):
-        if not self.address:
-            raise ValueError("Address is not set. Please add an address first.")
-        self.address = Address(new_address)
-    def remove_address(self):
-        if not self.address:
-            raise ValueError("Address is not set.")
-        self.address = None
-    def find_address(self):
-        return self.address.value if self.address else None
-    def add_birthday(self, birthday):
-        self.birthday = Birthday(birthday)
-    def to_string(self, notes_book=None):
-        notes_str = ""
-        phones_str = '; '.join(p.value for p in self.phones) if self.phones else "no phones"
-        email_str = f", email: {self.email.value}" if self.email else ""
-        birthday_str = f", birthday: {self.birthday.value.strftime('%d.%m.%Y')}" if self.birthday else ""
-        address_str = f", address: {self.address.value}" if self.address else ""
-        if notes_book:
-            notes = notes_book.get_notes(self.name.value)
-            if notes:
-                notes_list = []
-                for note in notes:
-                    note_tags = f"{Fore.BLUE} {', '.join(f'#{tag}' for tag in note.tags)}" if note.tags else f"{Fore.LIGHTBLACK_EX}no tags{Fore.RESET}"
-                    notes_list.append(f"{Fore.LIGHTBLACK_EX}[{note.id[:8]}]{Fore.RESET} {note.text} {note_tags}")
-                notes_str = f"\n    {Fore.GREEN}Notes:{Fore.RESET}\n    " + "\n    ".join(notes_list)
-            else:
-                notes_str = f"\n    {Fore.GREEN}Notes:{Fore.RESET} no notes"
-
-        return f"Contact name: {self.name.value}, phones: {phones_str}{email_str}{birthday_str}{address_str}{notes_str}"
-
-
-class AddressBook(UserDict):
-    """
-    Represents an address book that stores contacts (Record instances).
+    Args:
+        book (AddressBook): The address book, or a MappedAddressBook.
+        notes_book (NotesBook): The notes book.
+        journal (Journal): The journal to reset.
     """
-    def add_record(self, record: Record):
-        if not isinstance(record, Record):
-            raise TypeError("Only Record instances can be added.")
-        self.data[record.name.value] = record
-    def find(self, name):
-        if not isinstance(name, str) or not name.strip():
-            raise ValueError("Name must be a non-empty string.")
-        name_lower = name.strip().lower()
-        for record_name, record in self.data.items():
-            if record_name.lower() == name_lower:
-                return record
-        return None
-    def delete(self, name):
-        if not isinstance(name, str) or not name.strip():
-            raise ValueError("Name must be a non-empty string.")
-        name = name.strip()
-        if name in self.data:
-            del self.data[name]
-        else:
-            raise KeyError(f"Contact '{name}' not found.")   
-    def get_upcoming_birthday(self, period_days=7):
-        self.period_days = period_days # period for upcoming birthdays
-        today = datetime.today()
-        upcoming_birthdays = []
-
-        for user in self.data.values():
-            if not user.birthday:
-                continue
-            # Ensure birthday is a datetime object
-            if not isinstance(user.birthday, Birthday):
-                raise ValueError("Birthday must be an instance of Birthday class.")
-            if not user.birthday.value:
-                continue
-            # Calculate the next birthday
-            birthday = user.birthday.value
-            birthday_this_year = birthday.replace(year=today.year)  
-            # if birthday was before today, set it to next yeara
-            if birthday_this_year < today:
-                birthday_this_year = birthday_this_year.replace(year=today.year + 1)
-
-            days_until_birthday = (birthday_this_year - today).days
-            if days_until_birthday <= self.period_days:
-                if datetime.weekday(birthday_this_year) == 5:  # if birthday is on Saturday, move it to Monday
-                    birthday_this_year += timedelta(days=2)
-                elif datetime.weekday(birthday_this_year) == 6:  # if birthday is on Sunday, move it to Monday
-                    birthday_this_year += timedelta(days=1)
-                upcoming_birthdays.append(user)
-        return upcoming_birthdays
-    
-    def save(self, args):
-        filename = None
-        if len(args) > 0:
-            filename, *_ = args[0]
-        if not filename:
-            filename = "addressbook.pkl"
-        with open(filename, "wb") as f:
-            pickle.dump(self, f)
-
-    def load(self, args):
-        if len(args) >0:
-            filename, *_ = args
-        else:
-            filename = "addressbook.pkl"
-        try:
-            with open(filename, "rb") as f:
-                return pickle.load(f)
-        except FileNotFoundError:
-            create_new = input("No saved data found. Start with an empty address book? [Y/N] ")
-            if create_new.lower() == 'y':
-                return AddressBook()
-            else:
-                print("Staying with the current address book.")
-                return self
+    import columnar_store
+    if isinstance(book, columnar_store.MappedAddressBook):
+        columnar_store.save_data(book)
+    else:
+        save_data(book)
+    notes.save_data(notes_book)
+    journal.reset()
+
 
 def input_error(func):
     """
@@ -315,15 +122,37 @@ def input_error(func):
     Returns:
         function: Wrapped function with error handling.
     """
+    @functools.wraps(func)
     def inner(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except (InvalidInputError, ContactNotFoundError, EmailNotSetError, AddressNotSetError, PhoneNotFoundError, AddressBookError) as e:
-            return str(e)
+        except (InvalidInputError, ContactNotFoundError, EmailNotSetError, AddressNotSetError, PhoneNotFoundError,
+                AddressBookError, NoteNotFoundError, AmbiguousNoteIdError) as e:
+            return ErrorMessage(e)
         except Exception as e:
-            return f"{Fore.RED}Error occurred: {e}"
+            return ErrorMessage(f"{Fore.RED}Error occurred: {e}")
     return inner
 
+SUGGESTIONS = 3  # contact names offered when a name is not found
+
+def contact_not_found(name, book, message="Contact not found."):
+    """
+    Build the error for a contact that does not exist, suggesting the
+    contacts whose name is a typo away from it or starts with it.
+
+    Args:
+        name (str): The name that was typed.
+        book (AddressBook): The address book.
+        message (str): Error message before the suggestions.
+
+    Returns:
+        ContactNotFoundError: The error to raise.
+    """
+    suggestions = book.similar_names(name, SUGGESTIONS) or book.complete_names(name, SUGGESTIONS)
+    if suggestions:
+        message += f" Did you mean: {', '.join(suggestions)}?"
+    return ContactNotFoundError(message)
+
 def parse_input(user_input):
     """
     Parse user input into command and arguments.
@@ -338,6 +167,11 @@ def parse_input(user_input):
     cmd = cmd.strip().lower()
     return cmd, *args
 
+@command("hello", help="Greet the assistant")
+def handle_hello():
+    return "How can I help you?"
+
+@command("add-contact", usage="<name> [<phone1>] [<phone2>] ...", help="Add a new contact. Name is required, phones are optional. You can add multiple phones at once.", writes=True)
 @input_error
 def add_contact(args, book: AddressBook):
     """
@@ -364,6 +198,7 @@ def add_contact(args, book: AddressBook):
             record.add_phone(phone)
     return message
 
+@command("delete-contact", usage="<name>", help="Delete a contact", writes=True)
 @input_error
 def delete_contact(args, book: AddressBook):
     """
@@ -385,8 +220,9 @@ def delete_contact(args, book: AddressBook):
         book.delete(name)
         return f"Contact '{name}' deleted."
     except KeyError:
-        raise ContactNotFoundError(f"Contact '{name}' not found.")
+        raise contact_not_found(name, book, f"Contact '{name}' not found.")
 
+@command("change-contact", usage="<name> <old_phone> <new_phone>", help="Change a contact's phone number", aliases=("edit-contact", "edit-phone"), writes=True)
 @input_error
 def change_contact(args, book: AddressBook):
     """
@@ -404,13 +240,14 @@ def change_contact(args, book: AddressBook):
     name, old_phone, new_phone = args
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     user_phone = record.find_phone(old_phone)
     if user_phone is None:
         raise PhoneNotFoundError("Phone number not found.")
     record.edit_phone(old_phone, new_phone)
     return "Contact updated."
 
+@command("phone", usage="<name>", help="Show contact info")
 @input_error
 def show_phone(args, book: AddressBook):
     """
@@ -428,19 +265,204 @@ def show_phone(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     return record.to_string()  # Show contact info without notes
 
+def phone_owner_lines(owners):
+    """
+    Format (phone, owner Records) pairs, one phone per line.
+    """
+    return "\n".join(
+        f"{Fore.YELLOW}{phone}{Fore.RESET}: {', '.join(record.name.value for record in records)}"
+        for phone, records in owners
+    )
+
+@command("who", usage="<phone>", help="Show the contacts that have this phone number")
+@input_error
+def handle_who(args, book):
+    """
+    Show who owns a phone number.
+
+    Args:
+        args (list): [phone]
+        book (AddressBook): The address book.
+
+    Returns:
+        str: The contacts with this number.
+    """
+    if not args:
+        raise InvalidInputError("Please provide a phone number.")
+    records = book.find_by_phone(args[0])
+    if not records:
+        return "No contact has this phone number."
+    return "\n".join(record.to_string() for record in records)
+
+@command("phones-prefix", usage="<digits>", help="Show all phone numbers starting with the digits, e.g. an area code")
+@input_error
+def handle_phones_prefix(args, book):
+    """
+    Show all phone numbers starting with the given digits, e.g. an area code.
+
+    Args:
+        args (list): [digits]
+        book (AddressBook): The address book.
+
+    Returns:
+        str: Matching numbers with their owners, sorted by number.
+    """
+    if not args:
+        raise InvalidInputError("Please provide the first digits of the phone numbers.")
+    owners = book.phones_with_prefix(args[0])
+    if not owners:
+        return "No phone numbers start with these digits."
+    return phone_owner_lines(owners)
+
+@command("duplicate-phones", help="Show phone numbers shared by several contacts")
+@input_error
+def handle_duplicate_phones(book):
+    """
+    Show phone numbers shared by several contacts.
+
+    Args:
+        book (AddressBook): The address book.
+
+    Returns:
+        str: Shared numbers with their owners, sorted by number.
+    """
+    duplicates = book.duplicate_phones()
+    if not duplicates:
+        return "No phone number is shared by several contacts."
+    return phone_owner_lines(duplicates)
+
+
+def parse_page_args(args):
+    """
+    Parse the "--page N" and "--limit M" options of the listing commands.
+
+    Args:
+        args (list): Command arguments.
+
+    Returns:
+        tuple: (page, limit); page is None when all pages should be shown.
+    """
+    page, limit = None, PAGE_SIZE
+    options = iter(args)
+    for option in options:
+        if option not in ("--page", "--limit"):
+            raise InvalidInputError(f"Unknown option '{option}'. Use --page N and --limit M.")
+        try:
+            value = int(next(options))
+        except (StopIteration, ValueError):
+            raise InvalidInputError(f"{option} needs a positive integer.")
+        if value < 1:
+            raise InvalidInputError(f"{option} needs a positive integer.")
+        if option == "--page":
+            page = value
+        else:
+            limit = value
+    return page, limit
+
+def print_table_pages(headers, rows, page, limit, empty_message):
+    """
+    Print table rows page by page, or only the requested page.
+
+    Rows are produced lazily, so only the rows of the page being drawn
+    are built and kept in memory.
+
+    Args:
+        headers (list): Column headers.
+        rows (iterable): Table rows, usually a generator.
+        page (int): Page to show, or None to stream all pages.
+        limit (int): Rows per page.
+        empty_message (str): Message printed when the page has no rows.
+    """
+    try:
+        columns, _ = os.get_terminal_size()
+    except OSError:
+        columns = 80  # Default width if terminal size cannot be determined
+
+    if page is None:
+        printed = False
+        for table in draw_table_pages(headers, rows, columns, limit):
+            print(table)
+            printed = True
+        if not printed:
+            print(empty_message)
+        return
+    start = (page - 1) * limit
+    data = list(islice(rows, start, start + limit))
+    if not data:
+        print(empty_message)
+        return
+    print(draw_table(headers, data, columns))
+    print(f"{Fore.LIGHTBLACK_EX}Page {page}, rows {start + 1}-{start + len(data)}{Fore.RESET}")
+
+def contact_cells(record):
+    """
+    The contact columns of a row of the "all" command, cached per record.
+
+    Returns:
+        tuple: Name, phones, email, birthday and address cells.
+    """
+    phones = ('\n'.join(p.value for p in record.phones) if record.phones else "-") + f"{Fore.RESET}"
+    email = (record.email.value if record.email else "-") + f"{Fore.RESET}"
+    birthday = (record.birthday.value.strftime('%d.%m.%Y') if record.birthday else "-") + f"{Fore.RESET}"
+    address = (record.address.value if record.address else "-") + f"{Fore.RESET}"
+    return (f"{Fore.LIGHTMAGENTA_EX}{record.name.value}{Fore.RESET}", phones, email, birthday, address)
+
+def note_cells(note):
+    """
+    The note and tags lines of a note in the "all" command, cached per note.
+
+    Returns:
+        tuple: Note text line, tags line.
+    """
+    tags = f" {' '.join(f'{Fore.BLUE}#{tag}{Fore.RESET}' for tag in note.tags)}" if note.tags else f"{Fore.BLUE} - {Fore.RESET}"
+    return (f"📘 {note.text}", tags)
+
+def contact_rows(records, notes_book):
+    """
+    Build the table rows of the "all" command.
+
+    The cells are cached on the records and notes (see Rendered), so
+    only contacts and notes changed since the last display are formatted
+    again.
+
+    Args:
+        records (iterable): (name, Record) pairs.
+        notes_book (NotesBook): The notes book.
+
+    Yields:
+        list: One table row per contact.
+    """
+    for name, record in records:
+        note_str = " - "
+        tag_str = f"{Fore.BLUE} - {Fore.RESET}"
+
+        if notes_book:
+            notes = notes_book.get_notes(name)
+            if notes:
+                cells = [note.rendered("row", note_cells) for note in notes]
+                note_str = "\n".join(text for text, _ in cells)
+                tag_str = "\n".join(tags for _, tags in cells)
 
+        yield [*record.rendered("row", contact_cells), note_str, tag_str]
+
+@command("all", usage="[--page N] [--limit M]", help="Show all contacts and notes, or only page N of M rows")
 @input_error
-def show_all(book: AddressBook, notes_book: NotesBook):
+def show_all(args, book: AddressBook, notes_book: NotesBook):
     """
     Display all contacts and their associated notes in a table.
 
+    The table is printed page by page as the rows are built; with
+    "--page N" only that page is shown ("--limit M" rows per page).
+
     Args:
+        args (list): [--page N] [--limit M]
         book (AddressBook): The address book.
         notes_book (NotesBook): The notes book.
     """
+    page, limit = parse_page_args(args)
     if not book.data:
         print("No contacts available.")
         return
@@ -454,45 +476,12 @@ def show_all(book: AddressBook, notes_book: NotesBook):
         f"{Fore.LIGHTGREEN_EX}Notes{Fore.RESET}",
         f"{Fore.LIGHTGREEN_EX}Tags{Fore.RESET}",
     ]
-    data = []
-    for name, record in book.data.items():
-        phones = ('\n'.join(p.value for p in record.phones) if record.phones else "-") + f"{Fore.RESET}"
-        email = (record.email.value if record.email else "-") + f"{Fore.RESET}"
-        birthday = (record.birthday.value.strftime('%d.%m.%Y') if record.birthday else "-") + f"{Fore.RESET}"
-        address = (record.address.value if record.address else "-") + f"{Fore.RESET}"
-        note_str = " - "
-        tag_str = f"{Fore.BLUE} - {Fore.RESET}"
-
-        if notes_book:
-            notes = notes_book.get_notes(record.name.value)
-            if notes:
-                notes_list = []
-                tags_list = []
-                for note in notes:
-                    tags_list.append(f" {' '.join(f'{Fore.BLUE}#{tag}{Fore.RESET}' for tag in note.tags)}" if note.tags else f"{Fore.BLUE} - {Fore.RESET}")
-                    notes_list.append(f"📘 {note.text}")
-                note_str = "\n".join(notes_list)
-                tag_str = "\n".join(tags_list)
-
-        data.append([
-            f"{Fore.LIGHTMAGENTA_EX}{name}{Fore.RESET}",
-            phones,
-            email,
-            birthday,
-            address,
-            note_str,
-            tag_str
-        ])
     # Draw the table with headers and data with proper column widths
-    try:
-        columns, _ = os.get_terminal_size()
-    except OSError:
-        columns = 80  # Default width if terminal size cannot be determined
-
-    table = draw_table(headers, data, columns)
-    print(table)
+    rows = contact_rows(book.data.items(), notes_book)
+    print_table_pages(headers, rows, page, limit, f"No contacts on page {page}.")
 
 
+@command("add-email", usage="<name> <email>", help="Add email to contact", writes=True)
 @input_error
 def handle_add_email(args, book):
     """
@@ -510,10 +499,11 @@ def handle_add_email(args, book):
     name, email = args
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     record.add_email(email)
     return "Email added."
 
+@command("show-email", usage="<name>", help="Show contact's email")
 @input_error
 def handle_show_email(args, book):
     """
@@ -531,11 +521,12 @@ def handle_show_email(args, book):
     name = args[0]
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     if record.email is None:
         raise EmailNotSetError("Email is not set.")
     return f"{name}'s email: {record.email.value}"
 
+@command("edit-email", usage="<name> <new_email>", help="Edit contact's email", writes=True)
 @input_error
 def handle_edit_email(args, book):
     """
@@ -553,10 +544,11 @@ def handle_edit_email(args, book):
     name, new_email = args
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     record.edit_email(new_email)
     return "Email updated."
 
+@command("remove-email", usage="<name>", help="Remove contact's email", writes=True)
 @input_error
 def handle_remove_email(args, book):
     """
@@ -574,10 +566,11 @@ def handle_remove_email(args, book):
     name = args[0]
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     record.remove_email()
     return "Email removed."
 
+@command("add-birthday", usage="<name> <DD.MM.YYYY>", help="Add birthday to contact", writes=True)
 @input_error
 def add_birthday(args, book: AddressBook):
     """
@@ -595,10 +588,11 @@ def add_birthday(args, book: AddressBook):
     name, birthday = args
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     record.add_birthday(birthday)
     return "Birthday added."
 
+@command("show-birthday", usage="<name>", help="Show contact's birthday")
 @input_error
 def contact_birthday(args, book: AddressBook):
     """
@@ -616,16 +610,18 @@ def contact_birthday(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     if record.birthday is None:
         raise AddressBookError("Birthday not set.")
     birthday = record.birthday.value
     return f"{record.name.value}'s birthday is on {birthday.strftime('%d.%m.%Y')}."
 
+@command("birthdays", usage="[days]", help="Show upcoming birthdays")
 @input_error
 def upcoming_birthdays(args, book: AddressBook):
     """
-    Show upcoming birthdays.
+    Show upcoming birthdays in date order. Birthdays on a weekend are
+    congratulated on the following Monday.
 
     Args:
         args (list): [days] (optional)
@@ -642,10 +638,11 @@ def upcoming_birthdays(args, book: AddressBook):
         print("No upcoming birthdays.")
         return
     print(f"🎉 {Fore.MAGENTA}Upcoming birthdays:{Fore.RESET} 🎉")
-    for record in upcoming_birthdays:
-        birthday = record.birthday.value
-        print(f"{record.name.value}: {birthday.strftime('%d.%m')}") #  Show only day and month
+    for record, birthday, congratulate_on in upcoming_birthdays:
+        shifted = f" {Fore.LIGHTBLACK_EX}(congratulate on {congratulate_on.strftime('%A %d.%m')}){Fore.RESET}" if congratulate_on != birthday else ""
+        print(f"{record.name.value}: {birthday.strftime('%d.%m')}{shifted}") #  Show only day and month
 
+@command("add-address", usage="<name> <address>", help="Add address to contact", writes=True)
 @input_error
 def handle_add_address(args, book):
     """
@@ -664,10 +661,11 @@ def handle_add_address(args, book):
     address = ' '.join(args[1:])
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     record.add_address(address)
     return "Address added."
 
+@command("show-address", usage="<name>", help="Show contact's address")
 @input_error
 def handle_show_address(args, book: AddressBook):
     """
@@ -685,11 +683,12 @@ def handle_show_address(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     if record.address is None:
         raise AddressNotSetError("Address is not set.")
     return f"{name}'s address: {record.address.value}"
 
+@command("edit-address", usage="<name> <new_address>", help="Edit contact's address", writes=True)
 @input_error
 def handle_edit_address(args, book):
     """
@@ -708,10 +707,11 @@ def handle_edit_address(args, book):
     new_address = ' '.join(args[1:])
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     record.edit_address(new_address)
     return "Address updated."
 
+@command("remove-address", usage="<name>", help="Remove contact's address", writes=True)
 @input_error
 def handle_remove_address(args, book):
     """
@@ -729,15 +729,17 @@ def handle_remove_address(args, book):
     name = args[0]
     record = book.find(name)
     if record is None:
-        raise ContactNotFoundError("Contact not found.")
+        raise contact_not_found(name, book)
     record.remove_address()
     return "Address removed."
 
 
+@command("search", usage="<keyword>", help="Search contacts by name, phone, or email")
 @input_error
 def search_contacts(args, book: AddressBook, notes_book: NotesBook):
     """
     Search contacts by name, phone, email, or address.
+    Every contact is listed once, tagged with the fields that matched.
 
     Args:
         args (list): [keyword]
@@ -750,27 +752,17 @@ def search_contacts(args, book: AddressBook, notes_book: NotesBook):
     if not args:
         raise InvalidInputError("Please provide a search keyword.")
 
-    keyword = args[0].lower()
-    results = []
+    results = [
+        f"{Fore.LIGHTBLACK_EX}[{', '.join(fields)}]{Fore.RESET} {record.to_string(notes_book)}"
+        for record, fields in (SEARCHER or book).search(args[0])
+    ]
 
-    for record in book.data.values():
-        if keyword in record.name.value.lower():
-            results.append(record.to_string(notes_book))
-            continue
-        for phone in record.phones:
-            if keyword in phone.value:
-                results.append(record.to_string(notes_book))
-                break
-        if hasattr(record, 'email') and record.email and keyword in record.email.value.lower():
-            results.append(record.to_string(notes_book))
-        if hasattr(record, 'address') and record.address and keyword in record.address.value.lower():
-            results.append(record.to_string(notes_book))
-    
     if results:
         return "\n".join(results)
     else:
         return "No matching contacts found."
 
+@command("add-note", usage="<name> <note_text>", help="Add a note to contact", writes=True)
 @input_error
 def handle_add_note(args, book: AddressBook, notes_book: NotesBook):
     """
@@ -785,13 +777,13 @@ def handle_add_note(args, book: AddressBook, notes_book: NotesBook):
         str: Confirmation message.
     """
     if len(args) < 2:
-        return "Please provide a contact name and note text."
+        raise InvalidInputError("Please provide a contact name and note text.")
 
     contact, *note_parts = args
     record = book.find(contact)
 
     if record is None:
-        return f"Contact '{contact}' not found."
+        raise contact_not_found(contact, book, f"Contact '{contact}' not found.")
 
     tags = []
     text = []
@@ -802,7 +794,7 @@ def handle_add_note(args, book: AddressBook, notes_book: NotesBook):
             text.append(part)
 
     if not text:
-        return "Note text cannot be empty."
+        raise InvalidInputError("Note text cannot be empty.")
 
     note = Note(" ".join(text), tags)
     notes_book.add_note(contact, note)
@@ -810,20 +802,60 @@ def handle_add_note(args, book: AddressBook, notes_book: NotesBook):
     return "Note added."
 
 
+def listed_note_cells(note):
+    """
+    The id, text and tags cells of a row of the "all-notes" command,
+    cached per note.
+
+    Returns:
+        tuple: Id, text and tags cells.
+    """
+    tags = f"{Fore.BLUE} {', '.join(f'#{tag}' for tag in note.tags)}{Fore.RESET}" if note.tags else f"{Fore.LIGHTBLACK_EX}no tags{Fore.RESET}"
+    return (f"{Fore.LIGHTBLACK_EX}{note.id[:8]}{Fore.RESET}", f"{note.text}", tags)
+
+def note_rows(notes):
+    """
+    Build the table rows of the "all-notes" command.
+
+    Args:
+        notes (dict): Contact names mapping to lists of notes.
+
+    Yields:
+        list: One table row per note.
+    """
+    seen_note_ids = set()
+    for contact, notes_list in notes.items():
+        for note in notes_list:
+            # Ensure unique notes by ID
+            if note.uid in seen_note_ids:
+                continue
+            seen_note_ids.add(note.uid)
+            note_id, text, tags = note.rendered("notes-row", listed_note_cells)
+            yield [
+                note_id,
+                f"{Fore.LIGHTMAGENTA_EX}{contact}{Fore.RESET}",
+                text,
+                tags
+            ]
+
+@command("all-notes", usage="[--page N] [--limit M]", help="Show all notes from all contacts, or only page N of M rows")
 @input_error
-def handle_show_all_notes(notes_book: NotesBook):
+def handle_show_all_notes(args, notes_book: NotesBook):
     """
     Display all notes from all contacts in a formatted table.
 
+    The table is printed page by page as the rows are built; with
+    "--page N" only that page is shown ("--limit M" rows per page).
+
     Args:
+        args (list): [--page N] [--limit M]
         notes_book (NotesBook): The notes manager.
-
-    Returns:
-        str: Formatted table of all notes.
     """
+    page, limit = parse_page_args(args)
     notes = notes_book.get_all_notes()
     if not notes:
-        return f"The notebook has no notes."
+        print("The notebook has no notes.")
+        return
     print(f"{Fore.GREEN}📘 All notes: 📘{Fore.RESET}")
     headers=[
         f"{Fore.LIGHTGREEN_EX}id{Fore.RESET}",
@@ -831,30 +863,10 @@ def handle_show_all_notes(notes_book: NotesBook):
         f"{Fore.LIGHTGREEN_EX}Note{Fore.RESET}",
         f"{Fore.LIGHTGREEN_EX}Tags{Fore.RESET}",
     ]
-    data = []
-    seen_note_ids = set()
-    for contact, notes_list in notes.items():
-        for note in notes_list:
-            # Ensure unique notes by ID
-            if note.id in seen_note_ids:
-                continue
-            seen_note_ids.add(note.id)
-            tags = f"{Fore.BLUE} {', '.join(f'#{tag}' for tag in note.tags)}{Fore.RESET}" if note.tags else f"{Fore.LIGHTBLACK_EX}no tags{Fore.RESET}"
-            data.append([
-                f"{Fore.LIGHTBLACK_EX}{note.id[:8]}{Fore.RESET}",
-                f"{Fore.LIGHTMAGENTA_EX}{contact}{Fore.RESET}",
-                f"{note.text}",
-                tags
-            ])
     # Draw the table with headers and data with proper column widths
-    try:
-        columns, _ = os.get_terminal_size()
-    except OSError:
-        columns = 80  # Default width if terminal size cannot be determined
-
-    table = draw_table(headers, data, columns)
-    return table
+    print_table_pages(headers, note_rows(notes), page, limit, f"No notes on page {page}.")
 
+@command("show-notes", usage="<name>", help="Show contact's notes")
 @input_error
 def handle_show_notes(args, notes_book: NotesBook):
     """
@@ -873,6 +885,7 @@ def handle_show_notes(args, notes_book: NotesBook):
         return f"{contact} has no notes."
     return "\n".join(str(note) for note in notes)
 
+@command("search-notes", usage="<tag>", help="Search notes by tag")
 @input_error
 def handle_search_notes(args, notes_book):
     """
@@ -886,15 +899,36 @@ def handle_search_notes(args, notes_book):
         str: Notes matching the tag or message if not found.
     """
     tag = args[0]
-    found = notes_book.search_by_tag(tag)
+    found = (SEARCHER or notes_book).search_by_tag(tag)
     if not found:
         return "No notes found with this tag."
     return "\n".join(f"{Fore.LIGHTMAGENTA_EX}{contact}{Fore.RESET}: {note}" for contact, note in found)
 
+@command("tags", help="Show all tags with the number of notes using them")
+@input_error
+def handle_show_tags(notes_book):
+    """
+    Show all tags with the number of notes using each of them.
+
+    Args:
+        notes_book (NotesBook): The notes manager.
+
+    Returns:
+        str: Tags with their counts, most used first.
+    """
+    counts = notes_book.tag_counts()
+    if not counts:
+        return "No tags found."
+    return "\n".join(f"{Fore.BLUE}#{tag}{Fore.RESET}: {count}" for tag, count in counts)
+
+@command("search-notes-text", usage="<keyword>", help="Search notes by text. Words are combined with AND, use OR for alternatives and word* for prefixes.")
 @input_error
 def handle_search_notes_text(args, notes_book):
     """
-    Search notes by text content.
+    Search notes by text content, best matches first.
+
+    Words are combined with AND, "OR" separates alternatives and a
+    trailing "*" matches a word prefix.
 
     Args:
         args (list): [keyword(s)]
@@ -904,27 +938,37 @@ def handle_search_notes_text(args, notes_book):
         str: Notes matching the text or message if not found.
     """
     if not args:
-        return "Please provide a search keyword."
+        raise InvalidInputError("Please provide a search keyword.")
 
     keyword = ' '.join(args)
-    found = notes_book.search_by_text(keyword)
+    found = (SEARCHER or notes_book).search_by_text(keyword)
     if not found:
         return "No notes found with this text."
     return "\n".join(f"{contact}: {note}" for contact, note in found)
 
+@command("edit-note", usage="[<name>] <note_id> <new_text> [<tags>]", help="Edit a note. Note ID is the first 8 characters of the note ID, or any unique prefix.", writes=True)
 @input_error
 def handle_edit_note(args, notes_book):
     """
-    Edit a note's text and tags for a specific contact.
+    Edit a note's text and tags.
+
+    The note is found by its id or a unique prefix of it, such as the
+    8 characters shown in listings. The contact name may still be given
+    first, then only that contact's notes are looked at.
 
     Args:
-        args (list): [contact_name, note_id, new_text, #tags...]
+        args (list): [contact_name], note_id, new_text, #tags...
         notes_book (NotesBook): The notes manager.
 
     Returns:
         str: Update confirmation or error if note not found.
     """
-    contact, note_id, *new_parts = args
+    contact = None
+    if len(args) >= 3 and notes_book.get_notes(args[0]):
+        contact, *args = args
+    if len(args) < 2:
+        raise InvalidInputError("Please provide a note id and the new text.")
+    note_id, *new_parts = args
     tags = []
     text = []
     for part in new_parts:
@@ -933,37 +977,96 @@ def handle_edit_note(args, notes_book):
         else:
             text.append(part)
     if not text:
-        return "New note text cannot be empty."
-    success = notes_book.edit_note(contact, note_id, " ".join(text), tags)
-    return "Note updated." if success else "Note not found."
+        raise InvalidInputError("New note text cannot be empty.")
+    notes_book.edit_note(note_id, " ".join(text), tags, contact)
+    return "Note updated."
 
+@command("remove-note", usage="[<name>] <note_id>", help="Remove a note. Note ID is the first 8 characters of the note ID, or any unique prefix.", writes=True)
 @input_error
 def handle_remove_note(args, notes_book):
     """
-    Remove a note from a contact.
+    Remove a note, found by its id or a unique prefix of it.
 
     Args:
-        args (list): [contact_name, note_id]
+        args (list): [contact_name], note_id
         notes_book (NotesBook): The notes manager.
 
     Returns:
         str: Confirmation message.
     """
-    contact, note_id = args
-    notes_book.delete_note(contact, note_id)
+    if len(args) == 1:
+        contact, note_id = None, args[0]
+    elif len(args) == 2:
+        contact, note_id = args
+    else:
+        raise InvalidInputError("Please provide a note id.")
+    notes_book.delete_note(note_id, contact)
     return "Note deleted."
 
+IMPORT_ERRORS_SHOWN = 10
+
+@command("import", usage="<file> [csv|jsonl|vcard]", help="Import contacts and notes; existing contacts are merged", writes=True, files=True)
+@input_error
+def handle_import(args, book, notes_book):
+    """
+    Import contacts and notes from a CSV, JSON Lines or vCard file.
+
+    Args:
+        args (list): [filename, format]; the format is guessed from the extension if omitted.
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+
+    Returns:
+        str: Import summary followed by the first rejected rows.
+    """
+    if not args:
+        raise InvalidInputError("Please provide a file name.")
+    filename, *fmt = args
+    import import_export
+    try:
+        report = import_export.import_file(filename, book, notes_book, fmt[0] if fmt else None)
+    except ValueError as e:
+        raise InvalidInputError(str(e))
+    lines = [f"{Fore.GREEN}{report}{Fore.RESET}"]
+    for row_number, message in report.errors[:IMPORT_ERRORS_SHOWN]:
+        lines.append(f"{Fore.RED}row {row_number}:{Fore.RESET} {message}")
+    if len(report.errors) > IMPORT_ERRORS_SHOWN:
+        lines.append(f"... and {len(report.errors) - IMPORT_ERRORS_SHOWN} more rejected rows.")
+    return "\n".join(lines)
+
+@command("export", usage="<file> [csv|jsonl|vcard]", help="Export all contacts and notes", files=True)
+@input_error
+def handle_export(args, book, notes_book):
+    """
+    Export all contacts and notes to a CSV, JSON Lines or vCard file.
+
+    Args:
+        args (list): [filename, format]; the format is guessed from the extension if omitted.
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+
+    Returns:
+        str: Confirmation message.
+    """
+    if not args:
+        raise InvalidInputError("Please provide a file name.")
+    filename, *fmt = args
+    import import_export
+    try:
+        count = import_export.export_file(filename, book, notes_book, fmt[0] if fmt else None)
+    except ValueError as e:
+        raise InvalidInputError(str(e))
+    return f"{count} contacts exported to {filename}."
+
 
 
 def print_welcome():
     """
     Print the welcome message with ASCII art when the bot starts.
     """
-    if os.name == 'nt':
-        os.system('cls')
-    else:
-        # For Unix-like systems (Linux, macOS)
-        os.system('clear')
+    # Clear the screen and move the cursor home with escape codes instead of
+    # running cls / clear (colorama translates them on Windows)
+    print("\033[2J\033[H", end="")
     cobra = r"""
 
                 /^\/^\
@@ -990,6 +1093,329 @@ def print_welcome():
     print(" "*18, f" {Fore.GREEN}{Style.BRIGHT}Type '{Fore.RED}help{Fore.GREEN}' for a list of commands.")
     print(" ")
 
+@command("about", help="Show info about the app")
+def print_about():
+    """
+    Print information about the application.
+    """
+    print(" ")
+    print(f"{Fore.GREEN}TermiBook Bot")
+    print(f"{Fore.LIGHTBLACK_EX}Version: 1.0.0")
+    print(f"{Fore.LIGHTBLACK_EX}Produced by Serpent Rise Team©")
+    print(f"{Fore.LIGHTBLACK_EX}Support: slack.com/project-group_12")
+    print(" ")
+
+@command("help", help="Show this help message")
+def handle_help():
+    print_help()
+
+STATS_SHOWN = 10  # commands listed by "stats"
+PROFILE_LINES = 20  # functions listed by "profile"
+PROFILE_ALLOCATIONS = 5  # allocation sites listed by "profile"
+
+@command("stats", usage="[N]", help="Show the commands that took the most time in this session")
+@input_error
+def handle_stats(args):
+    """
+    Show call counts, errors and latency percentiles of the commands run
+    in this session, most total time first.
+
+    Args:
+        args (list): [N], the number of commands to show.
+
+    Returns:
+        str: Table of the hottest commands.
+    """
+    if args and not args[0].isdigit():
+        raise InvalidInputError("N must be a number.")
+    ranked = metrics.hottest(int(args[0]) if args else STATS_SHOWN)
+    if not ranked:
+        return "No commands run yet."
+    headers = ["Command", "Calls", "Errors", "Total ms", "Mean ms", "p50 ms", "p90 ms", "p99 ms", "Max ms"]
+    rows = [[name, stats.calls, stats.errors, f"{stats.total * 1000:.1f}", f"{stats.total / stats.calls * 1000:.2f}",
+             f"{stats.percentile(50) * 1000:.2f}", f"{stats.percentile(90) * 1000:.2f}",
+             f"{stats.percentile(99) * 1000:.2f}", f"{stats.max * 1000:.2f}"]
+            for name, stats in ranked]
+    return str(draw_table(headers, rows, 200))
+
+@command("profile", usage="<command> [args]", help="Run a command under cProfile and tracemalloc and show where time and memory went", writes=True)
+@input_error
+def handle_profile(args, book, notes_book):
+    """
+    Run one command with cProfile and tracemalloc enabled.
+
+    The command output is printed first, then the functions with the most
+    cumulative time, the peak memory and the lines holding the most memory
+    when the command finished.
+
+    Args:
+        args (list): [command, command arguments...]
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+
+    Returns:
+        str: Profile report.
+    """
+    if not args:
+        raise InvalidInputError("Please provide a command to profile.")
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+    command, *command_args = args
+    cmd = find_command(command.lower())
+    if cmd is None or cmd.handler is None or cmd.name == "profile":
+        raise InvalidInputError(f"Cannot profile '{command}'.")
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        profiler.enable()
+        result = dispatch(cmd.name, command_args, book, notes_book)
+        profiler.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().statistics("lineno")
+    finally:
+        tracemalloc.stop()
+    if result is not None:
+        print(result)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    lines = [report.getvalue().strip(), "", f"{Fore.CYAN}Peak memory: {peak / 1024:.1f} KiB{Fore.RESET}",
+             "Memory still allocated, by line:"]
+    lines.extend(f"  {stat}" for stat in allocations[:PROFILE_ALLOCATIONS])
+    return "\n".join(lines)
+
+# Handled by the main loop, registered for the help and the completer
+session_command("save", usage="[filename]", help="Save address book", writes=True, files=True)
+session_command("load", usage="[filename]", help="Load address book", writes=True, files=True)
+session_command("exit", help="Exit the assistant", aliases=("close", "quit"))
+
+def dispatch(command, args, book, notes_book):
+    """
+    Run a single command against the address book and the notes book.
+
+    The handler is looked up in the command registry (see commands.py).
+    Storage commands (save, load, exit) are handled by the caller, since
+    they depend on how the session was started.
+
+    Args:
+        command (str): Lowercased command name or alias.
+        args (list): Command arguments.
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+
+    Returns:
+        str: Message to print, or None if the command printed its own output.
+        Failed commands return an ErrorMessage.
+    """
+    cmd = find_command(command)
+    if cmd is None or cmd.handler is None:
+        return ErrorMessage(f"{Fore.RED}Invalid command.")
+    start = time.perf_counter()
+    result = cmd.run(args, book, notes_book)
+    metrics.record(cmd.name, time.perf_counter() - start, isinstance(result, ErrorMessage))
+    return result
+
+def run_script(lines, book, notes_book, quiet=False):
+    """
+    Execute commands non-interactively, one command per line.
+
+    Empty lines and lines starting with "#" are skipped, "exit" stops the
+    script, and "save" / "load" are ignored because the caller saves once
+    at the end. Failed commands are reported on stderr with their line
+    number, followed by a throughput summary.
+
+    Args:
+        lines (iterable): Command lines, e.g. an open file.
+        book (AddressBook): The address book.
+        notes_book (NotesBook): The notes book.
+        quiet (bool): Do not print the output of successful commands.
+
+    Returns:
+        tuple: Number of executed commands and number of failed ones.
+    """
+    executed = failed = 0
+    start = time.perf_counter()
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        command, *args = parse_input(line)
+        cmd = find_command(command)
+        if cmd is not None and cmd.name == "exit":
+            break
+        if cmd is not None and cmd.handler is None:
+            continue
+        executed += 1
+        result = dispatch(command, args, book, notes_book)
+        if isinstance(result, ErrorMessage):
+            failed += 1
+            print(f"line {line_number}: {command}: {result}{Style.RESET_ALL}", file=sys.stderr)
+        elif result is not None and not quiet:
+            print(result)
+    elapsed = time.perf_counter() - start
+    rate = executed / elapsed if elapsed else 0
+    print(f"{executed} commands in {elapsed:.2f}s ({rate:.0f} commands/s), {failed} failed.", file=sys.stderr)
+    return executed, failed
+
+def print_timing(phases):
+    """
+    Print how long the startup phases took, on stderr (``--timing``).
+
+    Args:
+        phases (list): (phase name, seconds) pairs.
+    """
+    print(", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in phases), file=sys.stderr)
+
+def main_script(options):
+    """
+    Run the commands of a script file (or stdin) and save the data once.
+
+    Args:
+        options (argparse.Namespace): Parsed command line options.
+
+    Returns:
+        int: Exit status, 1 if any command failed.
+    """
+    load_start = time.perf_counter()
+    try:
+        if options.storage == "sqlite":
+            import sqlite_store
+            book, notes_book = sqlite_store.open_books(options.db or sqlite_store.DB_FILE)
+            # Commit the whole script at once instead of after every change
+            book.autocommit = notes_book.autocommit = False
+        else:
+            journal = Journal()
+            book, notes_book = open_books(journal, options.storage)
+            # Write one snapshot at the end instead of journaling every change
+            book.journal = notes_book.journal = None
+    except SnapshotError as e:
+        print(e, file=sys.stderr)
+        return 1
+    start_search_workers(book, notes_book, options.workers)
+    if options.timing:
+        print_timing([("import", IMPORT_TIME), ("load", time.perf_counter() - load_start)])
+    if options.script == "-":
+        _, failed = run_script(sys.stdin, book, notes_book, options.quiet)
+    else:
+        with open(options.script, encoding="utf-8") as f:
+            _, failed = run_script(f, book, notes_book, options.quiet)
+    stop_search_workers()
+    if options.storage == "sqlite":
+        book.save([])
+        book.close()
+    else:
+        compact_data(book, notes_book, journal)
+    return 1 if failed else 0
+
+def client_file_error(cmd, args):
+    """
+    Check the file a command sent by a client of the server names. Only
+    plain file names in the directory of the server are accepted, so that
+    a client cannot read or overwrite other files of the server owner.
+
+    Args:
+        cmd (Command): The command, or None if it is unknown.
+        args (list): Command arguments.
+
+    Returns:
+        ErrorMessage: The error to send back, or None if the command may run.
+    """
+    if cmd is not None and cmd.name == "profile" and args:
+        cmd, args = find_command(args[0].lower()), args[1:]
+    if cmd is None or not cmd.files or not args:
+        return None
+    filename = args[0]
+    if os.path.basename(filename) != filename or \
+            os.path.dirname(os.path.realpath(filename)) != os.path.realpath(os.getcwd()):
+        return ErrorMessage(f"{Fore.RED}Clients may only name files in the directory of the server, e.g. 'backup.jsonl'.")
+    return None
+
+def main_serve(options):
+    """
+    Keep the books loaded and serve the commands to local clients
+    (``termibook client``, see server.py) until interrupted.
+
+    Args:
+        options (argparse.Namespace): Parsed command line options.
+
+    Returns:
+        int: Exit status.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from client import SOCKET_FILE, TOKEN_VARIABLE, TOKEN_FILE
+    from server import BookServer, ReadWriteLock, THREADS, write_token
+    if options.port is None and not hasattr(asyncio, "start_unix_server"):
+        print("Unix sockets are not available on this system, use serve --port N.", file=sys.stderr)
+        return 2
+    try:
+        if options.storage == "sqlite":
+            import sqlite_store
+            # A SQLite connection is used by the thread that opened it
+            executor = ThreadPoolExecutor(1)
+            journal = None
+            book, notes_book = executor.submit(sqlite_store.open_books, options.db or sqlite_store.DB_FILE).result()
+        else:
+            executor = ThreadPoolExecutor(THREADS)
+            journal = Journal()
+            book, notes_book = open_books(journal, options.storage)
+    except SnapshotError as e:
+        print(e, file=sys.stderr)
+        return 1
+    start_search_workers(book, notes_book, options.workers)
+    lock = ReadWriteLock()
+    autosaver = None
+    if journal is not None:
+        autosaver = Autosaver(book, notes_book, journal, lock=lock)
+        autosaver.start()
+
+    def execute(command, args):
+        # Runs on a thread of the executor, with the server holding the lock
+        cmd = find_command(command)
+        if cmd is not None and cmd.name in ("load", "exit"):
+            return ErrorMessage(f"{Fore.RED}'{command}' is not available from a client; restart the server instead.")
+        error = client_file_error(cmd, args)
+        if error is not None:
+            return error
+        if cmd is not None and cmd.name == "save":
+            if journal is None or args:
+                book.save(args)
+            if autosaver is not None:
+                autosaver.save_soon()
+            return "Data saved."
+        result = dispatch(command, args, book, notes_book)
+        if autosaver is not None:
+            autosaver.notify()
+            error = autosaver.take_error()
+            if error is not None:
+                print(f"Autosave failed: {error}. Changes are kept in the journal.", file=sys.stderr)
+        return result
+
+    token = token_file = None
+    if options.port is not None:
+        # Any local user can connect to a TCP port: clients must show the token
+        token = os.environ.get(TOKEN_VARIABLE)
+        if not token:
+            token_file = TOKEN_FILE
+            token = write_token(token_file)
+    try:
+        asyncio.run(BookServer(execute, executor, lock, token).serve(options.socket or SOCKET_FILE, options.port))
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if token_file is not None and os.path.exists(token_file):
+            os.remove(token_file)
+        stop_search_workers()
+        if journal is not None:
+            autosaver.stop()
+            journal.close()
+        else:
+            executor.submit(book.close).result()
+        executor.shutdown()
+    print("Data saved. Server stopped.")
+    return 0
+
 # Assistant Bot for Address Book Management
 def main():
     """
@@ -1004,98 +1430,146 @@ def main():
 
     Commands are entered via a prompt with autocompletion.
     The bot continues running until the user types 'exit', 'close', or 'quit'.
-    """
+
+    Data is kept in pickle snapshots plus a journal by default, in a SQLite
+    database when started with ``--storage sqlite``, or in a memory-mapped
+    columnar snapshot plus a journal with ``--storage columnar``. With ``--script FILE``
+    the commands are read from a file (or stdin for "-") instead. ``termibook serve``
+    serves the books to ``termibook client`` and other local programs.
+    """
+    if sys.argv[1:2] == ["client"]:
+        # The client has its own options and does not load the books
+        import client
+        sys.exit(client.main(sys.argv[2:]))
+    parser = argparse.ArgumentParser(prog="termibook", description="TermiBook Assistant Bot")
+    parser.add_argument("mode", nargs="?", choices=["serve", "client"],
+                        help="serve: serve the books to local clients; client: run commands on a running server")
+    parser.add_argument("--storage", choices=["pickle", "sqlite", "columnar"], default="pickle",
+                        help="storage backend (default: pickle)")
+    parser.add_argument("--db", help="SQLite database file (default: termibook.db)")
+    parser.add_argument("--script", metavar="FILE",
+                        help="run the commands from FILE ('-' for stdin) and exit")
+    parser.add_argument("--quiet", action="store_true",
+                        help="with --script, only report errors and the summary")
+    parser.add_argument("--timing", action="store_true",
+                        help="report import, load and first prompt latency on stderr")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run search, search-notes and search-notes-text in N worker processes")
+    parser.add_argument("--socket", help="with serve, the Unix socket to listen on (default: termibook.sock)")
+    parser.add_argument("--port", type=int, help="with serve, listen on this TCP port of 127.0.0.1 instead")
+    options = parser.parse_args()
+    if options.workers and options.storage == "sqlite":
+        parser.error("--workers needs the pickle or columnar storage")
+    if options.mode == "serve" and options.script:
+        parser.error("serve and --script cannot be combined")
+    if options.mode == "client":
+        parser.error("client takes its own options: termibook client [--socket PATH | --port N] [command]")
+
     init(autoreset=True) # Initialize colorama for colored output
+    metrics_file = os.environ.get(metrics.METRICS_ENV)
+    if metrics_file:
+        # Written however the session ends, including --script runs
+        atexit.register(metrics.dump, metrics_file)
+    if options.script:
+        sys.exit(main_script(options))
+    if options.mode == "serve":
+        sys.exit(main_serve(options))
+
     print_welcome() 
-    # Load the address book data from file or create a new one
-    book = load_data()
-    notes_book = notes.load_data()
+    load_start = time.perf_counter()
+    try:
+        if options.storage == "sqlite":
+            # Existing pickles are migrated until a migration completes
+            import sqlite_store
+            journal = None
+            book, notes_book = sqlite_store.open_books(options.db or sqlite_store.DB_FILE)
+        else:
+            # Load the last snapshot and replay the changes made after it
+            journal = Journal()
+            book, notes_book = open_books(journal, options.storage)
+    except SnapshotError as e:
+        # Never start with an empty book that would then be saved over the damaged files
+        print(f"{Fore.RED}{e}")
+        sys.exit(1)
+    start_search_workers(book, notes_book, options.workers)
+    load_time = time.perf_counter() - load_start
+    # Snapshots are written in the background; commands run with its lock held
+    autosaver = None
+    if journal is not None:
+        autosaver = Autosaver(book, notes_book, journal)
+        autosaver.start()
+    lock = autosaver.lock if autosaver is not None else nullcontext()
+
+    # The prompt session is created after the welcome message and the data are shown
+    session = prompt.get_session()
+    completer = prompt.get_completer(lambda: (book, notes_book))
+    if options.timing:
+        print_timing([("import", IMPORT_TIME), ("load", load_time),
+                      ("first prompt", time.perf_counter() - START_TIME)])
 
     while True:
-        user_input = prompt.session.prompt("Enter a command >>> ", completer=prompt.completer, complete_while_typing=False)
+        user_input = session.prompt("Enter a command >>> ", completer=completer, complete_while_typing=False)
         if not user_input.strip():
             print("Please enter a command.")
             continue
         command, *args = parse_input(user_input)
-
-        if command in ["close", "exit", "quit"]:
-            save_data(book)
-            notes.save_data(notes_book)
+        cmd = find_command(command)
+        if cmd is not None:
+            command = cmd.name
+
+        if command == "exit":
+            stop_search_workers()
+            # Every change is already in the journal (or database), no full rewrite needed
+            if journal is not None:
+                autosaver.stop()
+                journal.close()
+            else:
+                book.close()
             print("Data saved. Exiting the assistant bot.")
             print("Good bye!")
             break
-        elif command == "hello":
-            print("How can I help you?")
-        elif command == "add-contact":
-            print(add_contact(args, book))
-        elif command in ["change-contact", "edit-contact", "edit-phone"]:
-            print(change_contact(args, book))
-        elif command == "delete-contact":
-            print(delete_contact(args, book))
-        elif command == "search":
-            print(search_contacts(args, book, notes_book))
-        elif command == "phone":
-            print(show_phone(args, book))
-        elif command == "all":
-            show_all(book, notes_book)
-        elif command == "add-email":
-            print(handle_add_email(args, book))
-        elif command == "show-email":
-            print(handle_show_email(args, book))
-        elif command == "edit-email":
-            print(handle_edit_email(args, book))
-        elif command == "remove-email":
-            print(handle_remove_email(args, book))
-        elif command == "add-birthday":
-            print(add_birthday(args, book))
-        elif command == "show-birthday":
-            print(contact_birthday(args, book))
-        elif command == "birthdays":
-            upcoming_birthdays(args, book)
-        elif command == "add-note":
-            print(handle_add_note(args, book, notes_book))
-        elif command == "show-notes":
-            print(handle_show_notes(args, notes_book))
-        elif command == "all-notes":
-            print(handle_show_all_notes(notes_book))
-        elif command == "search-notes":
-            print(handle_search_notes(args, notes_book))
-        elif command == "search-notes-text":
-            print(handle_search_notes_text(args, notes_book))
-        elif command == "edit-note":
-            print(handle_edit_note(args, notes_book))
-        elif command == "remove-note":
-            print(handle_remove_note(args, notes_book))
-        elif command == "add-address":
-            print(handle_add_address(args, book))
-        elif command == "show-address":
-            print(handle_show_address(args, book))
-        elif command == "edit-address":
-            print(handle_edit_address(args, book))
-        elif command == "remove-address":
-            print(handle_remove_address(args, book))
         elif command == "save":
-            book.save(args)
-            notes.save_data(notes_book)
+            if journal is None:
+                book.save(args)
+            else:
+                if args:
+                    with lock:
+                        book.save(args)
+                # The notes and the default snapshot are written by the autosave thread
+                autosaver.save_soon()
             print("Data saved.")
+        elif command == "load" and journal is None:
+            print("Data is loaded from the database.")
         elif command == "load":
-            book = book.load(args)
-            notes_book = notes.load_data()
-            print("Data loaded.")
-        elif command == "help":
-            print_help()
-        elif command == "about":
-            print(" ")
-            print(f"{Fore.GREEN}TermiBook Bot")
-            print(f"{Fore.LIGHTBLACK_EX}Version: 1.0.0")
-            print(f"{Fore.LIGHTBLACK_EX}Produced by Serpent Rise Team©")
-            print(f"{Fore.LIGHTBLACK_EX}Support: slack.com/project-group_12")
-            print(" ")
+            try:
+                # Write the changes still only in the journal first, so the
+                # files read below hold them
+                autosaver.save()
+                with lock:
+                    loaded_notes = notes.load_data()
+                    book = book.load(args)
+                    notes_book = loaded_notes
+                    book.journal = journal
+                    notes_book.journal = journal
+                    autosaver.use(book, notes_book)
+                    start_search_workers(book, notes_book, options.workers)
+            except (OSError, SnapshotError) as e:
+                print(f"{Fore.RED}Cannot load the data: {e}")
+            else:
+                print("Data loaded.")
+                # The loaded data becomes the new snapshot for the journal
+                autosaver.save_soon()
         else:
-            print(f"{Fore.RED}Invalid command.")
+            with lock:
+                result = dispatch(command, args, book, notes_book)
+            if result is not None:
+                print(result)
+
+        if autosaver is not None:
+            autosaver.notify()
+            error = autosaver.take_error()
+            if error is not None:
+                print(f"{Fore.RED}Autosave failed: {error}. Changes are kept in the journal.")
 
 if __name__ == "__main__":
     main()
-
-
-
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+
+METRICS_ENV = "TERMIBOOK_METRICS"  # file the metrics are written to on exit, if set
+
+
+class CommandStats:
+    """
+    Latency and error counts of one command.
+
+    Latencies are kept in a histogram with power-of-two buckets in
+    microseconds (bucket n holds calls that took less than 2**n µs),
+    so recording a call costs the same however long the session runs.
+
+    Attributes:
+        calls (int): Number of calls.
+        errors (int): Number of calls that returned an ErrorMessage.
+        total (float): Total time in seconds.
+        max (float): Slowest call in seconds.
+        buckets (dict): key: bucket number, value: number of calls.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds, failed=False):
+        self.calls += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        bucket = int(seconds * 1_000_000).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, p):
+        """
+        Estimate a latency percentile from the histogram.
+
+        Args:
+            p (float): Percentile, 0-100.
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile, in seconds.
+        """
+        rank = p / 100 * self.calls
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** bucket / 1_000_000, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.calls * 1000 if self.calls else 0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+            "histogram_us": {f"<{2 ** bucket}": count for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+STATS = {}  # key: command name, value: CommandStats
+_lock = threading.Lock()  # the server records commands from several threads
+
+
+def record(name, seconds, failed=False):
+    """
+    Record one call of a command.
+
+    Args:
+        name (str): Command name.
+        seconds (float): How long the call took.
+        failed (bool): True if the command returned an error.
+    """
+    with _lock:
+        stats = STATS.get(name)
+        if stats is None:
+            stats = STATS[name] = CommandStats()
+        stats.add(seconds, failed)
+
+def hottest(limit=None):
+    """
+    Returns:
+        list: (name, CommandStats) pairs, most total time first.
+    """
+    with _lock:
+        ranked = sorted(STATS.items(), key=lambda item: -item[1].total)
+    return ranked[:limit] if limit else ranked
+
+def dump(filename):
+    """
+    Write the metrics of the session to a JSON file.
+
+    Args:
+        filename (str): Output file.
+    """
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump({
+            "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commands": {name: stats.to_dict() for name, stats in hottest()},
+        }, f, indent=2)
@@ -1,24 +1,91 @@
-import pickle
+import string
+import sys
 import uuid
+from bisect import bisect_left, bisect_right, insort
 from colorama import Fore, Style, init
+from text_index import TextIndex
+from errors import NoteNotFoundError, AmbiguousNoteIdError
+from storage import save_snapshot, load_snapshot
+from render_cache import Rendered
 
-class Note:
+class Note(Rendered):
     """
     Represents a single note with optional tags.
 
+    Setting the id, text or tags bumps the version of the note, so its
+    cached display strings (see Rendered) are built again.
+
     Attributes:
         id (str): Unique identifier for the note.
+        uid (bytes): The same identifier as 16 raw bytes, as it is stored.
         text (str): The text content of the note.
-        tags (list): Optional list of tags associated with the note.
+        tags (tuple): Tags associated with the note, interned.
     """    
+    __slots__ = ("uid", "_text", "_tags", "_version", "_rendered")
+
     def __init__(self, text, tags=None):
-        self.id = str(uuid.uuid4())
+        self._version = 0
+        self._rendered = None
+        self.uid = uuid.uuid4().bytes
         self.text = text
-        self.tags = tags if tags else []
+        self.tags = tags
+
+    @property
+    def id(self):
+        return str(uuid.UUID(bytes=self.uid))
+
+    @id.setter
+    def id(self, value):
+        self.uid = uuid.UUID(value).bytes
+        self.changed()
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        self._text = text
+        self.changed()
+
+    @property
+    def tags(self):
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags):
+        # Most tags repeat across notes, so every distinct tag is kept once
+        self._tags = tuple(sys.intern(tag) for tag in tags) if tags else ()
+        self.changed()
+
+    def __getstate__(self):
+        return (self.uid, self._text, self._tags)
+
+    def __setstate__(self, state):
+        # Pickles written before __slots__ hold the instance __dict__
+        if isinstance(state, dict):
+            state = (uuid.UUID(state["id"]).bytes, state["text"], state.get("tags"))
+        self._version = 0
+        self._rendered = None
+        self.uid, self.text, self.tags = state
+
+    def _string(self):
+        tags_str = f"{Fore.BLUE} {', '.join(f'#{tag}' for tag in self._tags)}" if self._tags else ""
+        return f"{Fore.LIGHTBLACK_EX}[{self.id[:8]}] {Fore.RESET}{self._text} {tags_str}"
+
+    def _line(self):
+        tags_str = f"{Fore.BLUE} {', '.join(f'#{tag}' for tag in self._tags)}" if self._tags else f"{Fore.LIGHTBLACK_EX}no tags{Fore.RESET}"
+        return f"{Fore.LIGHTBLACK_EX}[{self.id[:8]}]{Fore.RESET} {self._text} {tags_str}"
 
     def __str__(self):
-        tags_str = f"{Fore.BLUE} {', '.join(f'#{tag}' for tag in self.tags)}" if self.tags else ""
-        return f"{Fore.LIGHTBLACK_EX}[{self.id[:8]}] {Fore.RESET}{self.text} {tags_str}"
+        return self.rendered("str", Note._string)
+
+    def line(self):
+        """
+        Returns:
+            str: The note as listed under its contact by ``Record.to_string``.
+        """
+        return self.rendered("line", Note._line)
 
 class NotesBook:
     """
@@ -26,42 +93,283 @@ class NotesBook:
 
     Notes are stored as a dictionary where the key is the contact name,
     and the value is a list of Note instances.
+
+    If a journal is attached, every added, edited or deleted note is
+    appended to it as a single entry (see ``restore_note``), so the cost
+    of a change does not depend on how many notes the contact has.
+    ``version`` counts the changes made since the book was created or
+    loaded.
+
+    Tags are indexed: a lowercased tag maps to the (contact, note id) pairs
+    of the notes carrying it, so tag searches and tag counts never walk
+    the whole book. Note text is indexed word by word in a TextIndex for
+    ranked text search; that index is built on the first text search, so
+    loading a book stays fast. All note ids are kept in one sorted list,
+    so a note is found from an id prefix with a binary search, without
+    knowing its contact. The indexes are not pickled; they are rebuilt
+    on load.
     """    
     def __init__(self):
         self.data = {}  # key: contact name, value: list of Note
+        self.journal = None
+        self.version = 0
+        self.rebuild_index()
+
+    def __getstate__(self):
+        return {"data": self.data}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.journal = None
+        self.version = 0
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        """
+        Rebuild the tag index from the stored notes.
+        """
+        self._notes = {}  # key: note uid, value: (contact, Note)
+        self._tags = {}  # key: lowercased tag, value: dict of (contact, note uid) -> None
+        self._text = None  # TextIndex, document key: (contact, note uid); built when first needed
+        self._ids = None  # sorted note uids; sorted once after the loop below
+        for contact, notes in self.data.items():
+            for note in notes:
+                self._index_note(contact, note)
+        self._ids = sorted(self._notes)
+
+    def _text_index(self):
+        if self._text is None:
+            # Built aside, so that a search running on another thread never sees half an index
+            text = TextIndex()
+            for contact, notes in self.data.items():
+                for note in notes:
+                    text.add((contact, note.uid), note.text)
+            self._text = text
+        return self._text
+
+    def _index_note(self, contact, note):
+        if self._ids is not None and note.uid not in self._notes:
+            insort(self._ids, note.uid)
+        self._notes[note.uid] = (contact, note)
+        if self._text is not None:
+            self._text.add((contact, note.uid), note.text)
+        for tag in note.tags:
+            self._tags.setdefault(tag.lower(), {})[(contact, note.uid)] = None
+
+    def _unindex_note(self, contact, note):
+        if self._notes.pop(note.uid, None) is not None:
+            del self._ids[bisect_left(self._ids, note.uid)]
+        if self._text is not None:
+            self._text.remove((contact, note.uid))
+        for tag in note.tags:
+            key = tag.lower()
+            entries = self._tags.get(key)
+            if entries is None:
+                continue
+            entries.pop((contact, note.uid), None)
+            if not entries:
+                del self._tags[key]
+
+    def _changed(self, contact, note, deleted=False):
+        self.version += 1
+        if self.journal is not None:
+            self.journal.append("note", contact, (note.uid, None if deleted else note))
+
+    def restore(self, contact, notes):
+        """
+        Replace the notes of a contact without journaling it.
+        Used when replaying the journal.
+
+        Args:
+            contact (str): The contact name.
+            notes (list): New list of notes, or None to remove them.
+        """
+        for note in self.data.pop(contact, []):
+            self._unindex_note(contact, note)
+        if notes is not None:
+            self.data[contact] = notes
+            for note in notes:
+                self._index_note(contact, note)
+        self.version += 1
+
+    def restore_note(self, contact, uid, note):
+        """
+        Add, replace or delete a single note without journaling it.
+        Used when replaying the journal.
+
+        Args:
+            contact (str): The contact name.
+            uid (bytes): Id of the note.
+            note (Note): New state of the note, or None to delete it.
+        """
+        notes = self.data.setdefault(contact, [])
+        for position, old in enumerate(notes):
+            if old.uid == uid:
+                self._unindex_note(contact, old)
+                if note is None:
+                    del notes[position]
+                else:
+                    notes[position] = note
+                break
+        else:
+            if note is not None:
+                notes.append(note)
+        if note is not None:
+            self._index_note(contact, note)
+        self.version += 1
 
     def add_note(self, contact, note):
         if contact not in self.data:
             self.data[contact] = []
         self.data[contact].append(note)
+        self._index_note(contact, note)
+        self._changed(contact, note)
+
+    def _match_ids(self, note_id, contact=None):
+        # Up to two notes whose id starts with note_id, enough to tell a unique prefix
+        prefix = note_id.lower().replace("-", "")
+        if not prefix or len(prefix) > 32 or not set(prefix) <= set(string.hexdigits):
+            return []
+        low = bytes.fromhex(prefix.ljust(32, "0"))
+        high = bytes.fromhex(prefix.ljust(32, "f"))
+        matches = []
+        for index in range(bisect_left(self._ids, low), len(self._ids)):
+            uid = self._ids[index]
+            if uid > high:
+                break
+            owner, note = self._notes[uid]
+            if contact is None or owner == contact:
+                matches.append((owner, note))
+                if len(matches) == 2:
+                    break
+        return matches
+
+    def complete_ids(self, prefix, limit=None):
+        """
+        Find the notes whose id starts with a prefix, e.g. to complete it.
+
+        Args:
+            prefix (str): Note id prefix.
+            limit (int, optional): Maximum number of ids.
+
+        Returns:
+            list: Ids shortened to the 8 characters shown in listings, or
+                whole ids if the prefix is longer; in sorted order.
+        """
+        hex_prefix = prefix.lower().replace("-", "")
+        if len(hex_prefix) > 32 or not set(hex_prefix) <= set(string.hexdigits):
+            return []
+        start = bisect_left(self._ids, bytes.fromhex(hex_prefix.ljust(32, "0")))
+        end = bisect_right(self._ids, bytes.fromhex(hex_prefix.ljust(32, "f")), start)
+        ids = {}
+        for index in range(start, end):
+            note_id = str(uuid.UUID(bytes=self._ids[index]))
+            ids[note_id if len(prefix) >= 8 else note_id[:8]] = None
+            if len(ids) == limit:
+                break
+        return list(ids)
+
+    def complete_tags(self, prefix, limit=None):
+        """
+        Find the tags starting with a prefix, e.g. to complete it.
+
+        Args:
+            prefix (str): Tag prefix (case-insensitive).
+            limit (int, optional): Maximum number of tags.
+
+        Returns:
+            list: Lowercased tags in sorted order.
+        """
+        prefix = prefix.lower()
+        return sorted(tag for tag in self._tags if tag.startswith(prefix))[:limit]
+
+    def find_note(self, note_id, contact=None):
+        """
+        Find a note by its id or a unique prefix of it (e.g. the first 8 characters).
+
+        Args:
+            note_id (str): Note id or id prefix.
+            contact (str, optional): Only look at the notes of this contact.
+
+        Returns:
+            tuple: (contact, Note).
+
+        Raises:
+            NoteNotFoundError: If no note has an id starting with the prefix.
+            AmbiguousNoteIdError: If several notes do.
+        """
+        matches = self._match_ids(note_id, contact)
+        if not matches:
+            raise NoteNotFoundError(f"Note '{note_id}' not found.")
+        if len(matches) > 1:
+            raise AmbiguousNoteIdError(f"Note id '{note_id}' matches several notes, please type more of it.")
+        return matches[0]
+
+    def edit_note(self, note_id, new_text, new_tags, contact=None):
+        """
+        Replace the text and tags of a note.
+
+        Args:
+            note_id (str): Note id or a unique prefix of it.
+            new_text (str): New text.
+            new_tags (list): New tags.
+            contact (str, optional): Only look at the notes of this contact.
 
-    def edit_note(self, contact, note_id, new_text, new_tags):
-        for note in self.data.get(contact, []):
-            if note.id.startswith(note_id):
-                note.text = new_text
-                note.tags = new_tags
-                return True
-        return False
+        Raises:
+            NoteNotFoundError, AmbiguousNoteIdError: See ``find_note``.
+        """
+        contact, note = self.find_note(note_id, contact)
+        self._unindex_note(contact, note)
+        note.text = new_text
+        note.tags = new_tags
+        self._index_note(contact, note)
+        self._changed(contact, note)
+
+    def delete_note(self, note_id, contact=None):
+        """
+        Delete a note.
 
-    def delete_note(self, contact, note_id):
-        notes = self.data.get(contact, [])
-        self.data[contact] = [n for n in notes if not n.id.startswith(note_id)]
+        Args:
+            note_id (str): Note id or a unique prefix of it.
+            contact (str, optional): Only look at the notes of this contact.
+
+        Raises:
+            NoteNotFoundError, AmbiguousNoteIdError: See ``find_note``.
+        """
+        contact, note = self.find_note(note_id, contact)
+        self._unindex_note(contact, note)
+        self.data[contact].remove(note)
+        self._changed(contact, note, deleted=True)
 
     def search_by_tag(self, tag):
-        results = []
-        for contact, notes in self.data.items():
-            for note in notes:
-                if tag.lower() in (t.lower() for t in note.tags):
-                    results.append((contact, note))
-        return results
+        return [self._notes[uid] for _, uid in self._tags.get(tag.lower(), ())]
+
+    def tag_counts(self):
+        """
+        Count how many notes carry each tag.
+
+        Returns:
+            list: (tag, count) pairs, most used tags first.
+        """
+        counts = [(tag, len(entries)) for tag, entries in self._tags.items()]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts
     
-    def search_by_text(self, keyword):
-        results = []
-        for contact, notes in self.data.items():
-            for note in notes:
-                if keyword.lower() in note.text.lower():
-                    results.append((contact, note))
-        return results
+    def search_by_text(self, keyword, limit=None):
+        """
+        Search notes by words of their text, best matches first.
+
+        Words are combined with AND, ``OR`` separates alternatives and
+        a trailing ``*`` matches a word prefix (e.g. ``buy milk OR egg*``).
+
+        Args:
+            keyword (str): The search query.
+            limit (int, optional): Maximum number of results.
+
+        Returns:
+            list: (contact, Note) pairs ranked by relevance.
+        """
+        return [self._notes[uid] for (_, uid), _ in self._text_index().search(keyword, limit)]
 
     def get_notes(self, contact):
         """
@@ -92,8 +400,7 @@ def save_data(book, filename="notesbook.pkl"):
         book (NotesBook): The notes book to save.
         filename (str): The file name to save to. Defaults to 'notesbook.pkl'.
     """
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
+    save_snapshot(book, filename)
 
 def load_data(filename="notesbook.pkl"):
     """
@@ -104,13 +411,15 @@ def load_data(filename="notesbook.pkl"):
 
     Returns:
         NotesBook: The loaded NotesBook instance or a new empty one.
+
+    Raises:
+        SnapshotError: If the file and all its previous generations are corrupted.
     """
     try:
-        with open(filename, "rb") as f:
-            note = pickle.load(f)
-            if not hasattr(note, 'search_by_text'):
-                return NotesBook()
-            return note
+        note = load_snapshot(filename)
+        if not hasattr(note, 'search_by_text'):
+            return NotesBook()
+        return note
     except FileNotFoundError:
         return NotesBook()
     
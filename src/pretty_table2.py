@@ -1,8 +1,95 @@
-from prettytable import HRuleStyle, PrettyTable
+import gc
+import re
+from functools import lru_cache
+
+PAGE_SIZE = 50  # rows per table when output is paginated
+
+# Box drawing characters, the same as the PrettyTable style used before
+VERTICAL, HORIZONTAL = "│", "─"
+TOP = ("╭", "┬", "╮")
+MIDDLE = ("├", "┼", "┤")
+BOTTOM = ("╰", "┴", "╯")
+
+# ANSI color codes take no room on screen
+_ANSI_RE = re.compile(r"\033\[[0-9;]*m|\033\(B")
+
+def strip_colors(text):
+    """
+    Remove the ANSI color codes from a string.
+
+    :param text: Input string
+    :return: The string without color codes
+    """
+    return _ANSI_RE.sub("", text) if "\033" in text else text
+
+@lru_cache(maxsize=4096)
+def _wide_width(word):
+    from wcwidth import wcswidth
+    width = wcswidth(word)
+    # wcswidth returns -1 for control characters
+    return width if width >= 0 else len(word)
+
+def display_width(text):
+    """
+    Number of terminal columns a string takes: ANSI color codes are
+    ignored, wide characters (CJK, most emoji) count as two columns.
+
+    :param text: Input string, a single line
+    :return: Width in columns
+    """
+    if "\033" in text:
+        text = _ANSI_RE.sub("", text)
+    if text.isascii():
+        return len(text)
+    # Only the words with non-ASCII characters need wcwidth; they repeat
+    # often (emoji markers, names), so their widths are cached
+    words = text.split(" ")
+    return len(words) - 1 + sum(len(word) if word.isascii() else _wide_width(word) for word in words)
+
+def _wrap_lines(text, max_width):
+    """
+    Wrap text like ``wrap_text`` and return its lines with their widths,
+    so that every line is measured only once.
+
+    :return: (list of lines, list of display widths)
+    """
+    # Color codes are removed once for the whole cell; they never contain line breaks
+    plain = _ANSI_RE.sub("", text) if "\033" in text else text
+    if plain.isascii():
+        if max_width <= 0 or len(plain) <= max_width:
+            return text.split("\n"), [len(line) for line in plain.split("\n")]
+    else:
+        widths = [display_width(line) for line in plain.split("\n")]
+        # Line breaks count as one character, as in len(text)
+        if max_width <= 0 or sum(widths) + len(widths) - 1 <= max_width:
+            return text.split("\n"), widths
+
+    words = text.split()
+    if not words:
+        lines = text.split("\n")
+        return lines, [display_width(line) for line in lines]
+
+    lines, widths = [], []
+    current_line, current_width = [], -1
+    for word in words:
+        word_width = display_width(word)
+        # If adding the word exceeds the maximum width
+        if current_line and current_width + 1 + word_width > max_width:
+            lines.append(" ".join(current_line))
+            widths.append(current_width)
+            current_line, current_width = [word], word_width
+        else:
+            current_line.append(word)
+            current_width += 1 + word_width
+    lines.append(" ".join(current_line))
+    widths.append(current_width)
+    return lines, widths
+
 def wrap_text(text, max_width):
     """
     Splits the text into lines of a given maximum width,
     inserting \n only at spaces (without breaking words).
+    Widths are display widths, so color codes do not count.
     
     :param text: Input string
     :param max_width: Maximum line width (N characters)
@@ -10,68 +97,85 @@ def wrap_text(text, max_width):
     """
     if not text or max_width <= 0:
         return text
-    
-    if len(text) <= max_width:
-        return text
-    
-    words = text.split()
-    if not words:
-        return text
-    
-    lines = []
-    current_line = ""
-    
-    for word in words:
-        # If adding the word exceeds the maximum width
-        if current_line and len(current_line) + 1 + len(word) > max_width:
-            lines.append(current_line)
-            current_line = word
-        else:
-            # Add the word to the current line
-            if current_line:
-                current_line += " " + word
-            else:
-                current_line = word
-    
-    # Add the last line
-    if current_line:
-        lines.append(current_line)
-    
-    return "\n".join(lines)
+    return "\n".join(_wrap_lines(text, max_width)[0])
 
 def draw_table(headers, data, maxcolwidths=80):
     """
-    Generate a formatted table using PrettyTable.
+    Render a table with rounded box-drawing borders and a rule between rows.
+
+    Every cell is wrapped to a quarter of the terminal width and measured
+    once; the column widths are the widest line of each column. The
+    output is collected in one list and joined at the end.
 
     :param headers (list): Column headers.
     :param data (list of lists): Table rows.
-    :param maxcolwidths (list, optional): Max width for each column.
-    :param allhlines (bool, optional): Draw horizontal lines for all rows. Default is False.
+    :param maxcolwidths (int, optional): Terminal width used to size the columns.
 
-    :return: PrettyTable: A formatted table.
+    :return: str: The table.
     """
     # maxcolumn width depends on the terminal size
     col_widths = maxcolwidths // 4
 
-    table = PrettyTable(
-        vertical_char="│",
-        horizontal_char="─",
-        junction_char="┼",
-        top_junction_char="┬",
-        bottom_junction_char="┴",
-        right_junction_char="┤",
-        left_junction_char="├",
-        top_right_junction_char="╮",
-        top_left_junction_char="╭",
-        bottom_right_junction_char="╯",
-        bottom_left_junction_char="╰",
-        hrules=HRuleStyle.ALL,
-        align="l",
-    )
-
-    table.field_names = headers
-    for txt in data:
-        # Wrap text for each cell
-        wrapped_row = [wrap_text(str(cell), col_widths) for cell in txt]
-        table.add_row(wrapped_row)
-    return table
+    # The cells below are many small lists but no reference cycles; pausing
+    # the cyclic garbage collector saves it from scanning them again and again
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        widths = [display_width(header) for header in headers]
+        rows = []
+        for row in data:
+            cells = []
+            for index, cell in enumerate(row):
+                # Wrap text for each cell
+                lines, line_widths = _wrap_lines(str(cell), col_widths)
+                cells.append((lines, line_widths))
+                widest = max(line_widths)
+                if widest > widths[index]:
+                    widths[index] = widest
+            rows.append(cells)
+
+        def rule(left, junction, right):
+            return left + junction.join(HORIZONTAL * (width + 2) for width in widths) + right
+
+        middle = rule(*MIDDLE)
+        out = [rule(*TOP), "\n", VERTICAL]
+        for header, width in zip(headers, widths):
+            out.append(f" {header}{' ' * (width - display_width(header) + 1)}{VERTICAL}")
+        out += ("\n", middle)
+        for number, cells in enumerate(rows, 1):
+            height = max(len(lines) for lines, _ in cells)
+            for y in range(height):
+                out += ("\n", VERTICAL)
+                for (lines, line_widths), width in zip(cells, widths):
+                    if y < len(lines):
+                        out.append(f" {lines[y]}{' ' * (width - line_widths[y] + 1)}{VERTICAL}")
+                    else:
+                        out.append(f"{' ' * (width + 2)}{VERTICAL}")
+            out += ("\n", rule(*BOTTOM) if number == len(rows) else middle)
+        return "".join(out)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def draw_table_pages(headers, rows, maxcolwidths=80, page_size=PAGE_SIZE):
+    """
+    Generate one formatted table per batch of rows.
+
+    Rows are consumed lazily, so only one page of rows is held in memory
+    and the first page can be printed before the rest is built.
+
+    :param headers (list): Column headers.
+    :param rows (iterable of lists): Table rows, may be a generator.
+    :param maxcolwidths (int, optional): Terminal width used to size the columns.
+    :param page_size (int, optional): Number of rows per table.
+
+    :return: generator of str: Tables of at most page_size rows.
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == page_size:
+            yield draw_table(headers, batch, maxcolwidths)
+            batch = []
+    if batch:
+        yield draw_table(headers, batch, maxcolwidths)
@@ -1,45 +1,31 @@
-from prompt_toolkit import PromptSession
-from prompt_toolkit.completion import WordCompleter
-from prompt_toolkit.history import InMemoryHistory
+# prompt_toolkit takes longer to import than the rest of the bot together,
+# so the session is only created when the first prompt is shown
+_session = None
+_completer = None
 
-# Commands for autocompletion
-commands = ['add-contact', 
-            'change-contact', 'edit-contact','edit-phone',
-            'delete-contact',
-            'phone', 
-            'add-email',
-            'show-email',
-            'edit-email',
-            'remove-email',
-            'add-birthday', 
-            'show-birthday', 
-            'add-address',
-            'show-address',
-            'edit-address',
-            'remove-address',
-            'add-note',
-            'edit-note',
-            'remove-note',
-            'show-notes',
-            'all-notes',
-            'search-notes',
-            'search-notes-text',
-            'birthdays', 
-            'all', 
-            'save',
-            'search',
-            'load',
-            'close',
-            'exit', 
-            'quit',
-            'help',
-            'hello',
-            'about',
-            ]
+def get_completer(books):
+    """
+    Args:
+        books (function): Returns the current (book, notes_book).
 
-completer = WordCompleter(commands, ignore_case=True)
+    Returns:
+        BookCompleter: Completer for the commands of the registry and
+            their arguments (contact names, note ids, tags).
+    """
+    global _completer
+    if _completer is None:
+        from completer import BookCompleter
+        _completer = BookCompleter(books)
+    return _completer
 
-# History in memory
-history = InMemoryHistory()
-
-session = PromptSession(history=history)
+def get_session():
+    """
+    Returns:
+        PromptSession: The prompt session, with the history kept in memory.
+    """
+    global _session
+    if _session is None:
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.history import InMemoryHistory
+        _session = PromptSession(history=InMemoryHistory())
+    return _session
@@ -0,0 +1,43 @@
+class Rendered:
+    """
+    Mixin caching the display strings of a contact or a note.
+
+    Every change of the entity bumps its version counter and drops the
+    strings rendered for the previous version (``changed``). ``rendered``
+    builds a string only if it was not built since the last change, so
+    showing a mostly static book again only formats the entities that
+    changed.
+
+    Subclasses declare the ``_version`` and ``_rendered`` slots and set
+    them to 0 and None; the cache is created on the first display and
+    is never pickled.
+    """
+    __slots__ = ()
+
+    def changed(self):
+        """
+        Bump the version, so that the cached strings are built again.
+        """
+        self._version += 1
+        self._rendered = None
+
+    def rendered(self, key, build):
+        """
+        Return the display string of the entity for a key, as built
+        for its current version.
+
+        Args:
+            key (str): What is rendered, e.g. "row" for a table row.
+            build (function): Called with the entity to build the value
+                when it is not cached for the current version.
+
+        Returns:
+            The cached or newly built value.
+        """
+        cache = self._rendered
+        if cache is None:
+            cache = self._rendered = {}
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = build(self)
+        return value
@@ -0,0 +1,334 @@
+import asyncio
+import hmac
+import io
+import json
+import os
+import secrets
+import signal
+import socket
+import stat
+import sys
+import threading
+from contextlib import contextmanager
+from commands import find_command
+from errors import ErrorMessage
+from pretty_table2 import strip_colors
+from client import SOCKET_FILE, HOST, TOKEN_FILE
+
+THREADS = 4  # commands running at the same time
+PIPELINE_DEPTH = 64  # requests of a connection read ahead of their responses
+MAX_REQUEST = 1024 * 1024  # bytes in a request line
+
+
+class ReadWriteLock:
+    """
+    Lock of the books while the server runs: shared by the commands that
+    only read them, held alone by the ones that change them and by the
+    autosaver. Once a writer waits, new readers wait behind it, so a
+    stream of searches never starves a change.
+
+    ``with lock:`` takes it alone, like the RLock of the Autosaver;
+    ``with lock.shared():`` takes it for reading.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    def __enter__(self):
+        with self._condition:
+            self._writers_waiting += 1
+            self._condition.wait_for(lambda: not self._writing and not self._readers)
+            self._writers_waiting -= 1
+            self._writing = True
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._writing and not self._writers_waiting)
+            self._readers += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+
+class ThreadOutput:
+    """
+    Stands in for ``sys.stdout`` while the server runs, so that what a
+    command prints is sent to its client: writes go to the buffer of the
+    thread running the command, or to the real stream outside commands.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextmanager
+    def capture(self):
+        """
+        Collect what the current thread prints.
+
+        Yields:
+            io.StringIO: The printed text.
+        """
+        self._local.buffer = buffer = io.StringIO()
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def response(request_id, ok, output):
+    return (json.dumps({"id": request_id, "ok": ok, "output": output}, ensure_ascii=False) + "\n").encode("utf-8")
+
+def parse_request(line):
+    """
+    Read a request line of the protocol (see client.BookClient).
+
+    Returns:
+        tuple: (id, command, args, color, token).
+
+    Raises:
+        ValueError: If the line is not a valid request.
+    """
+    request = json.loads(line)
+    if not isinstance(request, dict) or not isinstance(request.get("command"), str):
+        raise ValueError('a request is an object with a "command" string')
+    args = request.get("args", [])
+    if not isinstance(args, list):
+        raise ValueError('"args" must be a list')
+    token = request.get("token")
+    return (request.get("id"), request["command"].strip().lower(), [str(arg) for arg in args], bool(request.get("color")),
+            token if isinstance(token, str) else None)
+
+def write_token(filename=TOKEN_FILE):
+    """
+    Make a random token for a TCP server and write it to a file that only
+    its owner can read, where ``client.read_token`` finds it.
+
+    Returns:
+        str: The token.
+    """
+    token = secrets.token_urlsafe(32)
+    if os.path.exists(filename):
+        os.remove(filename)  # the mode is only set when the file is created
+    with os.fdopen(os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    return token
+
+def _done(value):
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(value)
+    return future
+
+def _check_socket(path):
+    # A socket file nobody listens on is left over from a server that was killed
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket.")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+            return
+    raise OSError(f"A termibook server is already running on {path}.")
+
+
+class BookServer:
+    """
+    Serves the commands of the assistant to local clients, one JSON
+    request per line (see client.BookClient for the protocol), keeping
+    the books loaded between requests.
+
+    Commands run on the threads of ``executor``. Commands that only read
+    the books share ``lock``, commands that change them (``Command.writes``)
+    hold it alone, so searches from many clients run side by side while
+    changes are applied one at a time.
+
+    A client may send requests without waiting for the responses. The
+    read-only requests of a connection run concurrently; a change waits
+    for the requests sent before it, and the requests sent after it wait
+    for it, so each client sees its own changes. Responses are written
+    in request order. At most ``PIPELINE_DEPTH`` requests of a connection
+    are in flight; reading waits for the oldest responses after that.
+
+    The Unix socket is only accessible to the owner of the server. A TCP
+    port is open to every local user, so a ``token`` is required there:
+    a request without it gets an error and the connection is closed.
+
+    Attributes:
+        execute (function): Runs a command: (command, args) -> result, as
+            returned by ``main.dispatch``.
+        executor (concurrent.futures.Executor): Threads running the commands.
+        lock (ReadWriteLock): Lock of the books.
+        token (str): Token the requests must carry, or None.
+    """
+    def __init__(self, execute, executor, lock, token=None):
+        self.execute = execute
+        self.executor = executor
+        self.lock = lock
+        self.token = token
+        self.output = None
+        self._stopped = None  # asyncio.Event set to stop serving
+        self._loop = None
+        self._connections = {}  # key: connection task, value: its StreamReader
+
+    def _call(self, command, args, writes):
+        # Runs on an executor thread
+        with self.output.capture() as printed, (self.lock if writes else self.lock.shared()):
+            result = self.execute(command, args)
+        if result is not None:
+            print(result, file=printed)
+        return not isinstance(result, ErrorMessage), printed.getvalue().rstrip("\n")
+
+    async def _run(self, request_id, command, args, writes, color):
+        try:
+            ok, output = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._call, command, args, writes)
+        except Exception as e:
+            print(f"{command}: {e!r}", file=sys.stderr)
+            ok, output = False, f"Error occurred: {e}"
+        return response(request_id, ok, output if color else strip_colors(output))
+
+    async def _send(self, responses, writer):
+        # Write the responses of a connection in request order
+        connected = True
+        while (pending := await responses.get()) is not None:
+            data = await pending
+            if connected:
+                writer.write(data)
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    connected = False  # keep draining the queue, the commands still run
+
+    async def _connection(self, reader, writer):
+        self._connections[asyncio.current_task()] = reader
+        responses = asyncio.Queue(PIPELINE_DEPTH)
+        sender = asyncio.create_task(self._send(responses, writer))
+        in_flight = set()  # read-only requests of this connection still running
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await responses.put(_done(response(None, False, "Request too long.")))
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request_id, command, args, color, token = parse_request(line)
+                except ValueError as e:
+                    await responses.put(_done(response(None, False, f"Invalid request: {e}")))
+                    continue
+                if self.token is not None and not hmac.compare_digest(
+                        (token or "").encode("utf-8"), self.token.encode("utf-8")):
+                    await responses.put(_done(response(request_id, False, "Not authorized: the token is missing or wrong.")))
+                    break
+                cmd = find_command(command)
+                writes = cmd is not None and cmd.writes
+                if writes and in_flight:
+                    await asyncio.wait(in_flight)
+                task = asyncio.create_task(self._run(request_id, command, args, writes, color))
+                await responses.put(task)
+                if writes:
+                    await asyncio.wait([task])
+                else:
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+        finally:
+            await responses.put(None)
+            await sender
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            del self._connections[asyncio.current_task()]
+
+    async def serve(self, path=SOCKET_FILE, port=None, host=HOST):
+        """
+        Serve until SIGINT or SIGTERM, then finish the requests already
+        received and return.
+
+        Args:
+            path (str): Unix socket to listen on, used when no port is given.
+            port (int, optional): TCP port to listen on.
+            host (str): TCP address to listen on.
+
+        Raises:
+            OSError: If another server is running on the socket.
+            ValueError: If a TCP port is given without a token.
+        """
+        if port is not None and not self.token:
+            raise ValueError("A TCP server needs a token.")
+        if port is None:
+            _check_socket(path)
+            server = await asyncio.start_unix_server(self._connection, path, limit=MAX_REQUEST)
+            os.chmod(path, 0o600)  # the book is only for its owner
+            address = path
+        else:
+            server = await asyncio.start_server(self._connection, host, port, limit=MAX_REQUEST)
+            address = f"{host}:{port}"
+        self._stopped = stopped = asyncio.Event()
+        self._loop = loop = asyncio.get_running_loop()
+        try:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stopped.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C interrupts asyncio.run instead; other threads: stop()
+        self.output = ThreadOutput(sys.stdout)
+        sys.stdout = self.output
+        try:
+            print(f"Serving on {address}. Press Ctrl+C to stop.", file=self.output.stream, flush=True)
+            await stopped.wait()
+            server.close()
+            await server.wait_closed()
+            # Let the open connections finish the requests they already sent
+            for reader in self._connections.values():
+                reader.feed_eof()
+            await asyncio.gather(*self._connections)
+        finally:
+            sys.stdout = self.output.stream
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(signum)
+                except NotImplementedError:
+                    pass
+            if port is None and os.path.exists(path):
+                os.remove(path)
+
+    def stop(self):
+        """
+        Stop serving, as SIGINT does. May be called from any thread.
+        """
+        self._loop.call_soon_threadsafe(self._stopped.set)
@@ -0,0 +1,177 @@
+import heapq
+import multiprocessing
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from addressbook import AddressBook
+from notes import NotesBook
+
+# The shard searched by a worker process, loaded once when it starts
+_book = None
+_notes_book = None
+
+def shard_of(name, shards):
+    """
+    Shard of a contact and its notes; the same in every process.
+    """
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+def _load_shard(records, notes):
+    global _book, _notes_book
+    _book = AddressBook()
+    _book.data.update(records)
+    _book.rebuild_index()
+    _notes_book = NotesBook()
+    _notes_book.data.update(notes)
+    _notes_book.rebuild_index()
+
+def _note_position(contact, note):
+    # Notes are sent back by position, the parent holds the same lists
+    return _notes_book.data[contact].index(note)
+
+def _search(keyword):
+    return [(record.name.value, fields) for record, fields in _book.search(keyword)]
+
+def _search_by_tag(tag):
+    return [(contact, note.uid) for contact, note in _notes_book.search_by_tag(tag)]
+
+def _statistics(keyword):
+    return _notes_book._text_index().statistics(keyword)
+
+def _search_by_text(keyword, limit, statistics):
+    notes = _notes_book._notes
+    hits = _notes_book._text_index().search(keyword, limit, statistics)
+    return [(score, contact, _note_position(contact, notes[uid][1])) for (contact, uid), score in hits]
+
+_QUERIES = {
+    "search": _search,
+    "tag": _search_by_tag,
+    "statistics": _statistics,
+    "text": _search_by_text,
+}
+
+def _query(changes, name, args):
+    # Bring the shard up to date, then run the query on it
+    for (kind, key, *_), value in changes:
+        if kind == "record":
+            _book.restore(key, value)
+        elif kind == "note":
+            _notes_book.restore_note(key, *value)
+        else:
+            _notes_book.restore(key, value)
+    return _QUERIES[name](*args)
+
+def _ready():
+    return True
+
+
+class ShardedSearch:
+    """
+    Contact and note searches run in parallel by worker processes.
+
+    Contacts and their notes are split into shards by contact name, one
+    shard per worker. Each worker is a single-process ProcessPoolExecutor
+    that receives its shard once, when it starts, and keeps it with its
+    own indexes. A query is sent to every worker and the partial results
+    are merged in the order the books return them: contacts by name, tag
+    matches in the order of the tag index of the notes book, text matches
+    by BM25 score computed from the statistics of the whole collection.
+
+    Changes reach the workers through the books' journal: the searcher
+    takes the place of the journal, passes every change on to it and
+    queues it for the shard of the contact. Queued changes are sent with
+    the next query and applied like a journal replay, only the latest
+    state of each contact travels.
+
+    Attributes:
+        book (AddressBook): The address book, or a MappedAddressBook.
+        notes_book (NotesBook): The notes book.
+        workers (int): Number of shards and worker processes.
+        journal (Journal): The journal the books wrote to, or None.
+    """
+    def __init__(self, book, notes_book, workers):
+        self.book = book
+        self.notes_book = notes_book
+        self.workers = workers
+        records = [{} for _ in range(workers)]
+        notes = [{} for _ in range(workers)]
+        for name, record in book.data.items():
+            records[shard_of(name, workers)][name] = record
+        for contact, contact_notes in notes_book.data.items():
+            notes[shard_of(contact, workers)][contact] = contact_notes
+        self._pending = [{} for _ in range(workers)]  # key: (kind, contact[, note uid]), value: latest state
+        self._pending_lock = threading.Lock()  # queries of the server run on several threads
+        # Workers must not inherit the autosave thread or the prompt state
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._executors = [
+            ProcessPoolExecutor(1, mp_context=context, initializer=_load_shard, initargs=(records[shard], notes[shard]))
+            for shard in range(workers)
+        ]
+        for future in [executor.submit(_ready) for executor in self._executors]:
+            future.result()
+        self.journal = book.journal
+        book.journal = notes_book.journal = self
+
+    def append(self, kind, key, value):
+        """
+        Journal interface: called by the books after every change.
+        """
+        if self.journal is not None:
+            self.journal.append(kind, key, value)
+        change = (kind, key, value[0]) if kind == "note" else (kind, key)
+        with self._pending_lock:
+            self._pending[shard_of(key, self.workers)][change] = value
+
+    def _run(self, name, *args):
+        futures = []
+        # Submitted under the lock too: a query taking no changes must not
+        # reach a worker before the query that took them
+        with self._pending_lock:
+            for shard, executor in enumerate(self._executors):
+                changes = list(self._pending[shard].items())
+                self._pending[shard] = {}
+                futures.append(executor.submit(_query, changes, name, args))
+        return [future.result() for future in futures]
+
+    def search(self, keyword):
+        """
+        Same as ``AddressBook.search``.
+        """
+        merged = heapq.merge(*self._run("search", keyword), key=lambda hit: hit[0].casefold())
+        return [(self.book.data[name], fields) for name, fields in merged]
+
+    def search_by_tag(self, tag):
+        """
+        Same as ``NotesBook.search_by_tag``.
+        """
+        hits = [hit for shard_hits in self._run("tag", tag) for hit in shard_hits]
+        order = {entry: position for position, entry in enumerate(self.notes_book._tags.get(tag.lower(), ()))}
+        hits.sort(key=lambda hit: order.get(hit, len(order)))
+        return [self.notes_book._notes[uid] for _, uid in hits]
+
+    def search_by_text(self, keyword, limit=None):
+        """
+        Same as ``NotesBook.search_by_text``.
+        """
+        doc_count = total_len = 0
+        frequencies = {}
+        for shard_count, shard_len, shard_frequencies in self._run("statistics", keyword):
+            doc_count += shard_count
+            total_len += shard_len
+            for term, frequency in shard_frequencies.items():
+                frequencies[term] = frequencies.get(term, 0) + frequency
+        if not doc_count:
+            return []
+        shard_hits = self._run("text", keyword, limit, (doc_count, total_len, frequencies))
+        merged = islice(heapq.merge(*shard_hits, key=lambda hit: -hit[0]), limit)
+        return [(contact, self.notes_book.get_notes(contact)[position]) for _, contact, position in merged]
+
+    def close(self):
+        """
+        Stop the workers and give the books their journal back.
+        """
+        self.book.journal = self.notes_book.journal = self.journal
+        for executor in self._executors:
+            executor.shutdown()
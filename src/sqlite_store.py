@@ -0,0 +1,751 @@
+import sqlite3
+from collections.abc import Mapping
+from contextlib import contextmanager
+from addressbook import (
+    Record, Phone, Email, Address, Birthday, load_data, upcoming_days, congratulation_date,
+    phone_prefix_range
+)
+from notes import Note
+import notes
+from errors import NoteNotFoundError, AmbiguousNoteIdError
+from text_index import parse_query, prefix_end, NameIndex, suggestion_distance
+
+DB_FILE = "termibook.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    name_key TEXT NOT NULL UNIQUE,  -- casefolded name
+    email TEXT,
+    address TEXT,
+    birthday TEXT,                  -- DD.MM.YYYY
+    birthday_md TEXT                -- MM-DD
+);
+CREATE INDEX IF NOT EXISTS contacts_email ON contacts(email);
+CREATE INDEX IF NOT EXISTS contacts_birthday_md ON contacts(birthday_md);
+
+CREATE TABLE IF NOT EXISTS phones (
+    contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    phone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones(phone);
+CREATE INDEX IF NOT EXISTS phones_contact ON phones(contact_id, position);
+
+CREATE TABLE IF NOT EXISTS notes (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    contact TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_contact ON notes(contact, seq);
+
+CREATE TABLE IF NOT EXISTS note_tags (
+    note_id TEXT NOT NULL REFERENCES notes(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    tag_key TEXT NOT NULL           -- lowercased tag
+);
+CREATE INDEX IF NOT EXISTS note_tags_key ON note_tags(tag_key);
+CREATE INDEX IF NOT EXISTS note_tags_note ON note_tags(note_id, position);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,           -- "migrated": the pickled books were copied in
+    value TEXT
+);
+"""
+
+# Full-text index over note text, kept in sync with the notes table by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    text, content='notes', content_rowid='seq', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, text) VALUES (new.seq, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, text) VALUES ('delete', old.seq, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF text ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, text) VALUES ('delete', old.seq, old.text);
+    INSERT INTO notes_fts(rowid, text) VALUES (new.seq, new.text);
+END;
+"""
+
+# Lowercased contact fields for the search command, kept in sync by SQLiteAddressBook
+# (rowid: contacts.id). Trigrams make any substring of 3 characters or more an index lookup.
+CONTACTS_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+    name, phones, email, address, tokenize='trigram'
+);
+"""
+SEARCH_FIELDS = ("name", "phones", "email", "address")
+
+# Phones of a contact in the order they were added, separated by spaces
+_CONTACT_COLUMNS = """
+    name, email, address, birthday,
+    (SELECT group_concat(phone, ' ') FROM
+        (SELECT phone FROM phones WHERE contact_id = contacts.id ORDER BY position))
+"""
+
+def connect(filename=DB_FILE):
+    """
+    Open (and create if needed) the SQLite database.
+
+    Args:
+        filename (str): Database file name. Defaults to "termibook.db".
+
+    Returns:
+        sqlite3.Connection: Open connection with the schema in place.
+    """
+    conn = sqlite3.connect(filename)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    # SQLite's lower() only handles ASCII, so use Python's for note text
+    conn.create_function("py_lower", 1, lambda s: s.lower() if s else s, deterministic=True)
+    conn.executescript(SCHEMA)
+    if not has_table(conn, "contacts_fts"):
+        try:
+            conn.executescript(CONTACTS_FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            pass  # SQLite without FTS5 or older than 3.34: contact search falls back to a scan
+        else:
+            # Index the contacts written before the search table existed
+            with conn:
+                for row in conn.execute(f"SELECT id, {_CONTACT_COLUMNS} FROM contacts").fetchall():
+                    _index_contact(conn, row[0], row[1], (row[5] or "").split(" "), row[2], row[3])
+    if not has_table(conn, "notes_fts"):
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: text search falls back to a scan
+            return conn
+        # Index the notes written before the full-text table existed
+        with conn:
+            conn.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+    return conn
+
+def _index_contact(conn, contact_id, name, phones, email, address):
+    conn.execute("DELETE FROM contacts_fts WHERE rowid = ?", (contact_id,))
+    conn.execute(
+        "INSERT INTO contacts_fts (rowid, name, phones, email, address) VALUES (?, ?, ?, ?, ?)",
+        # Lowercased by Python, the same as AddressBook.search
+        (contact_id, name.lower(), "\n".join(phones), (email or "").lower(), (address or "").lower()),
+    )
+
+def has_table(conn, name):
+    """
+    Check whether a table exists in the database.
+
+    Args:
+        conn (sqlite3.Connection): Open connection.
+        name (str): Table name.
+
+    Returns:
+        bool: True if the table exists.
+    """
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)
+    ).fetchone() is not None
+
+def fts_query(query):
+    """
+    Translate a search query (see text_index.parse_query) to FTS5 syntax.
+
+    Args:
+        query (str): The query string.
+
+    Returns:
+        str: FTS5 match expression, or None if the query has no words.
+    """
+    groups = []
+    for group in parse_query(query):
+        terms = [f'"{term}"' + ("*" if is_prefix else "") for term, is_prefix in group]
+        groups.append("(" + " AND ".join(terms) + ")")
+    return " OR ".join(groups) or None
+
+def open_books(filename=DB_FILE):
+    """
+    Open the SQLite-backed address book and notes book.
+
+    Until a migration has completed, the existing addressbook.pkl /
+    notesbook.pkl are migrated into the database, so a migration that
+    failed is tried again on the next start.
+
+    Args:
+        filename (str): Database file name. Defaults to "termibook.db".
+
+    Returns:
+        tuple: (SQLiteAddressBook, SQLiteNotesBook) sharing one connection.
+
+    Raises:
+        SnapshotError: If the pickled books cannot be read.
+    """
+    conn = connect(filename)
+    book = SQLiteAddressBook(conn)
+    notes_book = SQLiteNotesBook(conn)
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone() is None:
+        migrate(book, notes_book)
+    return book, notes_book
+
+def migrate(book, notes_book, book_file="addressbook.pkl", notes_file="notesbook.pkl"):
+    """
+    Copy the pickled address book and notes book into the database and
+    mark it as migrated, in one transaction.
+
+    A database that already holds contacts or notes (written before the
+    mark existed) is only marked.
+
+    Args:
+        book (SQLiteAddressBook): Destination address book.
+        notes_book (SQLiteNotesBook): Destination notes book.
+        book_file (str): Pickled address book. Defaults to "addressbook.pkl".
+        notes_file (str): Pickled notes book. Defaults to "notesbook.pkl".
+
+    Returns:
+        tuple: Number of migrated contacts and notes.
+    """
+    contacts_count = notes_count = 0
+    conn = book.conn
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM contacts) OR EXISTS (SELECT 1 FROM notes)").fetchone()[0]:
+        with book.transaction():
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', 'existing data')")
+        return contacts_count, notes_count
+    old_book = load_data(book_file)
+    old_notes = notes.load_data(notes_file)
+    with book.transaction():
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', ?)", (book_file,))
+        for record in old_book.data.values():
+            book._write(record)
+            contacts_count += 1
+        for contact, notes_list in old_notes.data.items():
+            for note in notes_list:
+                notes_book._insert(contact, note)
+                notes_count += 1
+    return contacts_count, notes_count
+
+class _ContactsView(Mapping):
+    """
+    Read-only ``data`` mapping of a SQLiteAddressBook (name -> Record),
+    so code written for AddressBook.data keeps working.
+    """
+    def __init__(self, book):
+        self.book = book
+
+    def __getitem__(self, name):
+        row = self.book.conn.execute(
+            f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self.book._record(row)
+
+    def __iter__(self):
+        for (name,) in self.book.conn.execute("SELECT name FROM contacts ORDER BY id"):
+            yield name
+
+    def __len__(self):
+        return self.book.conn.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    def items(self):
+        for row in self.book.conn.execute(f"SELECT {_CONTACT_COLUMNS} FROM contacts ORDER BY id"):
+            yield row[0], self.book._record(row)
+
+    def values(self):
+        for _, record in self.items():
+            yield record
+
+
+class _SQLiteBook:
+    """
+    Common base of the SQLite-backed books.
+
+    Attributes:
+        conn (sqlite3.Connection): Open database connection.
+        autocommit (bool): Commit after every change. Batch runs turn it
+            off and commit once at the end.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.journal = None
+        self.autocommit = True
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group the statements of one change; commit it if autocommit is on.
+        """
+        try:
+            yield
+        except Exception:
+            if self.autocommit:
+                self.conn.rollback()
+            raise
+        if self.autocommit:
+            self.conn.commit()
+
+
+class SQLiteAddressBook(_SQLiteBook):
+    """
+    Address book stored in a SQLite database.
+
+    Implements the same interface as AddressBook. Records returned by
+    ``find`` are detached copies of the stored rows; every change made
+    through their methods is written back to the database.
+    """
+    def __init__(self, conn):
+        super().__init__(conn)
+        self._names = None  # NameIndex of name_key, for suggestions; built when first needed
+        self.fts = has_table(conn, "contacts_fts")
+
+    @property
+    def data(self):
+        return _ContactsView(self)
+
+    def _record(self, row):
+        name, email, address, birthday, phones = row
+        record = Record(name)
+        if phones:
+            record.phones = [Phone(phone) for phone in phones.split(" ")]
+        if email:
+            record.email = Email(email)
+        if address:
+            record.address = Address(address)
+        if birthday:
+            record.birthday = Birthday(birthday)
+        record._book = self
+        return record
+
+    def _write(self, record):
+        birthday = birthday_md = None
+        if record.birthday:
+            birthday = record.birthday.value.strftime("%d.%m.%Y")
+            birthday_md = record.birthday.value.strftime("%m-%d")
+        name = record.name.value
+        self.conn.execute(
+            """INSERT INTO contacts (name, name_key, email, address, birthday, birthday_md)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(name) DO UPDATE SET
+                   email = excluded.email, address = excluded.address,
+                   birthday = excluded.birthday, birthday_md = excluded.birthday_md""",
+            (name, name.casefold(),
+             record.email.value if record.email else None,
+             record.address.value if record.address else None,
+             birthday, birthday_md),
+        )
+        contact_id = self.conn.execute("SELECT id FROM contacts WHERE name = ?", (name,)).fetchone()[0]
+        self.conn.execute("DELETE FROM phones WHERE contact_id = ?", (contact_id,))
+        self.conn.executemany(
+            "INSERT INTO phones (contact_id, position, phone) VALUES (?, ?, ?)",
+            [(contact_id, position, p.value) for position, p in enumerate(record.phones)],
+        )
+        if self.fts:
+            _index_contact(self.conn, contact_id, name, [p.value for p in record.phones],
+                           record.email.value if record.email else None,
+                           record.address.value if record.address else None)
+
+    def rebuild_index(self):
+        """
+        Nothing to rebuild, the database maintains its own indexes.
+        """
+
+    def record_changed(self, record):
+        """
+        Called by a record after it has been changed.
+
+        Args:
+            record (Record): The changed record.
+        """
+        with self.transaction():
+            self._write(record)
+
+    def add_record(self, record: Record):
+        if not isinstance(record, Record):
+            raise TypeError("Only Record instances can be added.")
+        record._book = self
+        self.record_changed(record)
+        if self._names is not None:
+            self._names.add(record.name.value.casefold())
+
+    def find(self, name):
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Name must be a non-empty string.")
+        row = self.conn.execute(
+            f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE name_key = ?",
+            (name.strip().casefold(),),
+        ).fetchone()
+        return self._record(row) if row else None
+
+    def delete(self, name):
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Name must be a non-empty string.")
+        name = name.strip()
+        with self.transaction():
+            if self.fts:
+                self.conn.execute("DELETE FROM contacts_fts WHERE rowid = (SELECT id FROM contacts WHERE name = ?)",
+                                  (name,))
+            cursor = self.conn.execute("DELETE FROM contacts WHERE name = ?", (name,))
+        if cursor.rowcount == 0:
+            raise KeyError(f"Contact '{name}' not found.")
+        if self._names is not None:
+            self._names.remove(name.casefold())
+
+    def complete_names(self, prefix, limit=None):
+        """
+        Find the contacts whose name starts with a prefix, e.g. to complete it.
+
+        Args:
+            prefix (str): Name prefix (case-insensitive).
+            limit (int, optional): Maximum number of names.
+
+        Returns:
+            list: Contact names, in case-insensitive order.
+        """
+        # A range scan of the unique index on name_key
+        prefix = prefix.casefold()
+        query, params = "SELECT name FROM contacts", []
+        if prefix:
+            query += " WHERE name_key >= ? AND name_key < ?"
+            params += [prefix, prefix_end(prefix)]
+        query += " ORDER BY name_key LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [name for (name,) in self.conn.execute(query, params)]
+
+    def similar_names(self, name, limit=None):
+        """
+        Find the contacts whose name is a typo or two away from a name,
+        to suggest them when it is not found.
+
+        Args:
+            name (str): The name that was typed.
+            limit (int, optional): Maximum number of names.
+
+        Returns:
+            list: Contact names, closest first.
+        """
+        if self._names is None:
+            self._names = NameIndex(key for (key,) in self.conn.execute("SELECT name_key FROM contacts"))
+        key = name.strip().casefold()
+        found = self._names.similar(key, suggestion_distance(key))[:limit]
+        return [self.conn.execute("SELECT name FROM contacts WHERE name_key = ?", (found_key,)).fetchone()[0]
+                for _, found_key in found]
+
+    def search(self, keyword):
+        """
+        Find contacts whose name, phones, email or address contain the keyword.
+
+        Args:
+            keyword (str): Substring to look for (case-insensitive).
+
+        Returns:
+            list: (Record, list of matched field names) pairs, ordered by name.
+        """
+        keyword = keyword.lower()
+        if not self.fts:
+            return self._scan(keyword)
+        if len(keyword) >= 3:
+            # A phrase of the keyword's trigrams: the rows containing it as a substring
+            where, param = "contacts_fts MATCH ?", '"' + keyword.replace('"', '""') + '"'
+        else:
+            # Too short for a trigram: scan the lowercased copies, without a call to Python per row
+            where = " OR ".join(f"instr({field}, :kw) > 0" for field in SEARCH_FIELDS).replace(":kw", "?1")
+            param = keyword
+        rows = self.conn.execute(
+            f"""SELECT {_CONTACT_COLUMNS} FROM contacts
+                WHERE id IN (SELECT rowid FROM contacts_fts WHERE {where}) ORDER BY name_key""",
+            (param,),
+        ).fetchall()
+        results = []
+        for row in rows:
+            record = self._record(row)
+            fields = (record.name.value, "\n".join(p.value for p in record.phones),
+                      record.email.value if record.email else "", record.address.value if record.address else "")
+            results.append((record, [field for field, text in zip(("name", "phone", "email", "address"), fields)
+                                     if keyword in text.lower()]))
+        return results
+
+    def _scan(self, keyword):
+        # Without the search table: every row is lowercased by Python
+        rows = self.conn.execute(
+            f"""SELECT {_CONTACT_COLUMNS},
+                   instr(py_lower(name), :kw) > 0,
+                   EXISTS (SELECT 1 FROM phones WHERE contact_id = contacts.id AND instr(phone, :kw) > 0),
+                   instr(py_lower(email), :kw) > 0,
+                   instr(py_lower(address), :kw) > 0
+               FROM contacts WHERE
+                   instr(py_lower(name), :kw) > 0
+                   OR instr(py_lower(email), :kw) > 0
+                   OR instr(py_lower(address), :kw) > 0
+                   OR id IN (SELECT contact_id FROM phones WHERE instr(phone, :kw) > 0)
+               ORDER BY name_key""",
+            {"kw": keyword},
+        ).fetchall()
+        return [(self._record(row[:5]),
+                 [field for field, hit in zip(("name", "phone", "email", "address"), row[5:]) if hit])
+                for row in rows]
+
+    def _phone_owners(self, where, params):
+        rows = self.conn.execute(
+            f"""SELECT phones.phone, {_CONTACT_COLUMNS} FROM phones
+                JOIN contacts ON contacts.id = phones.contact_id
+                WHERE {where} ORDER BY phones.phone, contacts.id""",
+            params,
+        )
+        owners = {}
+        for row in rows:
+            records = owners.setdefault(row[0], [])
+            if not records or records[-1].name.value != row[1]:
+                records.append(self._record(row[1:]))
+        return list(owners.items())
+
+    def find_by_phone(self, phone):
+        """
+        Find the contacts that have a phone number.
+
+        Args:
+            phone (str): Phone number, 10 digits.
+
+        Returns:
+            list: Records owning the number.
+        """
+        owners = self._phone_owners("phones.phone = ?", (Phone(phone).value,))
+        return owners[0][1] if owners else []
+
+    def phones_with_prefix(self, prefix):
+        """
+        Find the phone numbers starting with a prefix, e.g. an area code.
+
+        Args:
+            prefix (str): Up to 10 digits.
+
+        Returns:
+            list: (phone, list of owner Records) pairs sorted by phone.
+        """
+        low, high = phone_prefix_range(prefix)
+        return self._phone_owners("phones.phone >= ? AND phones.phone < ?",
+                                  (f"{low:010d}", f"{high:010d}" if high < 10**10 else ":"))
+
+    def duplicate_phones(self):
+        """
+        Find the phone numbers shared by several contacts.
+
+        Returns:
+            list: (phone, list of owner Records) pairs sorted by phone.
+        """
+        return self._phone_owners(
+            """phones.phone IN (SELECT phone FROM phones GROUP BY phone
+                                HAVING count(DISTINCT contact_id) > 1)""", ())
+
+    def get_upcoming_birthday(self, period_days=7):
+        """
+        Find birthdays from today up to ``period_days`` days ahead.
+
+        Args:
+            period_days (int): Number of days after today to include.
+
+        Returns:
+            list: (Record, birthday date, congratulation date) tuples sorted
+            by birthday date; weekend birthdays are congratulated on Monday.
+        """
+        day_of = {}  # key: MM-DD, value: date in the window
+        for day, keys in upcoming_days(period_days):
+            for month, day_of_month in keys:
+                day_of[f"{month:02d}-{day_of_month:02d}"] = day
+        if not day_of:
+            return []
+        placeholders = ", ".join("?" * len(day_of))
+        rows = self.conn.execute(
+            f"SELECT {_CONTACT_COLUMNS}, birthday_md FROM contacts WHERE birthday_md IN ({placeholders}) ORDER BY id",
+            list(day_of),
+        )
+        upcoming = [(self._record(row[:5]), day_of[row[5]], congratulation_date(day_of[row[5]])) for row in rows]
+        upcoming.sort(key=lambda item: item[1])
+        return upcoming
+
+    def save(self, args):
+        # Every change is committed as soon as it is made
+        self.conn.commit()
+
+    def load(self, args):
+        return self
+
+    def close(self):
+        self.conn.close()
+
+
+class SQLiteNotesBook(_SQLiteBook):
+    """
+    Notes book stored in a SQLite database.
+
+    Implements the same interface as NotesBook. Tags are kept in their
+    own indexed table, so tag searches are index lookups, and note text
+    is searched through an FTS5 full-text index ranked by BM25.
+    """
+    def __init__(self, conn):
+        super().__init__(conn)
+        self.fts = has_table(conn, "notes_fts")
+
+    @property
+    def data(self):
+        return self.get_all_notes()
+
+    def _note(self, note_id, text):
+        note = Note(text, [tag for (tag,) in self.conn.execute(
+            "SELECT tag FROM note_tags WHERE note_id = ? ORDER BY position", (note_id,))])
+        note.id = note_id
+        return note
+
+    def _insert(self, contact, note):
+        self.conn.execute(
+            "INSERT INTO notes (id, contact, text) VALUES (?, ?, ?)",
+            (note.id, contact, note.text),
+        )
+        self._write_tags(note.id, note.tags)
+
+    def _write_tags(self, note_id, tags):
+        self.conn.execute("DELETE FROM note_tags WHERE note_id = ?", (note_id,))
+        self.conn.executemany(
+            "INSERT INTO note_tags (note_id, position, tag, tag_key) VALUES (?, ?, ?, ?)",
+            [(note_id, position, tag, tag.lower()) for position, tag in enumerate(tags)],
+        )
+
+    def _find_id(self, note_id, contact=None):
+        # Note ids are lowercase hex and dashes, all of which sort before "~",
+        # so the prefix is a range scan of the unique index on id
+        note_id = note_id.lower()
+        query = "SELECT id FROM notes WHERE id >= ? AND id < ?"
+        params = [note_id, note_id + "~"]
+        if contact is not None:
+            query += " AND contact = ?"
+            params.append(contact)
+        ids = [row_id for (row_id,) in self.conn.execute(query + " LIMIT 2", params)]
+        if not ids:
+            raise NoteNotFoundError(f"Note '{note_id}' not found.")
+        if len(ids) > 1:
+            raise AmbiguousNoteIdError(f"Note id '{note_id}' matches several notes, please type more of it.")
+        return ids[0]
+
+    def complete_ids(self, prefix, limit=None):
+        """
+        Find the notes whose id starts with a prefix, e.g. to complete it.
+
+        Returns:
+            list: Ids shortened to 8 characters, or whole ids if the prefix
+                is longer; in sorted order.
+        """
+        prefix = prefix.lower()
+        ids = {}
+        for (note_id,) in self.conn.execute(
+                "SELECT id FROM notes WHERE id >= ? AND id < ? ORDER BY id", (prefix, prefix + "~")):
+            ids[note_id if len(prefix) >= 8 else note_id[:8]] = None
+            if len(ids) == limit:
+                break
+        return list(ids)
+
+    def complete_tags(self, prefix, limit=None):
+        """
+        Find the tags starting with a prefix, e.g. to complete it.
+
+        Returns:
+            list: Lowercased tags in sorted order.
+        """
+        prefix = prefix.lower()
+        query, params = "SELECT DISTINCT tag_key FROM note_tags", []
+        if prefix:
+            query += " WHERE tag_key >= ? AND tag_key < ?"
+            params += [prefix, prefix_end(prefix)]
+        query += " ORDER BY tag_key LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [tag for (tag,) in self.conn.execute(query, params)]
+
+    def find_note(self, note_id, contact=None):
+        note_id = self._find_id(note_id, contact)
+        contact, text = self.conn.execute("SELECT contact, text FROM notes WHERE id = ?", (note_id,)).fetchone()
+        return contact, self._note(note_id, text)
+
+    def add_note(self, contact, note):
+        with self.transaction():
+            self._insert(contact, note)
+
+    def edit_note(self, note_id, new_text, new_tags, contact=None):
+        note_id = self._find_id(note_id, contact)
+        with self.transaction():
+            self.conn.execute("UPDATE notes SET text = ? WHERE id = ?", (new_text, note_id))
+            self._write_tags(note_id, new_tags)
+
+    def delete_note(self, note_id, contact=None):
+        note_id = self._find_id(note_id, contact)
+        with self.transaction():
+            self.conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+
+    def search_by_tag(self, tag):
+        rows = self.conn.execute(
+            """SELECT DISTINCT notes.seq, notes.contact, notes.id, notes.text
+               FROM note_tags JOIN notes ON notes.id = note_tags.note_id
+               WHERE note_tags.tag_key = ? ORDER BY notes.seq""",
+            (tag.lower(),),
+        ).fetchall()
+        return [(contact, self._note(note_id, text)) for _, contact, note_id, text in rows]
+
+    def tag_counts(self):
+        """
+        Count how many notes carry each tag.
+
+        Returns:
+            list: (tag, count) pairs, most used tags first.
+        """
+        return self.conn.execute(
+            """SELECT tag_key, count(DISTINCT note_id) AS uses FROM note_tags
+               GROUP BY tag_key ORDER BY uses DESC, tag_key"""
+        ).fetchall()
+
+    def search_by_text(self, keyword, limit=None):
+        """
+        Same as ``NotesBook.search_by_text``, through the FTS5 index ranked
+        by BM25. Only SQLite builds without FTS5 scan the notes instead.
+        """
+        if not self.fts:
+            rows = self.conn.execute(
+                "SELECT contact, id, text FROM notes WHERE instr(py_lower(text), ?) > 0 ORDER BY seq LIMIT ?",
+                (keyword.lower(), -1 if limit is None else limit),
+            ).fetchall()
+            return [(contact, self._note(note_id, text)) for contact, note_id, text in rows]
+        match = fts_query(keyword)
+        if match is None:
+            return []
+        rows = self.conn.execute(
+            """SELECT notes.contact, notes.id, notes.text
+               FROM notes_fts JOIN notes ON notes.seq = notes_fts.rowid
+               WHERE notes_fts MATCH ? ORDER BY notes_fts.rank LIMIT ?""",
+            (match, -1 if limit is None else limit),
+        ).fetchall()
+        return [(contact, self._note(note_id, text)) for contact, note_id, text in rows]
+
+    def get_notes(self, contact):
+        """
+        Retrieve all notes for a specific contact.
+
+        Args:
+            contact (str): The contact name.
+
+        Returns:
+            list: List of notes for the given contact.
+        """
+        rows = self.conn.execute(
+            "SELECT id, text FROM notes WHERE contact = ? ORDER BY seq", (contact,)
+        ).fetchall()
+        return [self._note(note_id, text) for note_id, text in rows]
+
+    def get_all_notes(self):
+        """
+        Retrieve all notes from all contacts.
+
+        Returns:
+            dict: Dictionary of contact names mapping to lists of notes.
+        """
+        result = {}
+        rows = self.conn.execute("SELECT contact, id, text FROM notes ORDER BY seq").fetchall()
+        for contact, note_id, text in rows:
+            result.setdefault(contact, []).append(self._note(note_id, text))
+        return result
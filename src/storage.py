@@ -0,0 +1,320 @@
+import importlib
+import io
+import os
+import pickle
+import shutil
+import struct
+import warnings
+import zlib
+from errors import SnapshotError, SnapshotFallbackWarning
+
+JOURNAL_FILE = "termibook.journal"
+
+# Snapshot files start with a header: magic, format version, payload size, CRC-32 of the payload
+SNAPSHOT_MAGIC = b"TBSNAP\r\n"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<8sHQI")
+GENERATIONS = 3  # previous snapshots kept as <file>.1 (newest) to <file>.3
+
+# Errors pickle may raise when the last entry was only partially written
+_TORN_ENTRY_ERRORS = (EOFError, pickle.UnpicklingError, ValueError, AttributeError, IndexError)
+
+# Earlier versions ran the data model in main.py, started as "python main.py",
+# so their pickles name the classes __main__.AddressBook, __main__.Phone, ...
+_MOVED_CLASSES = {"__main__": "addressbook", "main": "addressbook"}
+
+
+class _Unpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        moved = _MOVED_CLASSES.get(module)
+        if moved is not None and hasattr(importlib.import_module(moved), name):
+            module = moved
+        return super().find_class(module, name)
+
+def unpickle(data):
+    """
+    Unpickle snapshot data, mapping the classes of earlier versions to
+    their current modules.
+    """
+    return _Unpickler(io.BytesIO(data)).load()
+
+def _fsync_directory(directory):
+    # Makes the rename itself durable; directories cannot be opened on Windows
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def generation_files(filename, generations=GENERATIONS):
+    """
+    Returns:
+        list: The file and its previous generations, newest first.
+    """
+    return [filename] + [f"{filename}.{n}" for n in range(1, generations + 1)]
+
+def write_atomic(filename, data, generations=0):
+    """
+    Replace a file with new content, so that a crash leaves either the old
+    or the new file, never a partially written one.
+
+    The data is written to a temporary file next to the target, flushed
+    to disk, and renamed over the target with ``os.replace``. The
+    previous versions of the file can be kept as ``<file>.1`` (newest)
+    to ``<file>.<generations>``.
+
+    Args:
+        filename (str): File to write.
+        data (bytes): New content.
+        generations (int): Number of previous versions to keep.
+    """
+    temp_file = filename + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    replace_file(temp_file, filename, generations)
+
+def replace_file(temp_file, filename, generations=0):
+    """
+    Rename a fully written and flushed temporary file over a file, keeping
+    its previous versions, and make the rename durable. The second half
+    of ``write_atomic``, for files written by other means.
+
+    Args:
+        temp_file (str): The new content, already flushed to disk.
+        filename (str): File to replace.
+        generations (int): Number of previous versions to keep.
+    """
+    files = generation_files(filename, generations)
+    for older, newer in zip(reversed(files[1:]), reversed(files[:-1])):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+    os.replace(temp_file, filename)
+    _fsync_directory(os.path.dirname(filename))
+
+def dump_snapshot(obj):
+    """
+    Pickle an object into the snapshot format: a header with the format
+    version and a CRC-32 checksum, followed by the pickle.
+
+    Returns:
+        bytes: The snapshot.
+    """
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    return SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(payload), zlib.crc32(payload)) + payload
+
+def parse_snapshot(data):
+    """
+    Check and unpickle a snapshot made by ``dump_snapshot``. Plain pickles
+    written by earlier versions are accepted as well.
+
+    Args:
+        data (bytes): File content.
+
+    Returns:
+        The unpickled object.
+
+    Raises:
+        SnapshotError: If the snapshot is truncated, corrupted or written
+            by a newer format version.
+    """
+    if not data.startswith(SNAPSHOT_MAGIC):
+        try:
+            return unpickle(data)
+        except Exception as e:
+            raise SnapshotError(f"not a snapshot ({e})")
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise SnapshotError("truncated header")
+    _, version, size, checksum = SNAPSHOT_HEADER.unpack_from(data)
+    if version > SNAPSHOT_VERSION:
+        raise SnapshotError(f"format version {version} is newer than this program")
+    payload = memoryview(data)[SNAPSHOT_HEADER.size:]
+    if len(payload) != size:
+        raise SnapshotError(f"expected {size} bytes, found {len(payload)}")
+    if zlib.crc32(payload) != checksum:
+        raise SnapshotError("checksum mismatch")
+    return unpickle(payload)
+
+def save_snapshot(obj, filename, generations=GENERATIONS):
+    """
+    Write a checksummed snapshot atomically, keeping the previous generations.
+
+    Args:
+        obj: Object to pickle.
+        filename (str): Snapshot file.
+        generations (int): Number of previous snapshots to keep.
+    """
+    write_atomic(filename, dump_snapshot(obj), generations)
+
+def load_snapshot(filename, generations=GENERATIONS):
+    """
+    Load the newest valid generation of a snapshot.
+
+    The file itself is tried first, then ``<file>.1``, ``<file>.2`` and
+    so on, so a corrupted or missing snapshot (e.g. after a crash during
+    a rename) falls back to the previous one. Falling back issues a
+    SnapshotFallbackWarning naming the generation that was loaded, since
+    changes saved after it are missing.
+
+    Args:
+        filename (str): Snapshot file.
+        generations (int): Number of previous snapshots to try.
+
+    Returns:
+        The unpickled object.
+
+    Raises:
+        FileNotFoundError: If no generation exists.
+        SnapshotError: If generations exist but none of them is valid.
+    """
+    errors = []
+    skipped = []
+    for name in generation_files(filename, generations):
+        try:
+            with open(name, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            skipped.append(f"{name}: missing")
+            continue
+        try:
+            obj = parse_snapshot(data)
+        except SnapshotError as e:
+            errors.append(f"{name}: {e}")
+            skipped.append(f"{name}: {e}")
+            continue
+        if name != filename:
+            warnings.warn(
+                f"Loaded the older snapshot {name} ({'; '.join(skipped)}). "
+                "Changes saved after it are missing.",
+                SnapshotFallbackWarning, stacklevel=2)
+        return obj
+    if not errors:
+        raise FileNotFoundError(filename)
+    raise SnapshotError("No valid snapshot found. " + "; ".join(errors))
+
+class Journal:
+    """
+    Append-only log of address book and notes changes.
+
+    Every mutation is stored as one pickled ``(kind, key, value)`` entry,
+    where kind is "record" (key: contact name, value: Record) or "note"
+    (key: contact name, value: (note uid, Note)). A Record or Note of
+    None means it was deleted. Each entry holds the full new state of a
+    single contact or note, so replaying the journal on top of the last
+    snapshot restores the latest state, and replaying it twice is
+    harmless. Journals written by earlier versions may also hold "notes"
+    entries (value: the whole list of notes of the contact).
+
+    While a snapshot is written in the background, the entries it already
+    contains are moved aside by ``rotate`` to ``<filename>.old`` and new
+    entries go to a fresh journal. The old file is deleted by
+    ``discard_rotated`` once the snapshot is on disk; until then it is
+    replayed before the current one. When to write a snapshot is decided
+    by the Autosaver (see autosave.py), not by the journal.
+
+    Attributes:
+        filename (str): Path of the journal file.
+        rotated_filename (str): Path of the journal moved aside by ``rotate``.
+        entries (int): Number of entries currently in the journal.
+    """
+    def __init__(self, filename=JOURNAL_FILE):
+        self.filename = filename
+        self.rotated_filename = filename + ".old"
+        self.entries = 0
+        self._file = None
+
+    def replay(self):
+        """
+        Read the journal from the beginning, starting with the rotated
+        journal of an unfinished background save, if any.
+
+        A partially written last entry (e.g. after a crash) is cut off,
+        so that new entries are appended after the last valid one.
+
+        Yields:
+            tuple: (kind, key, value) entries in the order they were written.
+        """
+        yield from self._read(self.rotated_filename)
+        yield from self._read(self.filename)
+
+    def _read(self, filename):
+        try:
+            f = open(filename, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            valid_size = 0
+            while True:
+                try:
+                    entry = pickle.load(f)
+                except _TORN_ENTRY_ERRORS:
+                    break
+                valid_size = f.tell()
+                self.entries += 1
+                yield entry
+        if valid_size < os.path.getsize(filename):
+            os.truncate(filename, valid_size)
+
+    def append(self, kind, key, value):
+        """
+        Write a single change to the end of the journal.
+
+        Args:
+            kind (str): "record" or "note".
+            key (str): Contact name.
+            value: New state of the entry (see the class docstring).
+        """
+        if self._file is None:
+            self._file = open(self.filename, "ab")
+        pickle.dump((kind, key, value), self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.flush()
+        self.entries += 1
+
+    def reset(self):
+        """
+        Empty the journal. Called after a snapshot has been written.
+        """
+        self.close()
+        with open(self.filename, "wb"):
+            pass
+        self.discard_rotated()
+        self.entries = 0
+
+    def rotate(self):
+        """
+        Move the current entries aside before a snapshot is written in the
+        background, and continue with an empty journal.
+
+        If the journal of an earlier, failed save is still there, the
+        current entries are appended to it.
+        """
+        self.close()
+        if os.path.exists(self.filename):
+            if os.path.exists(self.rotated_filename):
+                with open(self.filename, "rb") as f, open(self.rotated_filename, "ab") as rotated:
+                    shutil.copyfileobj(f, rotated)
+                os.remove(self.filename)
+            else:
+                os.replace(self.filename, self.rotated_filename)
+        self.entries = 0
+
+    def discard_rotated(self):
+        """
+        Delete the journal moved aside by ``rotate``. Called once the
+        snapshot holding its entries has been written.
+        """
+        try:
+            os.remove(self.rotated_filename)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """
+        Close the journal file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,410 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text):
+    """
+    Split text into lowercased word tokens.
+
+    Args:
+        text (str): Text to split.
+
+    Returns:
+        list: Tokens in the order they appear in the text.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+def parse_query(query):
+    """
+    Parse a search query.
+
+    Words are combined with AND, the word ``OR`` separates alternative
+    groups of words, and a trailing ``*`` makes a word match as a prefix:
+    ``milk bread OR egg*`` means (milk AND bread) OR (words starting with egg).
+
+    Args:
+        query (str): The query string.
+
+    Returns:
+        list: Groups of (term, is_prefix) pairs; empty groups are dropped.
+    """
+    groups = [[]]
+    for word in query.split():
+        if word == "OR":
+            groups.append([])
+            continue
+        is_prefix = word.endswith("*")
+        terms = tokenize(word)
+        for position, term in enumerate(terms):
+            groups[-1].append((term, is_prefix and position == len(terms) - 1))
+    return [group for group in groups if group]
+
+
+class TextIndex:
+    """
+    Inverted index over short texts with BM25 ranking.
+
+    Every document is identified by a hashable key. The index keeps a
+    posting list (key -> term frequency) per term, the length of every
+    document, and a sorted vocabulary for prefix lookups. Documents can be
+    added and removed one at a time.
+    """
+    def __init__(self):
+        self._postings = {}  # key: term, value: dict of document key -> term frequency
+        self._doc_terms = {}  # key: document key, value: dict of term -> frequency
+        self._doc_len = {}  # key: document key, value: number of tokens
+        self._total_len = 0
+        self._vocabulary = []  # sorted terms, for prefix lookups
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add(self, key, text):
+        """
+        Index a document. An existing document with the same key is replaced.
+
+        Args:
+            key: Document key.
+            text (str): Document text.
+        """
+        if key in self._doc_len:
+            self.remove(key)
+        tokens = tokenize(text)
+        terms = {}
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+        for term, freq in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._vocabulary, term)
+            postings[key] = freq
+        self._doc_terms[key] = terms
+        self._doc_len[key] = len(tokens)
+        self._total_len += len(tokens)
+
+    def remove(self, key):
+        """
+        Remove a document from the index. Unknown keys are ignored.
+
+        Args:
+            key: Document key.
+        """
+        terms = self._doc_terms.pop(key, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(key)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+    def _expand(self, term, is_prefix):
+        if not is_prefix:
+            return [term] if term in self._postings else []
+        start = bisect_left(self._vocabulary, term)
+        end = start
+        while end < len(self._vocabulary) and self._vocabulary[end].startswith(term):
+            end += 1
+        return self._vocabulary[start:end]
+
+    def statistics(self, query):
+        """
+        Collection statistics used to rank a query, so that the results
+        of several indexes over parts of a collection (shards) can be
+        ranked as one: sum them over the indexes and pass the totals to
+        ``search``.
+
+        Args:
+            query (str): The query string.
+
+        Returns:
+            tuple: (document count, total document length,
+                dict of matching term -> number of documents containing it)
+        """
+        frequencies = {}
+        for group in parse_query(query):
+            for term, is_prefix in group:
+                for expansion in self._expand(term, is_prefix):
+                    frequencies[expansion] = len(self._postings[expansion])
+        return len(self._doc_len), self._total_len, frequencies
+
+    def search(self, query, limit=None, statistics=None):
+        """
+        Find documents matching a query (see ``parse_query``), best first.
+
+        Args:
+            query (str): The query string.
+            limit (int, optional): Maximum number of results.
+            statistics (tuple, optional): Statistics of the whole collection
+                (see ``statistics``) when this index holds only a part of it.
+
+        Returns:
+            list: (key, score) pairs sorted by descending BM25 score.
+        """
+        if not self._doc_len:
+            return []
+        if statistics is None:
+            statistics = (len(self._doc_len), self._total_len, None)
+        doc_count, total_len, frequencies = statistics
+        avg_len = total_len / doc_count or 1
+        scores = {}
+        for group in parse_query(query):
+            # Every word of the group must match; a prefix word matches
+            # if any of its expansions does
+            clauses = []
+            for term, is_prefix in group:
+                expansions = self._expand(term, is_prefix)
+                if not expansions:
+                    clauses = None
+                    break
+                clauses.append(expansions)
+            if clauses is None:
+                continue
+            clause_docs = []
+            for expansions in clauses:
+                if len(expansions) == 1:
+                    clause_docs.append(self._postings[expansions[0]].keys())
+                else:
+                    docs = set()
+                    for term in expansions:
+                        docs.update(self._postings[term])
+                    clause_docs.append(docs)
+            clause_docs.sort(key=len)
+            matches = set(clause_docs[0])
+            for docs in clause_docs[1:]:
+                matches.intersection_update(docs)
+                if not matches:
+                    break
+            if not matches:
+                continue
+            for expansions in clauses:
+                for term in expansions:
+                    postings = self._postings[term]
+                    frequency = len(postings) if frequencies is None else frequencies[term]
+                    idf = math.log(1 + (doc_count - frequency + 0.5) / (frequency + 0.5))
+                    # Walk whichever side is smaller
+                    if len(postings) <= len(matches):
+                        hits = [(key, freq) for key, freq in postings.items() if key in matches]
+                    else:
+                        hits = [(key, postings[key]) for key in matches if key in postings]
+                    for key, freq in hits:
+                        norm = K1 * (1 - B + B * self._doc_len[key] / avg_len)
+                        scores[key] = scores.get(key, 0.0) + idf * freq * (K1 + 1) / (freq + norm)
+        if limit is not None:
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class SubstringIndex:
+    """
+    Trigram index for case-insensitive substring search over short fields.
+
+    Every document (key) has a few named fields. Each field value is split
+    into overlapping three-character grams; a query is answered by
+    intersecting the posting sets of its grams and then verifying the
+    remaining candidates with a plain substring test. Values and queries
+    shorter than three characters are matched against the gram vocabulary.
+    """
+    GRAM = 3
+
+    def __init__(self):
+        self._docs = {}  # key: document key, value: dict of field -> lowercased text
+        self._grams = {}  # key: gram, value: set of (document key, field)
+
+    def _grams_of(self, text):
+        if len(text) <= self.GRAM:
+            return {text}
+        return {text[i:i + self.GRAM] for i in range(len(text) - self.GRAM + 1)}
+
+    def add(self, key, fields):
+        """
+        Index a document. An existing document with the same key is replaced.
+
+        Args:
+            key: Document key.
+            fields (dict): Field name -> text; empty values are skipped.
+        """
+        self.remove(key)
+        lowered = {field: text.lower() for field, text in fields.items() if text}
+        self._docs[key] = lowered
+        for field, text in lowered.items():
+            posting = (key, field)
+            for gram in self._grams_of(text):
+                self._grams.setdefault(gram, set()).add(posting)
+
+    def remove(self, key):
+        """
+        Remove a document from the index. Unknown keys are ignored.
+
+        Args:
+            key: Document key.
+        """
+        fields = self._docs.pop(key, None)
+        if fields is None:
+            return
+        for field, text in fields.items():
+            posting = (key, field)
+            for gram in self._grams_of(text):
+                postings = self._grams[gram]
+                postings.discard(posting)
+                if not postings:
+                    del self._grams[gram]
+
+    def search(self, query):
+        """
+        Find documents with a field containing the query.
+
+        Args:
+            query (str): Substring to look for (case-insensitive).
+
+        Returns:
+            dict: Document key -> list of matching fields, in field order.
+        """
+        query = query.lower()
+        if not query:
+            return {}
+        if len(query) < self.GRAM:
+            candidates = set()
+            for gram, postings in self._grams.items():
+                if query in gram:
+                    candidates.update(postings)
+        else:
+            posting_sets = []
+            for gram in self._grams_of(query):
+                postings = self._grams.get(gram)
+                if not postings:
+                    return {}
+                posting_sets.append(postings)
+            posting_sets.sort(key=len)
+            candidates = set(posting_sets[0])
+            for postings in posting_sets[1:]:
+                candidates.intersection_update(postings)
+                if not candidates:
+                    return {}
+        results = {}
+        for key, field in candidates:
+            if query in self._docs[key][field]:
+                results.setdefault(key, []).append(field)
+        for key, fields in results.items():
+            if len(fields) > 1:
+                order = list(self._docs[key])
+                fields.sort(key=order.index)
+        return results
+
+
+def prefix_end(prefix):
+    """
+    The smallest string greater than every string starting with the prefix,
+    so that they all sort in [prefix, prefix_end(prefix)).
+
+    Args:
+        prefix (str): Non-empty prefix.
+
+    Returns:
+        str: Upper bound for a range lookup.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def suggestion_distance(word):
+    """
+    Largest edit distance at which a word still gets suggestions: one
+    typo for short words, two for longer ones.
+    """
+    return 1 if len(word) <= 4 else 2
+
+
+class NameIndex:
+    """
+    Sorted list of keys (e.g. casefolded contact names) used as a trie.
+
+    Keys sharing a prefix are next to each other in the list, so every
+    trie node is a slice of it found with a binary search. Completing a
+    prefix is one lookup; a fuzzy lookup walks the trie depth first with
+    one row of the Levenshtein table per node and leaves a subtree as
+    soon as the whole row is over the distance bound. No node objects
+    are kept, the index costs one list entry per key.
+    """
+    def __init__(self, keys=()):
+        self._keys = sorted(keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key):
+        """
+        Index a key. Keys already in the index are ignored.
+        """
+        index = bisect_left(self._keys, key)
+        if index == len(self._keys) or self._keys[index] != key:
+            self._keys.insert(index, key)
+
+    def remove(self, key):
+        """
+        Remove a key from the index. Unknown keys are ignored.
+        """
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def complete(self, prefix, limit=None):
+        """
+        Find the keys starting with a prefix.
+
+        Args:
+            prefix (str): Key prefix; an empty prefix matches every key.
+            limit (int, optional): Maximum number of keys.
+
+        Returns:
+            list: Matching keys in sorted order.
+        """
+        start = bisect_left(self._keys, prefix) if prefix else 0
+        end = bisect_left(self._keys, prefix_end(prefix), start) if prefix else len(self._keys)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self._keys[start:end]
+
+    def similar(self, query, max_distance):
+        """
+        Find the keys within an edit distance of the query.
+
+        Args:
+            query (str): Key to look for.
+            max_distance (int): Largest Levenshtein distance accepted.
+
+        Returns:
+            list: (distance, key) pairs, closest first.
+        """
+        keys = self._keys
+        found = []
+        # (start, end, depth, row): keys[start:end] share their first depth
+        # characters, row holds the distances of that prefix to query[:j]
+        stack = [(0, len(keys), 0, list(range(len(query) + 1)))]
+        while stack:
+            start, end, depth, row = stack.pop()
+            if start < end and len(keys[start]) == depth:
+                # The prefix itself is a key; it sorts first in its slice
+                if row[-1] <= max_distance:
+                    found.append((row[-1], keys[start]))
+                start += 1
+            while start < end:
+                key = keys[start]
+                char = key[depth]
+                child_end = bisect_left(keys, prefix_end(key[:depth + 1]), start, end)
+                child_row = [row[0] + 1]
+                for j, query_char in enumerate(query, 1):
+                    child_row.append(min(child_row[j - 1] + 1, row[j] + 1, row[j - 1] + (query_char != char)))
+                if min(child_row) <= max_distance:
+                    stack.append((start, child_end, depth + 1, child_row))
+                start = child_end
+        found.sort()
+        return found
@@ -0,0 +1,117 @@
+import pickle
+from datetime import date, timedelta
+import pytest
+from addressbook import AddressBook, Record, upcoming_days, congratulation_date, phone_prefix_range
+
+
+def book_with(*names):
+    book = AddressBook()
+    for name in names:
+        book.add_record(Record(name))
+    return book
+
+
+@pytest.mark.parametrize("query", ["Anna Smith", "anna smith", "ANNA SMITH", "  aNNa smith "])
+def test_find_ignores_case(query):
+    book = book_with("Anna Smith", "Bob")
+    assert book.find(query) is book.data["Anna Smith"]
+
+
+def test_find_after_delete_and_load():
+    book = book_with("Anna", "Bob")
+    book.delete("Anna")
+    assert book.find("anna") is None
+    loaded = pickle.loads(pickle.dumps(book))
+    loaded.rebuild_index()
+    assert loaded.find("BOB") is loaded.data["Bob"]
+
+
+def test_find_wants_a_name():
+    with pytest.raises(ValueError):
+        AddressBook().find("  ")
+
+
+def test_upcoming_days_cross_the_new_year():
+    days = upcoming_days(3, date(2023, 12, 30))
+    assert days == [(date(2023, 12, 30), [(12, 30)]), (date(2023, 12, 31), [(12, 31)]),
+                    (date(2024, 1, 1), [(1, 1)]), (date(2024, 1, 2), [(1, 2)])]
+
+
+def test_29_february_falls_on_1_march_in_other_years():
+    assert upcoming_days(1, date(2023, 2, 28))[1] == (date(2023, 3, 1), [(3, 1), (2, 29)])
+    assert upcoming_days(2, date(2024, 2, 28))[1:] == [(date(2024, 2, 29), [(2, 29)]), (date(2024, 3, 1), [(3, 1)])]
+
+
+def test_upcoming_days_never_reach_the_same_day_next_year():
+    days = upcoming_days(1000, date(2023, 5, 10))
+    assert days[-1][0] == date(2024, 5, 9)
+    keys = [key for _, day_keys in days for key in day_keys]
+    assert len(keys) == len(set(keys)) == 366
+
+
+def test_weekend_birthdays_are_congratulated_on_monday():
+    assert congratulation_date(date(2024, 6, 1)) == date(2024, 6, 3)
+    assert congratulation_date(date(2024, 6, 2)) == date(2024, 6, 3)
+    assert congratulation_date(date(2024, 6, 4)) == date(2024, 6, 4)
+
+
+def test_upcoming_birthdays_follow_birthday_changes():
+    today = date.today()
+    book = book_with("Anna", "Bob")
+    # 1996 is a leap year, so the birthday is valid even on 29 February
+    book.find("Anna").add_birthday(today.replace(year=1996).strftime("%d.%m.%Y"))
+    book.find("Bob").add_birthday((today - timedelta(days=30)).replace(year=1996).strftime("%d.%m.%Y"))
+    assert [(record.name.value, day) for record, day, _ in book.get_upcoming_birthday(7)] == [("Anna", today)]
+    book.find("Anna").add_birthday((today - timedelta(days=30)).replace(year=1996).strftime("%d.%m.%Y"))
+    assert book.get_upcoming_birthday(7) == []
+    assert sorted(record.name.value for record, *_ in book.get_upcoming_birthday(366)) == ["Anna", "Bob"]
+
+
+@pytest.fixture
+def phone_book():
+    book = AddressBook()
+    for name, phones in [("Anna", ["0501234567", "0671111111"]), ("Bob", ["0501234567"]), ("Carl", ["0509999999"])]:
+        record = Record(name)
+        for phone in phones:
+            record.add_phone(phone)
+        book.add_record(record)
+    return book
+
+
+def names(records):
+    return sorted(record.name.value for record in records)
+
+
+def owners(pairs):
+    return [(phone, names(records)) for phone, records in pairs]
+
+
+def test_find_by_phone(phone_book):
+    assert names(phone_book.find_by_phone("0501234567")) == ["Anna", "Bob"]
+    assert names(phone_book.find_by_phone("0671111111")) == ["Anna"]
+    assert phone_book.find_by_phone("0000000000") == []
+
+
+def test_phones_with_prefix(phone_book):
+    assert owners(phone_book.phones_with_prefix("050")) == [("0501234567", ["Anna", "Bob"]), ("0509999999", ["Carl"])]
+    assert owners(phone_book.phones_with_prefix("0671111111")) == [("0671111111", ["Anna"])]
+    assert phone_book.phones_with_prefix("099") == []
+    loaded = pickle.loads(pickle.dumps(phone_book))
+    loaded.rebuild_index()
+    assert owners(loaded.phones_with_prefix("0")) == owners(phone_book.phones_with_prefix("0"))
+
+
+@pytest.mark.parametrize("prefix", ["", "05a", "01234567890"])
+def test_phone_prefix_must_be_digits(prefix):
+    with pytest.raises(ValueError):
+        phone_prefix_range(prefix)
+
+
+def test_phone_index_follows_changes(phone_book):
+    assert owners(phone_book.duplicate_phones()) == [("0501234567", ["Anna", "Bob"])]
+    phone_book.find("Bob").edit_phone("0501234567", "0509999999")
+    assert owners(phone_book.duplicate_phones()) == [("0509999999", ["Bob", "Carl"])]
+    assert names(phone_book.find_by_phone("0501234567")) == ["Anna"]
+    phone_book.delete("Carl")
+    assert phone_book.duplicate_phones() == []
+    assert owners(phone_book.phones_with_prefix("05")) == [("0501234567", ["Anna"]), ("0509999999", ["Bob"])]
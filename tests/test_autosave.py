@@ -0,0 +1,76 @@
+import threading
+import pytest
+from addressbook import AddressBook, Record
+from autosave import Autosaver
+from columnar_store import MappedAddressBook, _FrozenBook, write_snapshot, SNAPSHOT_FILE
+from notes import NotesBook
+from storage import Journal
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    # The autosaver writes its snapshots to the current directory
+    monkeypatch.chdir(tmp_path)
+    journal = Journal()
+    yield journal
+    journal.close()
+
+
+def test_mapped_book_is_written_without_the_lock(journal, monkeypatch):
+    book = AddressBook()
+    for n in range(10):
+        book.add_record(Record(f"Contact {n}"))
+    write_snapshot(book.data.values(), SNAPSHOT_FILE)
+    mapped, notes_book = MappedAddressBook(SNAPSHOT_FILE), NotesBook()
+    mapped.journal = notes_book.journal = journal
+    autosaver = Autosaver(mapped, notes_book, journal)
+    mapped.find("Contact 1").add_email("one@example.com")
+    write = _FrozenBook.write
+
+    def write_while_editing(frozen, filename):
+        # Another thread gets the lock while the snapshot is written
+        def edit():
+            with autosaver.lock:
+                mapped.add_record(Record("Late"))
+        thread = threading.Thread(target=edit)
+        thread.start()
+        thread.join(5)
+        assert not thread.is_alive()
+        return write(frozen, filename)
+
+    monkeypatch.setattr(_FrozenBook, "write", write_while_editing)
+    autosaver.save()
+    assert mapped.find("late") is not None
+    assert mapped.find("contact 1").email.value == "one@example.com"
+    assert autosaver.changes() == 1
+    mapped.close()
+    reopened = MappedAddressBook(SNAPSHOT_FILE)
+    assert reopened.find("contact 1").email.value == "one@example.com"
+    assert reopened.find("late") is None  # still only in the journal
+    reopened.close()
+
+
+class FailingBook(AddressBook):
+    @property
+    def version(self):
+        raise RuntimeError("broken")
+
+    @version.setter
+    def version(self, value):
+        pass
+
+
+def test_worker_survives_an_unexpected_error(journal):
+    autosaver = Autosaver(AddressBook(), NotesBook(), journal, interval=60)
+    autosaver.start()
+    autosaver.book = FailingBook()
+    autosaver.save_soon()
+    for _ in range(100):
+        if autosaver.error is not None:
+            break
+        threading.Event().wait(0.05)
+    error = autosaver.take_error()
+    assert isinstance(error, RuntimeError)
+    assert autosaver._thread.is_alive()
+    autosaver.book = AddressBook()
+    autosaver.stop()
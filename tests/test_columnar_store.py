@@ -0,0 +1,135 @@
+import os
+import pytest
+from addressbook import AddressBook, Record
+from columnar_store import MappedAddressBook, write_snapshot
+
+
+def make_book(count):
+    book = AddressBook()
+    for n in range(count):
+        record = Record(f"Contact {n:03}")
+        record.add_phone(f"{5550000000 + n}")
+        book.add_record(record)
+    return book
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    filename = str(tmp_path / "termibook.snap")
+    write_snapshot(make_book(20).data.values(), filename)
+    book = MappedAddressBook(filename)
+    yield book
+    book.close()
+
+
+@pytest.mark.parametrize("content", [b"", b"not a snapshot at all", None])
+def test_loading_a_bad_file_keeps_the_current_book(mapped, tmp_path, content):
+    bad = tmp_path / "bad.snap"
+    if content is None:
+        # A valid snapshot cut in the middle
+        with open(mapped.filename, "rb") as f:
+            bad.write_bytes(f.read()[:-100])
+    else:
+        bad.write_bytes(content)
+    assert mapped.load([str(bad)]) is mapped
+    assert mapped.find("contact 007").phones[0].value == "5550000007"
+    assert len(mapped.search("contact")) == 20
+
+
+def test_loading_a_missing_file_keeps_the_current_book(mapped, tmp_path):
+    assert mapped.load([str(tmp_path / "missing.snap")]) is mapped
+    assert mapped.find("contact 001") is not None
+
+
+def test_save_to_another_file(mapped, tmp_path):
+    mapped.find("Contact 001").add_email("one@example.com")
+    other = str(tmp_path / "copy.snap")
+    mapped.save([other])
+    assert not os.path.exists(other + ".tmp")
+    loaded = mapped.load([other])
+    assert loaded is not mapped
+    assert loaded.find("contact 001").email.value == "one@example.com"
+    assert len(loaded.data) == 20
+    loaded.close()
+
+
+def test_reading_a_contact_is_not_a_change(mapped):
+    version = mapped.version
+    assert mapped.find("contact 003") is not None
+    assert mapped.data["Contact 004"] is not None
+    assert mapped.version == version
+
+
+def test_changes_during_a_background_write_are_kept(mapped):
+    mapped.find("Contact 001").add_email("one@example.com")
+    mapped.find("contact 002")  # only read
+    mapped.add_record(Record("Zed"))
+    frozen = mapped.freeze()
+    # Made while the snapshot is written, without the lock
+    mapped.find("Contact 001").add_email("first@example.com")
+    mapped.delete("Contact 005")
+    mapped.delete("Zed")
+    mapped.add_record(Record("Yan"))
+    try:
+        temp_file = frozen.write(mapped.filename)
+    finally:
+        frozen.close()
+    version = mapped.version
+    assert mapped.switch(frozen, temp_file, mapped.filename)
+    assert mapped.version == version
+    names = sorted(record.name.value for record in mapped.data.values())
+    assert names == sorted({f"Contact {n:03}" for n in range(20)} - {"Contact 005"} | {"Yan"})
+    assert mapped.find("contact 001").email.value == "first@example.com"
+    # The new snapshot holds the state at the freeze
+    written = MappedAddressBook(mapped.filename)
+    try:
+        assert written.find("contact 001").email.value == "one@example.com"
+        assert written.find("contact 005") is not None
+        assert written.find("zed") is not None
+        assert written.find("yan") is None
+    finally:
+        written.close()
+
+
+def test_switch_after_a_compaction_does_nothing(mapped):
+    frozen = mapped.freeze()
+    temp_file = frozen.write(mapped.filename)
+    frozen.close()
+    mapped.compact()
+    assert not mapped.switch(frozen, temp_file, mapped.filename)
+    assert not os.path.exists(temp_file)
+    assert len(mapped.data) == 20
+
+
+def test_lookups_change_nothing_until_the_record_is_changed(mapped):
+    record = mapped.find("contact 006")
+    assert mapped.data["Contact 007"] is not None
+    assert len(mapped._overlay.data) == 0
+    record.add_email("six@example.com")
+    assert mapped.find("contact 006") is record
+    assert [found.name.value for found, _ in mapped.search("six@")] == ["Contact 006"]
+    assert len(mapped.data) == 20
+
+
+def test_search_matches_the_address_book(tmp_path):
+    book = AddressBook()
+    for name, phone, email, address in [("Anna", "0501234567", "anna@example.com", "Ukraine, Kyiv"),
+                                        ("Bob", "0671234567", None, "Lviv, Main 5"),
+                                        ("Carl", "0931112233", "carl@kyiv.ua", None)]:
+        record = Record(name)
+        record.add_phone(phone)
+        if email:
+            record.add_email(email)
+        if address:
+            record.add_address(address)
+        book.add_record(record)
+    filename = str(tmp_path / "termibook.snap")
+    write_snapshot(book.data.values(), filename)
+    mapped = MappedAddressBook(filename)
+    try:
+        # The last ones span two contacts in the search column
+        for query in ["a", "KYIV", "567", "@", "main 5", "nobody", "kyivbob", "4567bob", "5carl", "ua"]:
+            expected = [(record.name.value, fields) for record, fields in book.search(query)]
+            assert [(record.name.value, fields) for record, fields in mapped.search(query)] == expected, query
+    finally:
+        mapped.close()
@@ -0,0 +1,55 @@
+import pytest
+import commands
+from commands import Command, command, find_command, all_commands, command_names
+from addressbook import AddressBook, Record
+from bot_help import print_help
+from errors import ErrorMessage
+from main import dispatch
+from notes import NotesBook
+from pretty_table2 import strip_colors
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # A scratch registry, so the commands of main stay as they are
+    monkeypatch.setattr(commands, "COMMANDS", {})
+    monkeypatch.setattr(commands, "DESCRIPTIONS", {})
+
+
+def test_handler_gets_the_parameters_it_names(registry):
+    @command("pair", help="Pair", aliases=("p",))
+    def pair(notes_book, args):
+        return notes_book, args
+
+    cmd = find_command("p")
+    assert cmd is find_command("pair") and cmd.parameters == ("notes_book", "args")
+    assert cmd.run(["x"], "book", "notes") == ("notes", ["x"])
+    assert command_names() == ["pair", "p"] and all_commands() == [cmd]
+    assert commands.DESCRIPTIONS == {"pair": "Pair", "p": "Pair"}
+
+
+def test_unknown_parameters_and_taken_names_are_refused(registry):
+    with pytest.raises(TypeError, match="phone"):
+        Command("call", lambda args, phone: None)
+    commands.add_command(Command("one", aliases=("first",)))
+    with pytest.raises(ValueError, match="first"):
+        commands.add_command(Command("other", aliases=("first",)))
+    assert command_names() == ["one", "first"]
+
+
+def test_dispatch_uses_the_registry():
+    book = AddressBook()
+    book.add_record(Record("Anna"))
+    book.find("Anna").add_phone("1234567890")
+    assert dispatch("edit-phone", ["Anna", "1234567890", "0987654321"], book, NotesBook()) is not None
+    assert book.find("Anna").phones[0].value == "0987654321"
+    assert isinstance(dispatch("nonsense", [], book, NotesBook()), ErrorMessage)
+    # Session commands are handled by the caller
+    assert isinstance(dispatch("quit", [], book, NotesBook()), ErrorMessage)
+
+
+def test_help_lists_every_command(capsys):
+    print_help()
+    out = strip_colors(capsys.readouterr().out)
+    for cmd in all_commands():
+        assert " | ".join(cmd.names) in out and cmd.help in out
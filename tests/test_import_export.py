@@ -0,0 +1,62 @@
+from addressbook import AddressBook, Record
+from notes import NotesBook
+from import_export import import_file
+
+
+def test_csv_with_byte_order_mark(tmp_path):
+    # As saved by Excel ("CSV UTF-8")
+    path = tmp_path / "contacts.csv"
+    path.write_bytes("name,phones,email,address,birthday,notes\r\nAnna,1234567890,,,,buy milk #shop\r\n".encode("utf-8-sig"))
+    book, notes_book = AddressBook(), NotesBook()
+    report = import_file(str(path), book, notes_book)
+    assert report.errors == []
+    assert book.find("Anna").phones[0].value == "1234567890"
+    assert [note.text for note in notes_book.get_notes("Anna")] == ["buy milk"]
+
+
+def import_csv(tmp_path, book, notes_book, *rows):
+    path = tmp_path / "contacts.csv"
+    path.write_text("name,phones,email,address,birthday,notes\n" + "".join(row + "\n" for row in rows), encoding="utf-8")
+    return import_file(str(path), book, notes_book)
+
+
+def test_existing_contact_is_merged(tmp_path):
+    book, notes_book = AddressBook(), NotesBook()
+    anna = Record("Anna")
+    anna.add_phone("1234567890")
+    book.add_record(anna)
+    report = import_csv(tmp_path, book, notes_book, "Anna,1234567890;1111111111,anna@example.com,,01.02.1990,")
+    assert (report.added, report.updated, report.errors) == (0, 1, [])
+    assert book.find("Anna") is anna
+    assert [p.value for p in anna.phones] == ["1234567890", "1111111111"]
+    assert anna.email.value == "anna@example.com"
+    assert [record for record, *_ in book.get_upcoming_birthday(366)] == [anna]
+    assert [record.name.value for record in book.find_by_phone("1111111111")] == ["Anna"]
+
+
+def test_imported_phones_are_deduplicated(tmp_path):
+    book, notes_book = AddressBook(), NotesBook()
+    bob = Record("Bob")
+    bob.add_phone("1234567890")
+    book.add_record(bob)
+    report = import_csv(tmp_path, book, notes_book, "Anna,1234567890;1234567890,,,,")
+    assert report.added == 1
+    assert [p.value for p in book.find("Anna").phones] == ["1234567890"]
+    assert [(phone, sorted(r.name.value for r in owners)) for phone, owners in book.duplicate_phones()] == [
+        ("1234567890", ["Anna", "Bob"])]
+
+
+def test_invalid_birthday_rejects_the_row(tmp_path):
+    book, notes_book = AddressBook(), NotesBook()
+    anna = Record("Anna")
+    anna.add_phone("1234567890")
+    book.add_record(anna)
+    version = book.version
+    report = import_csv(tmp_path, book, notes_book,
+                        "Anna,1111111111,,,31.02.1990,",
+                        "Bob,2222222222,,,1990-01-01,")
+    assert [row for row, _ in report.errors] == [2, 3]
+    assert (report.added, report.updated) == (0, 0)
+    assert [p.value for p in anna.phones] == ["1234567890"]
+    assert anna.birthday is None and book.find("Bob") is None
+    assert book.version == version
@@ -0,0 +1,124 @@
+import os
+import pytest
+from addressbook import AddressBook, Record
+from notes import NotesBook, Note
+from storage import Journal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = Journal(str(tmp_path / "termibook.journal"))
+    yield journal
+    journal.close()
+
+
+def replay(journal, book, notes_book):
+    # The same dispatch as main.open_books
+    for kind, key, value in journal.replay():
+        if kind == "record":
+            book.restore(key, value)
+        elif kind == "note":
+            notes_book.restore_note(key, *value)
+        else:
+            notes_book.restore(key, value)
+
+
+def note_state(notes_book):
+    return {contact: [(note.uid, note.text, note.tags) for note in notes] for contact, notes in notes_book.data.items()}
+
+
+def test_replay_restores_records_and_notes(journal):
+    book, notes_book = AddressBook(), NotesBook()
+    book.journal = notes_book.journal = journal
+    anna = Record("Anna")
+    anna.add_phone("1234567890")
+    book.add_record(anna)
+    book.add_record(Record("Bob"))
+    anna.add_email("anna@example.com")
+    book.delete("Bob")
+    first, second, third = Note("buy milk", ["shop"]), Note("call back"), Note("gone")
+    for note in (first, second, third):
+        notes_book.add_note("Anna", note)
+    notes_book.edit_note(first.id, "buy bread", ["shop", "food"])
+    notes_book.delete_note(third.id)
+    journal.close()
+
+    replayed_book, replayed_notes = AddressBook(), NotesBook()
+    replay(Journal(journal.filename), replayed_book, replayed_notes)
+
+    assert list(replayed_book.data) == ["Anna"]
+    assert replayed_book.find("anna").email.value == "anna@example.com"
+    assert note_state(replayed_notes) == note_state(notes_book)
+    assert [contact for contact, _ in replayed_notes.search_by_tag("food")] == ["Anna"]
+
+
+def test_replaying_twice_is_harmless(journal):
+    notes_book = NotesBook()
+    notes_book.journal = journal
+    note = Note("first")
+    notes_book.add_note("Anna", note)
+    notes_book.edit_note(note.id, "edited", [])
+    journal.close()
+
+    replayed_notes = NotesBook()
+    replay(Journal(journal.filename), AddressBook(), replayed_notes)
+    replay(Journal(journal.filename), AddressBook(), replayed_notes)
+
+    assert note_state(replayed_notes) == note_state(notes_book)
+
+
+def test_note_entries_do_not_grow_with_the_notes_of_the_contact(journal):
+    notes_book = NotesBook()
+    notes_book.journal = journal
+    sizes = []
+    for n in range(50):
+        before = os.path.getsize(journal.filename) if os.path.exists(journal.filename) else 0
+        notes_book.add_note("Anna", Note(f"note {n:03}"))
+        sizes.append(os.path.getsize(journal.filename) - before)
+    journal.close()
+    entries = list(Journal(journal.filename).replay())
+    assert len(entries) == 50
+    assert all(kind == "note" for kind, _, _ in entries)
+    assert len(set(sizes)) == 1
+
+
+def test_old_notes_entries_still_replay(journal):
+    notes = [Note("old style", ["legacy"])]
+    journal.append("notes", "Anna", notes)
+    journal.close()
+    replayed_notes = NotesBook()
+    replay(Journal(journal.filename), AddressBook(), replayed_notes)
+    assert [note.text for note in replayed_notes.get_notes("Anna")] == ["old style"]
+    assert replayed_notes.tag_counts() == [("legacy", 1)]
+
+
+def test_torn_last_entry_is_cut_off(journal):
+    journal.append("record", "Anna", Record("Anna"))
+    journal.append("record", "Bob", Record("Bob"))
+    journal.close()
+    with open(journal.filename, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 5)
+    reopened = Journal(journal.filename)
+    assert [key for _, key, _ in reopened.replay()] == ["Anna"]
+    reopened.append("record", "Carl", Record("Carl"))
+    reopened.close()
+    assert [key for _, key, _ in Journal(journal.filename).replay()] == ["Anna", "Carl"]
+
+
+def test_rotated_journal_is_replayed_until_discarded(journal):
+    journal.append("record", "Anna", Record("Anna"))
+    journal.rotate()
+    journal.append("record", "Bob", Record("Bob"))
+    journal.close()
+    assert [key for _, key, _ in Journal(journal.filename).replay()] == ["Anna", "Bob"]
+    journal.discard_rotated()
+    assert [key for _, key, _ in Journal(journal.filename).replay()] == ["Bob"]
+
+
+def test_reset_empties_the_journal(journal):
+    journal.append("record", "Anna", Record("Anna"))
+    journal.rotate()
+    journal.append("record", "Bob", Record("Bob"))
+    journal.reset()
+    assert journal.entries == 0
+    assert list(Journal(journal.filename).replay()) == []
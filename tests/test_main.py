@@ -0,0 +1,88 @@
+import argparse
+import io
+import re
+import pytest
+import addressbook
+import notes
+from addressbook import AddressBook, Record
+from errors import ErrorMessage, InvalidInputError
+from notes import NotesBook, Note
+from main import show_all, handle_show_all_notes, parse_page_args, run_script, main_script
+from pretty_table2 import PAGE_SIZE, strip_colors
+
+
+@pytest.fixture
+def books():
+    book, notes_book = AddressBook(), NotesBook()
+    for n in range(1, 8):
+        book.add_record(Record(f"Contact {n}"))
+        notes_book.add_note(f"Contact {n}", Note(f"note {n}"))
+    return book, notes_book
+
+
+def shown(capsys, pattern):
+    return re.findall(pattern, strip_colors(capsys.readouterr().out))
+
+
+def test_page_options():
+    assert parse_page_args([]) == (None, PAGE_SIZE)
+    assert parse_page_args(["--page", "2", "--limit", "5"]) == (2, 5)
+    for args in (["--page"], ["--page", "0"], ["--limit", "x"], ["--size", "3"]):
+        with pytest.raises(InvalidInputError):
+            parse_page_args(args)
+
+
+def test_all_shows_one_page(books, capsys):
+    show_all(["--page", "2", "--limit", "3"], *books)
+    out = strip_colors(capsys.readouterr().out)
+    assert re.findall(r"Contact \d", out) == ["Contact 4", "Contact 5", "Contact 6"]
+    assert "Page 2, rows 4-6" in out
+
+
+def test_all_streams_every_page(books, capsys):
+    show_all(["--limit", "3"], *books)
+    out = strip_colors(capsys.readouterr().out)
+    assert re.findall(r"Contact \d", out) == [f"Contact {n}" for n in range(1, 8)]
+    assert out.count("╭") == 3
+
+
+def test_all_notes_pages(books, capsys):
+    handle_show_all_notes(["--page", "3", "--limit", "3"], books[1])
+    assert shown(capsys, r"note \d") == ["note 7"]
+    handle_show_all_notes(["--page", "4", "--limit", "3"], books[1])
+    assert shown(capsys, r"No notes on page \d") == ["No notes on page 4"]
+    assert isinstance(handle_show_all_notes(["--page", "x"], books[1]), ErrorMessage)
+
+
+SCRIPT = """# comments and blank lines are skipped
+
+add-contact Anna 1234567890
+add-email Anna anna@example
+add-email Anna anna@example.com
+save
+exit
+add-contact Bob
+"""
+
+
+def test_run_script_reports_failed_lines(capsys):
+    book, notes_book = AddressBook(), NotesBook()
+    assert run_script(io.StringIO(SCRIPT), book, notes_book, quiet=True) == (3, 1)
+    assert list(book.data) == ["Anna"]
+    assert book.find("Anna").email.value == "anna@example.com"
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err.startswith("line 4: add-email: ")
+    assert "3 commands in" in captured.err and "1 failed." in captured.err
+
+
+def test_script_mode_saves_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "commands.txt").write_text("add-contact Anna 1234567890\nadd-note Anna call back\n", encoding="utf-8")
+    options = argparse.Namespace(script="commands.txt", storage="pickle", db=None, quiet=True, timing=False, workers=0)
+    assert main_script(options) == 0
+    assert list(addressbook.load_data().data) == ["Anna"]
+    assert [note.text for note in notes.load_data().get_notes("Anna")] == ["call back"]
+    assert (tmp_path / "termibook.journal").stat().st_size == 0
+    (tmp_path / "commands.txt").write_text("add-email Nobody nobody@example.com\n", encoding="utf-8")
+    assert main_script(options) == 1
@@ -0,0 +1,61 @@
+import json
+import pytest
+import metrics
+from addressbook import AddressBook, Record
+from errors import ErrorMessage
+from main import dispatch
+from metrics import CommandStats
+from notes import NotesBook
+from pretty_table2 import strip_colors
+
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch):
+    monkeypatch.setattr(metrics, "STATS", {})
+
+
+def test_percentiles_come_from_the_histogram():
+    stats = CommandStats()
+    for _ in range(90):
+        stats.add(0.00001)  # 10 µs, in the <16 µs bucket
+    for _ in range(10):
+        stats.add(0.001, failed=True)
+    assert stats.percentile(50) == stats.percentile(90) == 16 / 1_000_000
+    assert stats.percentile(99) == stats.percentile(100) == 0.001  # capped at the slowest call
+    summary = stats.to_dict()
+    assert (summary["calls"], summary["errors"]) == (100, 10)
+    assert summary["histogram_us"] == {"<16": 90, "<1024": 10}
+
+
+def test_hottest_commands_first_and_dump(tmp_path):
+    metrics.record("search", 0.002)
+    metrics.record("add-contact", 0.001)
+    metrics.record("add-contact", 0.003, failed=True)
+    assert [name for name, _ in metrics.hottest()] == ["add-contact", "search"]
+    assert [name for name, _ in metrics.hottest(1)] == ["add-contact"]
+    filename = tmp_path / "metrics.json"
+    metrics.dump(str(filename))
+    dumped = json.loads(filename.read_text(encoding="utf-8"))["commands"]
+    assert list(dumped) == ["add-contact", "search"] and dumped["add-contact"]["errors"] == 1
+
+
+def test_dispatch_records_commands():
+    book, notes_book = AddressBook(), NotesBook()
+    assert dispatch("stats", [], book, notes_book) == "No commands run yet."
+    dispatch("add-contact", ["Anna"], book, notes_book)
+    dispatch("show-email", ["Anna"], book, notes_book)
+    out = strip_colors(dispatch("stats", ["2"], book, notes_book))
+    assert "add-contact" in out and "show-email" in out
+    assert metrics.STATS["show-email"].errors == 1
+    assert isinstance(dispatch("stats", ["x"], book, notes_book), ErrorMessage)
+
+
+def test_profile_runs_the_command(capsys):
+    book, notes_book = AddressBook(), NotesBook()
+    book.add_record(Record("Anna"))
+    report = dispatch("profile", ["add-email", "Anna", "anna@example.com"], book, notes_book)
+    assert book.find("Anna").email.value == "anna@example.com"
+    assert capsys.readouterr().out == "Email added.\n"
+    assert "function calls" in report and "Peak memory" in report
+    assert isinstance(dispatch("profile", ["profile", "stats"], book, notes_book), ErrorMessage)
+    assert isinstance(dispatch("profile", ["save"], book, notes_book), ErrorMessage)
@@ -0,0 +1,90 @@
+import pickle
+import pytest
+from errors import AmbiguousNoteIdError, NoteNotFoundError
+from notes import NotesBook, Note
+
+
+@pytest.fixture
+def notes_book():
+    notes_book = NotesBook()
+    notes_book.add_note("Anna", Note("buy milk", ["Shop", "home"]))
+    notes_book.add_note("Anna", Note("call back", ["work"]))
+    notes_book.add_note("Bob", Note("buy bread", ["shop"]))
+    return notes_book
+
+
+def texts(found):
+    return sorted(note.text for _, note in found)
+
+
+def test_tags_are_found_ignoring_case(notes_book):
+    assert texts(notes_book.search_by_tag("SHOP")) == ["buy bread", "buy milk"]
+    assert notes_book.search_by_tag("missing") == []
+
+
+def test_tag_counts_most_used_first(notes_book):
+    assert notes_book.tag_counts() == [("shop", 2), ("home", 1), ("work", 1)]
+    assert NotesBook().tag_counts() == []
+
+
+def test_tag_index_follows_edits_and_deletes(notes_book):
+    _, milk = notes_book.search_by_tag("home")[0]
+    notes_book.edit_note(milk.id, "buy milk", ["dairy"])
+    _, bread = notes_book.search_by_tag("shop")[0]
+    notes_book.delete_note(bread.id)
+    assert notes_book.tag_counts() == [("dairy", 1), ("work", 1)]
+    assert notes_book.search_by_tag("shop") == []
+
+
+def test_tag_index_is_rebuilt_on_load(notes_book):
+    loaded = pickle.loads(pickle.dumps(notes_book))
+    assert loaded.tag_counts() == notes_book.tag_counts()
+    assert texts(loaded.search_by_tag("shop")) == ["buy bread", "buy milk"]
+
+
+def test_tag_index_follows_journal_replay(notes_book):
+    bread = notes_book.get_notes("Bob")[0]
+    notes_book.restore_note("Bob", bread.uid, None)
+    car = Note("fix the car", ["Work"])
+    notes_book.restore_note("Carl", car.uid, car)
+    assert notes_book.tag_counts() == [("work", 2), ("home", 1), ("shop", 1)]
+
+
+def note_with_id(text, note_id):
+    note = Note(text)
+    note.id = note_id
+    return note
+
+
+@pytest.fixture
+def numbered():
+    notes_book = NotesBook()
+    notes_book.add_note("Anna", note_with_id("first", "12345678-0000-0000-0000-000000000001"))
+    notes_book.add_note("Bob", note_with_id("second", "12345678-0000-0000-0000-000000000002"))
+    notes_book.add_note("Bob", note_with_id("third", "abcdef00-0000-0000-0000-000000000003"))
+    return notes_book
+
+
+def test_note_is_found_from_a_unique_id_prefix(numbered):
+    contact, note = numbered.find_note("ABCDEF")
+    assert (contact, note.text) == ("Bob", "third")
+    assert numbered.find_note("12345678-0000-0000-0000-000000000002")[1].text == "second"
+
+
+def test_shared_prefix_is_ambiguous(numbered):
+    with pytest.raises(AmbiguousNoteIdError):
+        numbered.find_note("12345678")
+    assert numbered.find_note("12345678", contact="Anna")[1].text == "first"
+
+
+@pytest.mark.parametrize("note_id", ["ffff", "xyz", "", "12345678" * 5])
+def test_unknown_id_is_not_found(numbered, note_id):
+    with pytest.raises(NoteNotFoundError):
+        numbered.find_note(note_id)
+
+
+def test_id_index_follows_deletes(numbered):
+    numbered.delete_note("12345678-0000-0000-0000-000000000001")
+    assert numbered.find_note("12345678")[1].text == "second"
+    assert numbered.complete_ids("") == ["12345678", "abcdef00"]
+    assert numbered.complete_ids("12345678-") == ["12345678-0000-0000-0000-000000000002"]
@@ -0,0 +1,44 @@
+from pretty_table2 import draw_table, draw_table_pages, display_width, strip_colors, wrap_text
+
+
+def test_rows_are_drawn_page_by_page():
+    pulled = []
+
+    def rows():
+        for n in range(7):
+            pulled.append(n)
+            yield [f"row {n}"]
+
+    pages = draw_table_pages(["Name"], rows(), page_size=3)
+    first = next(pages)
+    assert pulled == [0, 1, 2]  # later rows are not built yet
+    assert first == draw_table(["Name"], [["row 0"], ["row 1"], ["row 2"]])
+    rest = list(pages)
+    assert len(rest) == 2 and "row 6" in rest[-1] and "row 5" not in rest[-1]
+
+
+def test_no_rows_no_pages():
+    assert list(draw_table_pages(["Name"], iter([]))) == []
+
+
+def test_display_width():
+    assert display_width("\033[35mAnna\033[39m") == 4
+    assert display_width("日本 text") == 9
+    assert display_width("📘 note") == 7
+
+
+def test_wrap_text_breaks_at_spaces_only():
+    assert wrap_text("one two three four", 9) == "one two\nthree\nfour"
+    assert wrap_text("unbreakable", 4) == "unbreakable"
+    assert wrap_text("日本 日本 日本", 9) == "日本 日本\n日本"
+
+
+def test_table_columns_line_up_on_screen():
+    table = draw_table(["Name", "Note"], [["\033[35mAnna\033[39m", "日本 text"], ["Bob", "one two three four five six"]], 40)
+    lines = strip_colors(table).split("\n")
+    assert len({display_width(line) for line in lines}) == 1
+    assert lines[0] == "╭──────┬────────────╮"
+    assert lines[3] == "│ Anna │ 日本 text  │"
+    # Cells are wrapped to a quarter of the terminal width
+    assert [line.split("│")[2].strip() for line in lines[5:8]] == ["one two", "three four", "five six"]
+    assert lines[-1] == "╰──────┴────────────╯"
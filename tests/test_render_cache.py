@@ -0,0 +1,56 @@
+import pickle
+from addressbook import AddressBook, Record
+from main import contact_rows
+from notes import NotesBook, Note
+from pretty_table2 import strip_colors
+
+
+class Counting:
+    def __init__(self, build):
+        self.build = build
+        self.calls = 0
+
+    def __call__(self, entity):
+        self.calls += 1
+        return self.build(entity)
+
+
+def test_strings_are_built_once_per_version():
+    record = Record("Anna")
+    build = Counting(Record._contact_string)
+    assert record.rendered("string", build) == record.rendered("string", build)
+    assert build.calls == 1
+    record.add_phone("1234567890")
+    assert "1234567890" in record.rendered("string", build)
+    assert build.calls == 2
+
+
+def test_book_changes_refresh_the_rows():
+    book, notes_book = AddressBook(), NotesBook()
+    book.add_record(Record("Anna"))
+    note = Note("call back", ["work"])
+    notes_book.add_note("Anna", note)
+
+    def row():
+        return [strip_colors(cell) for cell in next(contact_rows(book.data.items(), notes_book))]
+
+    assert row() == ["Anna", "-", "-", "-", "-", "📘 call back", " #work"]
+    book.find("Anna").add_email("anna@example.com")
+    notes_book.edit_note(note.id, "call tomorrow", ["home"])
+    assert row() == ["Anna", "-", "anna@example.com", "-", "-", "📘 call tomorrow", " #home"]
+    # A journal replay puts a new record in place of the cached one
+    replaced = Record("Anna")
+    replaced.add_address("Ukraine, Kyiv")
+    book.restore("Anna", replaced)
+    assert row()[1:5] == ["-", "-", "-", "Ukraine, Kyiv"]
+
+
+def test_cache_is_not_pickled():
+    record = Record("Anna")
+    note = Note("call back")
+    record.to_string()
+    str(note)
+    assert record._rendered and note._rendered
+    loaded_record, loaded_note = pickle.loads(pickle.dumps((record, note)))
+    assert loaded_record._rendered is None and loaded_note._rendered is None
+    assert loaded_record.to_string() == record.to_string() and str(loaded_note) == str(note)
@@ -0,0 +1,179 @@
+import asyncio
+import io
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from addressbook import AddressBook, Record
+import client
+from client import BookClient
+from columnar_store import MappedAddressBook, write_snapshot
+from commands import find_command
+from errors import ErrorMessage
+from main import dispatch, client_file_error
+from notes import NotesBook
+from server import BookServer, ReadWriteLock, THREADS, _check_socket
+
+CONTACTS = 200
+
+pytestmark = pytest.mark.skipif(not hasattr(asyncio, "start_unix_server"), reason="needs Unix sockets")
+
+
+def make_book(tmp_path, storage):
+    book = AddressBook()
+    for n in range(CONTACTS):
+        record = Record(f"Contact{n:03}")
+        record.add_phone(f"{5550000000 + n % 50}")
+        book.add_record(record)
+    if storage == "pickle":
+        return book
+    write_snapshot(book.data.values(), str(tmp_path / "termibook.snap"))
+    return MappedAddressBook(str(tmp_path / "termibook.snap"))
+
+
+@pytest.fixture(params=["pickle", "columnar"])
+def served(request, tmp_path):
+    book, notes_book = make_book(tmp_path, request.param), NotesBook()
+    path = str(tmp_path / "termibook.sock")
+    executor = ThreadPoolExecutor(THREADS)
+    server = BookServer(lambda command, args: dispatch(command, args, book, notes_book), executor, ReadWriteLock())
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(path),))
+    thread.start()
+    for _ in range(200):
+        if os.path.exists(path):
+            break
+        time.sleep(0.01)
+    yield path, book
+    server.stop()
+    thread.join(10)
+    executor.shutdown()
+    if request.param == "columnar":
+        book.close()
+
+
+def test_concurrent_reads_and_writes(served, request):
+    path, book = served
+    failures = []
+    # Switch threads often, so that unsafe interleavings show up
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    request.addfinalizer(lambda: sys.setswitchinterval(interval))
+
+    def read(seed):
+        with BookClient(path) as client:
+            for n in range(60):
+                name = f"Contact{(seed * 37 + n * 13) % CONTACTS:03}"
+                for line in (f"phone {name}", "search contact", "duplicate-phones"):
+                    ok, output = client.run(line)
+                    if not ok:
+                        failures.append((line, output))
+
+    def write():
+        with BookClient(path) as client:
+            for n in range(0, CONTACTS, 2):
+                ok, output = client.run(f"add-email Contact{n:03} c{n}@example.com")
+                if not ok:
+                    failures.append(("add-email", output))
+
+    threads = [threading.Thread(target=read, args=(seed,)) for seed in range(6)] + [threading.Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    assert failures == []
+    for n in range(CONTACTS):
+        email = book.find(f"Contact{n:03}").email
+        assert (email.value if email else None) == (f"c{n}@example.com" if n % 2 == 0 else None)
+
+
+def test_pipelined_requests_see_their_own_changes(served):
+    path, _ = served
+    with BookClient(path) as client:
+        ids = [client.send("add-contact Pipelined 5551234567"), client.send("phone Pipelined"),
+               client.send("search pipelined")]
+        responses = [client.receive() for _ in ids]
+    assert [response["id"] for response in responses] == ids
+    assert all(response["ok"] for response in responses)
+    assert "5551234567" in responses[1]["output"]
+
+
+@pytest.mark.parametrize("line", ["export /tmp/stolen.csv", "import ../contacts.csv", "save sub/dir.snap",
+                                  "profile export /tmp/stolen.csv", "export ."])
+def test_clients_may_only_name_files_in_the_server_directory(line, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cmd = find_command(line.split()[0])
+    error = client_file_error(cmd, line.split()[1:])
+    assert isinstance(error, ErrorMessage)
+    assert client_file_error(cmd, ["backup.csv"] if cmd.name != "profile" else ["export", "backup.csv"]) is None
+
+
+def test_stale_socket_is_removed(tmp_path):
+    path = str(tmp_path / "termibook.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as dead:
+        dead.bind(path)  # bound but never listening, like a killed server's
+    _check_socket(path)
+    assert not os.path.exists(path)
+
+
+def test_socket_path_that_is_not_a_socket_is_kept(tmp_path):
+    path = tmp_path / "termibook.sock"
+    path.write_text("not a socket")
+    with pytest.raises(OSError, match="not a socket"):
+        _check_socket(str(path))
+    assert path.read_text() == "not a socket"
+
+
+def test_tcp_server_wants_the_token(tmp_path):
+    book, notes_book = AddressBook(), NotesBook()
+    executor = ThreadPoolExecutor(1)
+    server = BookServer(lambda command, args: dispatch(command, args, book, notes_book), executor,
+                        ReadWriteLock(), token="secret")
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(port=port),))
+    thread.start()
+    try:
+        for _ in range(200):
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.01)
+        with BookClient(port=port, token="wrong") as client:
+            ok, output = client.run("add-contact Mallory")
+            assert not ok and "token" in output
+            with pytest.raises(ConnectionError):
+                client.run("search a")
+        with BookClient(port=port, token="secret") as client:
+            assert client.run("add-contact Anna")[0]
+        assert list(book.data) == ["Anna"]
+    finally:
+        server.stop()
+        thread.join(10)
+        executor.shutdown()
+
+
+def test_client_exits_cleanly(served, monkeypatch, capsys):
+    path, _ = served
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\nphone Contact001\n   \n# comment\nsearch contact00\n"))
+    assert client.main(["--socket", path]) == 0
+    assert client.main(["--socket", path, ""]) == 2
+    assert "Please enter a command" in capsys.readouterr().err
+    assert client.main(["--socket", str(path) + ".missing", "search", "a"]) == 2
+
+
+def test_client_reports_a_closed_connection(capsys):
+    # A server that answers nothing and hangs up
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        accepted = threading.Thread(target=lambda: listener.accept()[0].close())
+        accepted.start()
+        assert client.main(["--port", str(port), "search", "a"]) == 2
+        accepted.join(5)
+    assert "Lost the connection" in capsys.readouterr().err
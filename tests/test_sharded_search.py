@@ -0,0 +1,63 @@
+import random
+import pytest
+from addressbook import AddressBook, Record
+from notes import NotesBook, Note
+from sharded_search import ShardedSearch
+
+WORDS = ["milk", "bread", "call", "mom", "meeting", "monday", "egg", "eggplant", "tea"]
+TAGS = ["shop", "work", "home", "urgent"]
+
+
+def random_note(rng):
+    return Note(" ".join(rng.choices(WORDS, k=rng.randint(1, 6))), rng.sample(TAGS, rng.randint(0, 2)))
+
+
+def note_ids(found):
+    return [(contact, note.uid) for contact, note in found]
+
+
+@pytest.fixture(scope="module")
+def books():
+    rng = random.Random(7)
+    book, notes_book = AddressBook(), NotesBook()
+    for n in range(60):
+        record = Record(f"Contact {n:02}")
+        record.add_phone(f"{5550000000 + rng.randrange(100)}")
+        book.add_record(record)
+        for _ in range(rng.randint(0, 3)):
+            notes_book.add_note(record.name.value, random_note(rng))
+    searcher = ShardedSearch(book, notes_book, 3)
+    yield rng, book, notes_book, searcher
+    searcher.close()
+
+
+def assert_same_results(book, notes_book, searcher):
+    for keyword in ["contact", "555000001", "1", "nobody"]:
+        assert [(record, fields) for record, fields in searcher.search(keyword)] == book.search(keyword)
+    for tag in TAGS + ["missing"]:
+        assert note_ids(searcher.search_by_tag(tag)) == note_ids(notes_book.search_by_tag(tag))
+    for query in ["milk", "egg*", "call mom", "tea OR bread"]:
+        expected = [uid for _, uid in note_ids(notes_book.search_by_text(query))]
+        found = [uid for _, uid in note_ids(searcher.search_by_text(query))]
+        # Notes with the same score may come in another order
+        assert sorted(found) == sorted(expected)
+
+
+def test_sharded_search_matches_the_books(books):
+    _, book, notes_book, searcher = books
+    assert_same_results(book, notes_book, searcher)
+
+
+def test_sharded_search_follows_changes(books):
+    rng, book, notes_book, searcher = books
+    for n in range(60, 70):
+        book.add_record(Record(f"Contact {n:02}"))
+        notes_book.add_note(f"Contact {n:02}", random_note(rng))
+    book.delete("Contact 03")
+    book.find("Contact 04").add_phone("5550000042")
+    # Edited notes move to the end of their tag lists in the notes book
+    for contact, note in rng.sample([(contact, note) for contact, notes in notes_book.data.items() for note in notes], 10):
+        notes_book.edit_note(note.id, note.text + " tea", rng.sample(TAGS, 2), contact)
+    for contact, note in rng.sample([(contact, note) for contact, notes in notes_book.data.items() for note in notes], 5):
+        notes_book.delete_note(note.id, contact)
+    assert_same_results(book, notes_book, searcher)
@@ -0,0 +1,103 @@
+import os
+import shutil
+import pytest
+from addressbook import AddressBook, Record
+from errors import SnapshotError
+from sqlite_store import SQLiteAddressBook, connect, open_books
+
+BASELINE = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("addressbook.pkl", "notesbook.pkl"):
+        shutil.copy(os.path.join(BASELINE, "baseline_" + name), name)
+    return tmp_path
+
+
+def contents(book, notes_book):
+    return sorted(book.data), sorted((contact, note.text) for contact, note_list in notes_book.data.items()
+                                     for note in note_list)
+
+
+def test_pickled_books_are_migrated_once(data_dir):
+    book, notes_book = open_books()
+    assert contents(book, notes_book) == (["Anna", "Bob"], [("Anna", "buy milk"), ("Bob", "call back")])
+    book.delete("Bob")
+    book.close()
+    book, notes_book = open_books()
+    assert sorted(book.data) == ["Anna"]
+    book.close()
+
+
+def test_failed_migration_is_tried_again(data_dir):
+    shutil.copy("addressbook.pkl", "good.pkl")
+    with open("addressbook.pkl", "wb") as f:
+        f.write(b"not a pickle")
+    with pytest.raises(SnapshotError):
+        open_books()
+    shutil.copy("good.pkl", "addressbook.pkl")
+    book, notes_book = open_books()
+    assert sorted(book.data) == ["Anna", "Bob"]
+    book.close()
+
+
+def test_database_without_the_mark_is_not_migrated_again(data_dir):
+    book, notes_book = open_books()
+    # A database written before the migration was marked
+    book.conn.execute("DELETE FROM meta")
+    book.conn.commit()
+    book.delete("Bob")
+    book.close()
+    book, notes_book = open_books()
+    assert contents(book, notes_book) == (["Anna"], [("Anna", "buy milk"), ("Bob", "call back")])
+    book.close()
+
+
+CONTACTS = [("Anna", ["0501234567"], "anna@example.com", "Ukraine, Kyiv"),
+            ("Bob", ["0671234567", "0501234500"], None, "Lviv, Main 5"),
+            ("Дмитро", ["0931112233"], "dmytro@kyiv.ua", "Київ, Хрещатик 1")]
+QUERIES = ["a", "KYIV", "567", "@", "main 5", "nobody", "kyivbob", "дм", "ДМИТ", "київ", '"x', "ua", "12345"]
+
+
+def fill(book):
+    for name, phones, email, address in CONTACTS:
+        record = Record(name)
+        for phone in phones:
+            record.add_phone(phone)
+        if email:
+            record.add_email(email)
+        record.add_address(address)
+        book.add_record(record)
+
+
+def search_results(book, query):
+    return [(record.name.value, fields) for record, fields in book.search(query)]
+
+
+def test_search_matches_the_address_book(tmp_path):
+    book, db = AddressBook(), SQLiteAddressBook(connect(str(tmp_path / "termibook.db")))
+    fill(book)
+    fill(db)
+    assert db.fts
+    for query in QUERIES:
+        assert search_results(db, query) == search_results(book, query), query
+    for changed in (book, db):
+        changed.find("Anna").add_email("anna@lviv.ua")
+        changed.delete("Bob")
+    for query in QUERIES + ["lviv"]:
+        assert search_results(db, query) == search_results(book, query), query
+    db.close()
+
+
+def test_search_table_is_filled_for_an_existing_database(tmp_path):
+    filename = str(tmp_path / "termibook.db")
+    db = SQLiteAddressBook(connect(filename))
+    fill(db)
+    # A database written before the search table existed
+    db.conn.execute("DROP TABLE contacts_fts")
+    db.close()
+    db = SQLiteAddressBook(connect(filename))
+    assert search_results(db, "kyiv") == [("Anna", ["address"]), ("Дмитро", ["email"])]
+    db.close()
@@ -0,0 +1,138 @@
+import os
+import pickle
+import shutil
+from datetime import date
+import pytest
+from addressbook import AddressBook, Record, load_data
+from errors import SnapshotError, SnapshotFallbackWarning
+from main import open_books
+from storage import Journal, dump_snapshot, save_snapshot, load_snapshot, generation_files
+
+
+def book_with(*names):
+    book = AddressBook()
+    for name in names:
+        book.add_record(Record(name))
+    return book
+
+
+@pytest.fixture
+def filename(tmp_path):
+    filename = str(tmp_path / "addressbook.pkl")
+    # Three saves: the newest in the file, the older ones in .1 and .2
+    for names in (["Anna"], ["Anna", "Bob"], ["Anna", "Bob", "Carl"]):
+        save_snapshot(book_with(*names), filename)
+    return filename
+
+
+def damage(filename, how):
+    with open(filename, "rb") as f:
+        data = bytearray(f.read())
+    if how == "truncated":
+        data = data[:len(data) // 2]
+    elif how == "flipped":
+        data[-10] ^= 0xFF
+    elif how == "header":
+        data = data[:10]
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+def test_generations_are_kept(filename):
+    assert [os.path.exists(name) for name in generation_files(filename)] == [True, True, True, False]
+    assert sorted(load_snapshot(filename).data) == ["Anna", "Bob", "Carl"]
+
+
+@pytest.mark.parametrize("how", ["truncated", "flipped", "header"])
+def test_damaged_snapshot_falls_back_to_the_previous_generation(filename, how):
+    damage(filename, how)
+    with pytest.warns(SnapshotFallbackWarning, match=r"\.pkl\.1"):
+        assert sorted(load_snapshot(filename).data) == ["Anna", "Bob"]
+
+
+def test_missing_snapshot_falls_back_to_the_previous_generation(filename):
+    os.remove(filename)  # e.g. a crash between the two renames
+    with pytest.warns(SnapshotFallbackWarning, match="missing"):
+        assert sorted(load_data(filename).data) == ["Anna", "Bob"]
+
+
+def test_newest_valid_generation_is_used(filename):
+    damage(filename, "flipped")
+    damage(filename + ".1", "truncated")
+    with pytest.warns(SnapshotFallbackWarning, match=r"\.pkl\.2"):
+        assert sorted(load_snapshot(filename).data) == ["Anna"]
+
+
+def test_loading_an_older_generation_is_reported(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    for names in (["Anna"], ["Anna", "Bob"]):
+        save_snapshot(book_with(*names), "addressbook.pkl")
+    damage("addressbook.pkl", "flipped")
+    book, notes_book = open_books(Journal(str(tmp_path / "journal.log")))
+    assert sorted(book.data) == ["Anna"]
+    err = capsys.readouterr().err
+    assert "addressbook.pkl.1" in err and "checksum" in err
+
+
+def test_no_valid_generation_is_an_error(filename):
+    for name in generation_files(filename):
+        if os.path.exists(name):
+            damage(name, "flipped")
+    with pytest.raises(SnapshotError, match="checksum"):
+        load_data(filename)
+
+
+def test_missing_snapshot_is_not_an_error(tmp_path):
+    assert len(load_data(str(tmp_path / "addressbook.pkl")).data) == 0
+
+
+def test_plain_pickle_of_earlier_versions_is_read(tmp_path):
+    filename = str(tmp_path / "addressbook.pkl")
+    with open(filename, "wb") as f:
+        pickle.dump(book_with("Anna"), f)
+    assert list(load_data(filename).data) == ["Anna"]
+
+
+def test_newer_format_version_is_refused(tmp_path):
+    filename = str(tmp_path / "addressbook.pkl")
+    data = bytearray(dump_snapshot(book_with("Anna")))
+    data[8] += 1  # format version, after the magic
+    with open(filename, "wb") as f:
+        f.write(data)
+    with pytest.raises(SnapshotError, match="newer"):
+        load_snapshot(filename)
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def baseline_files(tmp_path, monkeypatch):
+    # Written by the first version, run as "python main.py": the classes are __main__.AddressBook, ...
+    monkeypatch.chdir(tmp_path)
+    for name in ("addressbook.pkl", "notesbook.pkl"):
+        shutil.copy(os.path.join(BASELINE, "baseline_" + name), name)
+
+
+def check_baseline_books(book, notes_book):
+    assert sorted(book.data) == ["Anna", "Bob"]
+    anna = book.find("anna")
+    assert [phone.value for phone in anna.phones] == ["0501234567", "0671234567"]
+    assert anna.email.value == "anna@example.com"
+    assert anna.birthday.value.date() == date(1992, 2, 29)
+    assert anna.address.value == "Kyiv, Khreshchatyk 1"
+    assert sorted(record.name.value for record in book.find_by_phone("0501234567")) == ["Anna", "Bob"]
+    assert [note.text for _, note in notes_book.search_by_tag("shop")] == ["buy milk"]
+    assert [note.text for note in notes_book.get_notes("Bob")] == ["call back"]
+
+
+@pytest.mark.parametrize("storage", ["pickle", "columnar"])
+def test_books_saved_by_the_first_version_load(baseline_files, storage):
+    journal = Journal()
+    book, notes_book = open_books(journal, storage)
+    try:
+        check_baseline_books(book, notes_book)
+    finally:
+        journal.close()
+        if storage == "columnar":
+            book.close()
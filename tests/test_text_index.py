@@ -0,0 +1,182 @@
+import math
+import random
+import pytest
+from text_index import TextIndex, SubstringIndex, NameIndex, tokenize, K1, B
+
+WORDS = ["milk", "bread", "butter", "buy", "call", "mom", "meeting", "monday", "egg", "eggs", "eggplant", "tea"]
+
+
+def random_texts(rng, count):
+    return {n: " ".join(rng.choices(WORDS, k=rng.randint(1, 8))) for n in range(count)}
+
+
+def brute_force_search(texts, query):
+    # Straight from the definitions: AND inside a group, OR between groups,
+    # "word*" matches every word starting with it, BM25 summed over matching terms
+    docs = {key: tokenize(text) for key, text in texts.items()}
+    avg_len = sum(map(len, docs.values())) / len(docs)
+    groups = [[]]
+    for word in query.split():
+        if word == "OR":
+            groups.append([])
+        else:
+            groups[-1].append((word.rstrip("*").lower(), word.endswith("*")))
+    scores = {}
+    for group in filter(None, groups):
+        expansions = [sorted({token for tokens in docs.values() for token in tokens
+                              if token == term or (is_prefix and token.startswith(term))})
+                      for term, is_prefix in group]
+        for key, tokens in docs.items():
+            if not all(any(term in tokens for term in terms) for terms in expansions):
+                continue
+            for terms in expansions:
+                for term in terms:
+                    freq = tokens.count(term)
+                    if not freq:
+                        continue
+                    df = sum(term in other for other in docs.values())
+                    idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                    norm = K1 * (1 - B + B * len(tokens) / avg_len)
+                    scores[key] = scores.get(key, 0.0) + idf * freq * (K1 + 1) / (freq + norm)
+    return scores
+
+
+QUERIES = ["milk", "buy milk", "egg*", "eggs", "mom OR tea", "buy egg* OR call monday", "m*", "nothing", "bread butter tea"]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_text_search_matches_brute_force(query):
+    texts = random_texts(random.Random(5), 300)
+    index = TextIndex()
+    for key, text in texts.items():
+        index.add(key, text)
+    found = dict(index.search(query))
+    expected = brute_force_search(texts, query)
+    assert found.keys() == expected.keys()
+    for key, score in expected.items():
+        assert found[key] == pytest.approx(score)
+    scores = [score for _, score in index.search(query)]
+    assert scores == sorted(scores, reverse=True)
+    assert [key for key, _ in index.search(query, 5)] == [key for key, _ in index.search(query)][:5]
+
+
+def test_text_search_after_replacing_and_removing_documents():
+    rng = random.Random(7)
+    texts = random_texts(rng, 200)
+    index = TextIndex()
+    for key, text in texts.items():
+        index.add(key, text)
+    for key in rng.sample(sorted(texts), 60):
+        texts[key] = " ".join(rng.choices(WORDS, k=3))
+        index.add(key, texts[key])
+    for key in rng.sample(sorted(texts), 60):
+        del texts[key]
+        index.remove(key)
+    for query in QUERIES:
+        found = dict(index.search(query))
+        expected = brute_force_search(texts, query)
+        assert found.keys() == expected.keys()
+        assert all(found[key] == pytest.approx(score) for key, score in expected.items())
+
+
+def test_shards_ranked_with_global_statistics_match_one_index():
+    texts = random_texts(random.Random(9), 300)
+    whole, shards = TextIndex(), [TextIndex(), TextIndex(), TextIndex()]
+    for key, text in texts.items():
+        whole.add(key, text)
+        shards[key % 3].add(key, text)
+    for query in QUERIES:
+        doc_count = total_len = 0
+        frequencies = {}
+        for shard in shards:
+            count, length, shard_frequencies = shard.statistics(query)
+            doc_count += count
+            total_len += length
+            for term, frequency in shard_frequencies.items():
+                frequencies[term] = frequencies.get(term, 0) + frequency
+        merged = {}
+        for shard in shards:
+            merged.update(shard.search(query, statistics=(doc_count, total_len, frequencies)))
+        expected = dict(whole.search(query))
+        assert merged.keys() == expected.keys()
+        assert all(merged[key] == pytest.approx(score) for key, score in expected.items())
+
+
+FIELDS = ("name", "phone", "email", "address")
+
+
+def random_fields(rng):
+    letters = "abcdeé1 @."
+    return {field: "".join(rng.choices(letters, k=rng.randint(0, 12))) or None for field in FIELDS}
+
+
+def brute_force_substring(docs, query):
+    query = query.lower()
+    results = {}
+    for key, fields in docs.items():
+        matched = [field for field in FIELDS if query and fields[field] and query in fields[field].lower()]
+        if matched:
+            results[key] = matched
+    return results
+
+
+def test_substring_search_matches_brute_force():
+    rng = random.Random(11)
+    docs = {f"contact {n}": random_fields(rng) for n in range(400)}
+    index = SubstringIndex()
+    for key, fields in docs.items():
+        index.add(key, fields)
+    for key in rng.sample(sorted(docs), 100):
+        docs[key] = random_fields(rng)
+        index.add(key, docs[key])
+    for key in rng.sample(sorted(docs), 100):
+        del docs[key]
+        index.remove(key)
+    queries = ["", "a", "É", "1 ", "ab", "abc", "cde", "@.", "a@b.", "zzz"]
+    queries += ["".join(rng.choices("abcde1 @.", k=rng.randint(1, 5))) for _ in range(100)]
+    for query in queries:
+        assert index.search(query) == brute_force_substring(docs, query), query
+
+
+def levenshtein(a, b):
+    row = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, other in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (char != other))
+    return row[-1]
+
+
+def random_names(rng, count):
+    # A small alphabet, so that many names are a few edits apart
+    return {"".join(rng.choices("abcé ", k=rng.randint(0, 7))) for _ in range(count)}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_name_index_similar_matches_levenshtein(seed):
+    rng = random.Random(seed)
+    keys = random_names(rng, 300)
+    index = NameIndex(keys)
+    for query in list(random_names(rng, 30)) + rng.sample(sorted(keys), 10):
+        distances = sorted((levenshtein(query, key), key) for key in keys)
+        for max_distance in (0, 1, 2, 3):
+            expected = [(distance, key) for distance, key in distances if distance <= max_distance]
+            assert index.similar(query, max_distance) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_name_index_complete_matches_startswith(seed):
+    rng = random.Random(seed)
+    keys = random_names(rng, 300)
+    index = NameIndex()
+    for key in keys:
+        index.add(key)
+    removed = set(rng.sample(sorted(keys), 50))
+    for key in removed:
+        index.remove(key)
+    keys -= removed
+    assert len(index) == len(keys)
+    for prefix in ["", "a", "ab", "é", "c b"] + [key[:2] for key in rng.sample(sorted(keys), 10)]:
+        expected = sorted(key for key in keys if key.startswith(prefix))
+        assert index.complete(prefix) == expected
+        assert index.complete(prefix, 3) == expected[:3]